@@ -8,18 +8,18 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.appendsourcefabric.org/superdesk/license
 
-import itertools
 import html
 import datetime
 from flask.globals import g
-import superdesk
 
 from superdesk.errors import ParserError
 from superdesk.etree import etree
 from superdesk.io.feed_parsers.newsml_1_2 import NewsMLOneFeedParser
 from superdesk.io.iptc import subject_codes
 from .belga_newsml_mixin import BelgaNewsMLMixin
-from superdesk import get_resource_service
+from .context import ParseContextMixin
+from .sanitize import sanitize_item
+from ...subjects import SubjectSet, unique_subjects
 
 
 class SkipItemException(Exception):
@@ -28,7 +28,9 @@ class SkipItemException(Exception):
     pass
 
 
-class BaseBelgaNewsMLOneFeedParser(BelgaNewsMLMixin, NewsMLOneFeedParser):
+class BaseBelgaNewsMLOneFeedParser(
+    ParseContextMixin, BelgaNewsMLMixin, NewsMLOneFeedParser
+):
     """Base Feed Parser for NewsML format, specific AFP, ANP, .. Belga xml."""
 
     def parse(self, xml, provider=None):
@@ -62,61 +64,103 @@ class BaseBelgaNewsMLOneFeedParser(BelgaNewsMLMixin, NewsMLOneFeedParser):
         :param provider:
         :return:
         """
-        try:
-            items = []
-            self.root = xml
+        with self.parse_context(xml, provider) as context:
+            try:
+                elements = xml.iterchildren("NewsEnvelope", "NewsItem")
+                return list(self.parse_elements(elements))
+            except Exception as ex:
+                raise ParserError.newsmlOneParserError(ex, context.provider)
+
+    def iterparse(self, source, provider=None):
+        """
+        Parse the xml newsml file incrementally, item by item.
 
-            # parser the NewsEnvelope element
-            item_envelop = self.parse_newsenvelop(xml.find("NewsEnvelope"))
+        Items are generated as soon as their NewsItem element is parsed and parsed
+        elements are removed from the tree, so memory usage doesn't grow with number
+        of NewsItems in the file.
+        Items generated before an invalid part of the file are not parsed again.
 
-            # parser the NewsItem element
-            l_newsitem_el = xml.findall("NewsItem")
-            for newsitem_el in l_newsitem_el:
+        :param source: file name or file object
+        :param provider:
+        :return: generator of items
+        """
+        context = self.context_class(source, provider)
+        items = self.parse_elements(self._iterparse_elements(source))
+        while True:
+            with self.activate_context(context):
                 try:
-                    item = item_envelop.copy()
-                    self.parse_newsitem(item, newsitem_el)
-                    # add product is NEWS/GENERAL, if product is empty
-                    if not [
-                        it
-                        for it in item.get("subject", [])
-                        if it.get("scheme") == "services-products"
-                    ]:
-                        item.setdefault("subject", []).append(
-                            {
-                                "name": "NEWS/GENERAL",
-                                "qcode": "NEWS/GENERAL",
-                                "parent": "NEWS",
-                                "scheme": "services-products",
-                            }
-                        )
-                    # Distribution is default
-                    item.setdefault("subject", []).extend(
-                        [
-                            {
-                                "name": "default",
-                                "qcode": "default",
-                                "scheme": "distribution",
-                            },
-                        ]
+                    item = next(items)
+                except StopIteration:
+                    return
+                except Exception as ex:
+                    raise ParserError.newsmlOneParserError(ex, context.provider)
+            yield item
+
+    def _iterparse_elements(self, source):
+        """Generate NewsEnvelope and NewsItem elements of NewsML, clear them once they are parsed."""
+        for _, element in etree.iterparse(
+            source, events=("end",), tag=("NewsEnvelope", "NewsItem")
+        ):
+            parent = element.getparent()
+            # skip NewsItems nested in NewsComponent, they are part of the parent item
+            if parent is None or parent.getparent() is not None:
+                continue
+            yield element
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+
+    def parse_elements(self, elements):
+        """
+        Generate items of NewsML elements.
+
+        :param elements: NewsEnvelope and NewsItem elements in document order
+        :return: generator of items
+        """
+        item_envelop = {}
+        for element in elements:
+            if element.tag == "NewsEnvelope":
+                # parser the NewsEnvelope element
+                item_envelop = self.parse_newsenvelop(element)
+                continue
+
+            # parser the NewsItem element
+            try:
+                item = item_envelop.copy()
+                self.parse_newsitem(item, element)
+                # add product is NEWS/GENERAL, if product is empty
+                if not [
+                    it
+                    for it in item.get("subject", [])
+                    if it.get("scheme") == "services-products"
+                ]:
+                    item.setdefault("subject", []).append(
+                        {
+                            "name": "NEWS/GENERAL",
+                            "qcode": "NEWS/GENERAL",
+                            "parent": "NEWS",
+                            "scheme": "services-products",
+                        }
                     )
-                    # Slugline and keywords is epmty
-                    item["slugline"] = None
-                    item["keywords"] = []
-                    # remove duplicated subject
-                    item["subject"] = [
-                        dict(i)
-                        for i, _ in itertools.groupby(
-                            sorted(item["subject"], key=lambda k: k["qcode"])
-                        )
+                # Distribution is default
+                item.setdefault("subject", []).extend(
+                    [
+                        {
+                            "name": "default",
+                            "qcode": "default",
+                            "scheme": "distribution",
+                        },
                     ]
-                    item = self.populate_fields(item)
-                except SkipItemException:
-                    continue
-                items.append(item)
-            return items
-
-        except Exception as ex:
-            raise ParserError.newsmlOneParserError(ex, provider)
+                )
+                # Slugline and keywords is epmty
+                item["slugline"] = None
+                item["keywords"] = []
+                # remove duplicated subject
+                item["subject"] = unique_subjects(item["subject"])
+                item = self.populate_fields(item)
+            except SkipItemException:
+                continue
+            yield sanitize_item(item)
 
     def parse_newsenvelop(self, envelop_el):
         """
@@ -712,34 +756,22 @@ class BaseBelgaNewsMLOneFeedParser(BelgaNewsMLMixin, NewsMLOneFeedParser):
         :returns [{"qcode": "01001000", "name": "archaeology"}, {"qcode": "01002000", "name": "architecture"}]
         :rtype list
         """
-        formatted_subjects = []
+        formatted_subjects = SubjectSet()
 
-        def is_not_formatted(qcode):
-            for formatted_subject in formatted_subjects:
-                if formatted_subject["qcode"] == qcode:
-                    return False
-            return True
-
-        iptcsc_cv = self._get_cv("iptc_subject_codes")
+        iptcsc_map = self.context.get_subject_map("iptc_subject_codes")
         for subject in subjects:
             formal_name = subject.get("FormalName")
-            for item in iptcsc_cv.get("items", []):
-                if item.get("is_active"):
-                    #: check formal_name, format formal_name and filter missing subjects
-                    if (
-                        formal_name
-                        and is_not_formatted(formal_name)
-                        and item.get("qcode") == formal_name
-                    ):
-                        formatted_subjects.append(
-                            {
-                                "qcode": formal_name,
-                                "name": subject_codes.get(formal_name, ""),
-                                "scheme": "iptc_subject_codes",
-                            }
-                        )
-
-        return formatted_subjects
+            #: check formal_name, format formal_name and filter missing subjects
+            if formal_name and formal_name in iptcsc_map:
+                formatted_subjects.add(
+                    {
+                        "qcode": formal_name,
+                        "name": subject_codes.get(formal_name, ""),
+                        "scheme": "iptc_subject_codes",
+                    }
+                )
+
+        return list(formatted_subjects)
 
     def _plain_to_html(self, text):
         # escape characters
@@ -752,9 +784,13 @@ class BaseBelgaNewsMLOneFeedParser(BelgaNewsMLMixin, NewsMLOneFeedParser):
         return "<p>" + text + "</p>"
 
     def _get_cv(self, _id):
-        return superdesk.get_resource_service("vocabularies").find_one(
-            req=None, _id=_id
-        )
+        return self.context.get_cv(_id)
+
+    def _get_countries(self, country_code):
+        if not country_code:
+            return []
+
+        return self.context.get_cv_items("countries", qcode=country_code.lower())
 
     def _add_genre(self, item, name, qcode=None):
         genre = dict(
@@ -10,11 +10,11 @@
 
 import pytz
 import re
-import itertools
 
 from superdesk.io.registry import register_feed_parser
 
 from .base_belga_newsml_1_2 import BaseBelgaNewsMLOneFeedParser
+from ...subjects import unique_subjects
 import logging
 from superdesk import get_resource_service
 
@@ -74,12 +74,7 @@ class BelgaANPNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                     # SDBELGA-713
                     item.setdefault("subject", []).extend(self._get_keywords(keyword))
                 item["subject"].remove(subject)
-                item["subject"] = [
-                    dict(i)
-                    for i, _ in itertools.groupby(
-                        sorted(item["subject"], key=lambda k: k["qcode"])
-                    )
-                ]
+                item["subject"] = unique_subjects(item["subject"])
 
         # SDBELGA-530
         if not item.get("extra", {}).get("city"):
@@ -26,6 +26,9 @@ from superdesk.metadata.item import (
 import pytz
 from superdesk.metadata.utils import generate_guid
 
+from .sanitize import sanitize_item
+from .sniff import read_lines, sniff
+
 
 class BelgaANPAFeedParser(ANPAFeedParser):
     """
@@ -42,13 +45,11 @@ class BelgaANPAFeedParser(ANPAFeedParser):
         "S": "NEWS/SPORTS",
     }
 
+    HEADER_RE = re.compile(b"\x01([a-z])([0-9]{4})KYODO\x1f([a-z0-9-]+)", flags=re.I)
+
     def can_parse(self, file_path):
         try:
-            with open(file_path, "rb") as f:
-                lines = [line for line in f]
-                return re.match(
-                    b"\x01([a-z])([0-9]{4})KYODO\x1f([a-z0-9-]+)", lines[0], flags=re.I
-                )
+            return sniff(file_path, self.NAME, self.HEADER_RE.match)
         except Exception:
             return False
 
@@ -60,8 +61,7 @@ class BelgaANPAFeedParser(ANPAFeedParser):
                 FORMAT: FORMATS.HTML,
             }
 
-            with open(file_path, "rb") as f:
-                lines = [line for line in f]
+            lines = read_lines(file_path)
 
             # parse first header line
             m = re.match(
@@ -121,10 +121,8 @@ class BelgaANPAFeedParser(ANPAFeedParser):
                 item["versioncreated"] = item["firstcreated"]
 
             # parse anpa content
-            body = b"".join(lines[2:])
-            m = re.match(b"\x02(.*)\x03", body, flags=re.M + re.S)
-            if m:
-                text = m.group(1).decode("latin-1", "replace").split("\n")
+            text = self._get_content_lines(lines[2:])
+            if text is not None:
                 item["keywords"] = text[0].strip("\r").split("-")
                 item["abstract"] = (
                     re.split("\\..?", ("".join(line.strip() for line in text[2:-1])))[0]
@@ -133,44 +131,69 @@ class BelgaANPAFeedParser(ANPAFeedParser):
                 item.setdefault("extra", {})["city"] = item.get("abstract", "").split(
                     ","
                 )[0]
-                is_header = True
-                for line in text:
-                    if line == text[0]:
-                        m = re.match("BC-(.*)", line, flags=re.I)
-                        if m:
-                            item["slugline"] = str.rstrip(m.group(1), "\r")
-                            continue
-                    if is_header is True:
-                        if line.endswith("+\r"):
-                            is_header = False
-                        line = (
-                            line.rstrip("\r")
-                            if is_header is True
-                            else line.rstrip("+\r")
-                        )
-                        line = line
-                        if "headline" in item:
-                            item["headline"] += line
-                        else:
-                            item["headline"] = line
-                        continue
-
-                    if line == "==Kyodo\r":
-                        break
-                    line = line.rstrip("\r")
-
-                    if "body_html" in item:
-                        item["body_html"] += "<p>" + line + "</p>"
-                    else:
-                        item["body_html"] = "<p>" + line + "</p>"
-
+                self._parse_content(item, text)
                 self._parse_ednote(item["headline"], item)
             # Slugline and keywords is epmty
             item["slugline"] = None
             item["keywords"] = []
-            return item
+            return sanitize_item(item)
         except Exception as ex:
             raise ParserError.anpaParseFileError(file_path, ex)
 
+    def _get_content_lines(self, lines):
+        """
+        Get decoded lines of content between STX and the last ETX.
+
+        :param lines: lines of the file following header lines
+        :return: list of lines without line feeds or None if there is no content
+        """
+        if not lines or not lines[0].startswith(b"\x02"):
+            return None
+        for end in range(len(lines) - 1, -1, -1):
+            etx = lines[end].rfind(b"\x03")
+            if etx != -1:
+                break
+        else:
+            return None
+        content = lines[: end + 1]
+        content[-1] = content[-1][:etx]
+        content[0] = content[0][1:]
+        return [
+            (line[:-1] if line.endswith(b"\n") else line).decode("latin-1", "replace")
+            for line in content
+        ]
+
+    def _parse_content(self, item, text):
+        """
+        Parse slugline, headline and body from content lines.
+
+        Headline ends with the line ending with "+", body ends with "==Kyodo" line.
+
+        :param item: parsed item
+        :param text: content lines
+        """
+        slugline = re.match("BC-(.*)", text[0], flags=re.I)
+        headline = []
+        body = []
+        is_header = True
+        for line in text:
+            if slugline and line == text[0]:
+                item["slugline"] = str.rstrip(slugline.group(1), "\r")
+                continue
+            if is_header:
+                if line.endswith("+\r"):
+                    is_header = False
+                    headline.append(line.rstrip("+\r"))
+                else:
+                    headline.append(line.rstrip("\r"))
+                continue
+            if line == "==Kyodo\r":
+                break
+            body.append("<p>" + line.rstrip("\r") + "</p>")
+        if headline:
+            item["headline"] = "".join(headline)
+        if body:
+            item["body_html"] = "".join(body)
+
 
 register_feed_parser(BelgaANPAFeedParser.NAME, BelgaANPAFeedParser())
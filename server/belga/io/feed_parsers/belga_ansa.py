@@ -18,6 +18,29 @@ import pytz
 from superdesk.utc import local_to_utc
 import arrow
 
+from ...subjects import SubjectSet
+from .sanitize import sanitize_item
+
+
+def remove_comments(xml):
+    """
+    Remove comments from `xml` tree in place.
+
+    Text following a comment is kept, same as when the file is parsed
+    with ``remove_comments=True``.
+    """
+    for comment in list(xml.iter(etree.Comment)):
+        parent = comment.getparent()
+        if parent is None:
+            continue
+        if comment.tail:
+            previous = comment.getprevious()
+            if previous is not None:
+                previous.tail = (previous.tail or "") + comment.tail
+            else:
+                parent.text = (parent.text or "") + comment.tail
+        parent.remove(comment)
+
 
 class BelgaANSAFeedParser(NITFFeedParser):
     """
@@ -39,22 +62,15 @@ class BelgaANSAFeedParser(NITFFeedParser):
         "NS042": "English Media Service",
     }
 
-    def __init__(self):
-        super().__init__()
-        self._provider = None
-
     def can_parse(self, xml):
         return xml.tag.endswith("nitf")
 
     def parse(self, xml, provider=None):
         # removes unwanted comments
-        uncommented_xml = etree.fromstring(
-            etree.tostring(xml, encoding="unicode"),
-            parser=etree.XMLParser(remove_comments=True),
-        )
-        item = super().parse(uncommented_xml, provider)
-        self.meta_parse(uncommented_xml, item)
-        return item
+        remove_comments(xml)
+        item = super().parse(xml, provider)
+        self.meta_parse(xml, item)
+        return sanitize_item(item)
 
     def meta_parse(self, xml, item):
         """
@@ -170,34 +186,27 @@ class BelgaANSAFeedParser(NITFFeedParser):
         """
         Function for Mapping IPTC Subject
         """
-        formatted_subjects = []
-
-        def is_not_formatted(qcode):
-            for formatted_subject in formatted_subjects:
-                if formatted_subject["qcode"] == qcode:
-                    return False
-            return True
+        formatted_subjects = SubjectSet()
 
         iptcsc_cv = self._get_cv("iptc_subject_codes")
+        active_qcodes = {
+            item.get("qcode")
+            for item in iptcsc_cv.get("items", [])
+            if item.get("is_active")
+        }
         for subject in subjects:
             content = subject.attrib.get("content")
-            for item in iptcsc_cv.get("items", []):
-                if item.get("is_active"):
-                    #: check formal_name, format formal_name and filter missing subjects
-                    if (
-                        content
-                        and is_not_formatted(content)
-                        and item.get("qcode") == content
-                    ):
-                        formatted_subjects.append(
-                            {
-                                "qcode": content,
-                                "name": subject_codes.get(content, ""),
-                                "scheme": "iptc_subject_codes",
-                            }
-                        )
-
-        return formatted_subjects
+            #: check formal_name, format formal_name and filter missing subjects
+            if content and content in active_qcodes:
+                formatted_subjects.add(
+                    {
+                        "qcode": content,
+                        "name": subject_codes.get(content, ""),
+                        "scheme": "iptc_subject_codes",
+                    }
+                )
+
+        return list(formatted_subjects)
 
     def _get_cv(self, _id):
         return get_resource_service("vocabularies").find_one(req=None, _id=_id)
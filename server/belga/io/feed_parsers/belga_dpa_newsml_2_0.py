@@ -10,7 +10,6 @@
 
 import pytz
 import logging
-import itertools
 import dateutil.parser
 from xml.etree import ElementTree
 
@@ -21,6 +20,10 @@ from superdesk.errors import ParserError
 from superdesk.metadata.item import CONTENT_TYPE
 
 from .belga_newsml_mixin import BelgaNewsMLMixin
+from .context import ParseContextMixin
+from .sanitize import sanitize_item
+from .xpaths import compile_xpath
+from ...subjects import unique_subjects
 from superdesk import get_resource_service
 
 logger = logging.getLogger(__name__)
@@ -29,8 +32,21 @@ NS = {
     "iptc": "http://iptc.org/std/nar/2006-10-01/",
 }
 
+# all paths are relative to the item
+PUBLICATION_DATE_XPATH = compile_xpath(
+    './/xhtml:body/xhtml:header/xhtml:time[@class="publicationDate"]/@data-datetime',
+    NS,
+)
+GENRE_XPATH = compile_xpath(".//iptc:genre", NS)
+MAIN_SECTION_XPATH = compile_xpath(
+    './/xhtml:body//xhtml:section[contains(@class,"main")]', NS
+)
+BODY_XPATH = compile_xpath(".//xhtml:body", NS)
 
-class BelgaDPANewsMLTwoFeedParser(BelgaNewsMLMixin, NewsMLTwoFeedParser):
+
+class BelgaDPANewsMLTwoFeedParser(
+    ParseContextMixin, BelgaNewsMLMixin, NewsMLTwoFeedParser
+):
     """
     Feed Parser which can parse DPA variant of NewsML
     """
@@ -53,97 +69,90 @@ class BelgaDPANewsMLTwoFeedParser(BelgaNewsMLMixin, NewsMLTwoFeedParser):
         return xml.tag.endswith("newsMessage")
 
     def parse(self, xml, provider=None):
-        self.root = xml
-        items = []
-        try:
-            for item_set in xml.findall(self.qname("itemSet")):
-                for item_tree in item_set:
-                    item = self.parse_item(item_tree)
-                    try:
-                        published = item_tree.xpath(
-                            ".//xhtml:body/xhtml:header/"
-                            'xhtml:time[@class="publicationDate"]/@data-datetime',
-                            namespaces=NS,
-                        )[0]
-                    except IndexError:
-                        item["firstcreated"] = item["versioncreated"]
-                    else:
-                        item["firstcreated"] = dateutil.parser.parse(published)
-                    item["firstcreated"] = item["firstcreated"].astimezone(pytz.utc)
-                    item["versioncreated"] = item["versioncreated"].astimezone(pytz.utc)
+        with self.parse_context(xml, provider):
+            items = []
+            try:
+                for item_set in xml.findall(self.qname("itemSet")):
+                    for item_tree in item_set:
+                        item = self.parse_item(item_tree)
+                        try:
+                            published = PUBLICATION_DATE_XPATH(item_tree)[0]
+                        except IndexError:
+                            item["firstcreated"] = item["versioncreated"]
+                        else:
+                            item["firstcreated"] = dateutil.parser.parse(published)
+                        item["firstcreated"] = item["firstcreated"].astimezone(pytz.utc)
+                        item["versioncreated"] = item["versioncreated"].astimezone(
+                            pytz.utc
+                        )
 
-                    if item["urgency"] == 4:
-                        item["urgency"] = 3
+                        if item["urgency"] == 4:
+                            item["urgency"] = 3
 
-                    # mapping services-products
-                    for cat in item.get("anpa_category", []):
-                        qcode = self.MAPPING_CATEGORY.get(
-                            cat.get("qcode", "").upper(), "NEWS/GENERAL"
-                        )
-                        item.setdefault("subject", []).append(
-                            {
-                                "name": qcode,
-                                "qcode": qcode,
-                                "parent": "NEWS",
-                                "scheme": "services-products",
-                            }
-                        )
-                        break
-                    else:
-                        item.setdefault("subject", []).append(
-                            {
-                                "name": "NEWS/GENERAL",
-                                "qcode": "NEWS/GENERAL",
-                                "parent": "NEWS",
-                                "scheme": "services-products",
-                            }
-                        )
+                        # mapping services-products
+                        for cat in item.get("anpa_category", []):
+                            qcode = self.MAPPING_CATEGORY.get(
+                                cat.get("qcode", "").upper(), "NEWS/GENERAL"
+                            )
+                            item.setdefault("subject", []).append(
+                                {
+                                    "name": qcode,
+                                    "qcode": qcode,
+                                    "parent": "NEWS",
+                                    "scheme": "services-products",
+                                }
+                            )
+                            break
+                        else:
+                            item.setdefault("subject", []).append(
+                                {
+                                    "name": "NEWS/GENERAL",
+                                    "qcode": "NEWS/GENERAL",
+                                    "parent": "NEWS",
+                                    "scheme": "services-products",
+                                }
+                            )
 
-                    # Source is DPA
-                    credit = {"name": "DPA", "qcode": "DPA", "scheme": "sources"}
-                    item.setdefault("subject", []).append(credit)
-                    # Distribution is default
-                    dist = {
-                        "name": "default",
-                        "qcode": "default",
-                        "scheme": "distribution",
-                    }
-                    item.setdefault("subject", []).append(dist)
-                    # Slugline and keywords is epmty
-                    item["slugline"] = None
-                    item["keywords"] = []
-                    # Find genres and verify their roles and qcodes to acceptance criteria.
-                    genres = item_tree.xpath("//iptc:genre", namespaces=NS)
-                    for genre in genres:
-                        genre_qcode = genre.get("qcode")
-                        if genre_qcode and genre_qcode != "dpatextgenre:1":
-                            genre_names = genre.findall(self.qname("name"))
-                            if genre_names:
-                                for genre_name in genre_names:
-                                    try:
-                                        genre_role = genre_name.attrib["role"]
-                                        if genre_role == "nrol:display":
-                                            item["headline"] = (
-                                                "({genre}): {headline}".format(
-                                                    genre=genre_name.text,
-                                                    headline=item["headline"],
+                        # Source is DPA
+                        credit = {"name": "DPA", "qcode": "DPA", "scheme": "sources"}
+                        item.setdefault("subject", []).append(credit)
+                        # Distribution is default
+                        dist = {
+                            "name": "default",
+                            "qcode": "default",
+                            "scheme": "distribution",
+                        }
+                        item.setdefault("subject", []).append(dist)
+                        # Slugline and keywords is epmty
+                        item["slugline"] = None
+                        item["keywords"] = []
+                        # Find genres and verify their roles and qcodes to acceptance criteria.
+                        genres = GENRE_XPATH(item_tree)
+                        for genre in genres:
+                            genre_qcode = genre.get("qcode")
+                            if genre_qcode and genre_qcode != "dpatextgenre:1":
+                                genre_names = genre.findall(self.qname("name"))
+                                if genre_names:
+                                    for genre_name in genre_names:
+                                        try:
+                                            genre_role = genre_name.attrib["role"]
+                                            if genre_role == "nrol:display":
+                                                item["headline"] = (
+                                                    "({genre}): {headline}".format(
+                                                        genre=genre_name.text,
+                                                        headline=item["headline"],
+                                                    )
                                                 )
-                                            )
-                                            break
-                                    except KeyError:
-                                        continue
+                                                break
+                                        except KeyError:
+                                            continue
 
-                    # remove duplicated subject
-                    item["subject"] = [
-                        dict(i)
-                        for i, _ in itertools.groupby(
-                            sorted(item["subject"], key=lambda k: k["qcode"])
-                        )
-                    ]
-                    items.append(item)
-            return items
-        except Exception as ex:
-            raise ParserError.newsmlTwoParserError(ex, provider)
+                        # remove duplicated subject
+                        item["subject"] = unique_subjects(item["subject"])
+                        items.append(sanitize_item(item))
+                return items
+            except Exception as ex:
+                raise ParserError.newsmlTwoParserError(ex, provider)
 
     def parse_header(self, tree):
         """Parse header element.
@@ -157,11 +166,9 @@ class BelgaDPANewsMLTwoFeedParser(BelgaNewsMLMixin, NewsMLTwoFeedParser):
 
     def parse_inline_content(self, tree, item):
         try:
-            body_elt = tree.xpath(
-                '//xhtml:body//xhtml:section[contains(@class,"main")]', namespaces=NS
-            )[0]
+            body_elt = MAIN_SECTION_XPATH(tree)[0]
         except IndexError:
-            body_elt = tree.xpath("//xhtml:body", namespaces=NS)[0]
+            body_elt = BODY_XPATH(tree)[0]
         body_elt = sd_etree.clean_html(body_elt)
         content = dict()
         content["contenttype"] = tree.attrib["contenttype"]
@@ -269,5 +276,28 @@ class BelgaDPANewsMLTwoFeedParser(BelgaNewsMLMixin, NewsMLTwoFeedParser):
                     )
         return None
 
+    def getVocabulary(self, voc_id, qcode, name):
+        """
+        Same as `NewsMLTwoFeedParser.getVocabulary`, but vocabulary is read from context.
+
+        Missing items are left to the base parser, it might add them to vocabulary.
+        """
+        voc = self.context.get_cv(voc_id)
+        if voc is None and self.missing_voc == "continue":
+            return name
+        for item in (voc or {}).get("items") or []:
+            if item["qcode"] == qcode:
+                if item.get("is_active", True):
+                    return item.get("name", name)
+                # the vocabulary exists but is disabled
+                raise ValueError
+        return super().getVocabulary(voc_id, qcode, name)
+
+    def _get_countries(self, country_code):
+        if not country_code:
+            return []
+
+        return self.context.get_cv_items("countries", qcode=country_code.lower())
+
 
 register_feed_parser(BelgaDPANewsMLTwoFeedParser.NAME, BelgaDPANewsMLTwoFeedParser())
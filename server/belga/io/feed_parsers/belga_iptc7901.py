@@ -19,10 +19,26 @@ from superdesk.metadata.utils import generate_guid
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE, GUID_TAG
 from superdesk.utc import utcnow
 
+from .context import ParseContext, ParseContextMixin
+from .sanitize import sanitize_item, text_to_html
+from .sniff import read_lines, sniff
+
 logger = logging.getLogger(__name__)
 
 
-class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
+class IPTC7901ParseContext(ParseContext):
+    """
+    Parse context of IPTC 7901 file.
+
+    :param txt_type: detected variant of the file, key of `BelgaIPTC7901FeedParser.types`
+    """
+
+    def __init__(self, root=None, provider=None, txt_type=None):
+        super().__init__(root, provider)
+        self.txt_type = txt_type
+
+
+class BelgaIPTC7901FeedParser(ParseContextMixin, DPAIPTC7901FeedParser):
     """
     Feed Parser which can parse if the feed is in IPTC 7901 format.
     """
@@ -38,7 +54,7 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
         ),
         "ats": (b"(\x7f\x7f|\x7f)", [" = \r\n"]),
     }
-    txt_type = None
+    context_class = IPTC7901ParseContext
 
     MAPPING_PRODUCTS = {
         "ats": {
@@ -58,20 +74,33 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
 
     def can_parse(self, file_path):
         try:
-            BelgaIPTC7901FeedParser.txt_type = None
-            with open(file_path, "rb") as f:
-                lines = list(f)
-                for _type, regex in self.types.items():
-                    check_type = re.match(regex[0], lines[0], flags=re.I)
-                    if check_type:
-                        BelgaIPTC7901FeedParser.txt_type = _type
-                        return check_type
+            return self.match_type(file_path)[1]
         except Exception:
             return False
 
+    def match_type(self, file_path):
+        """
+        Detect variant of IPTC 7901 file by its first line.
+
+        :param file_path:
+        :return: tuple of `types` key and match object, ``(None, None)`` for unknown file
+        """
+        return sniff(file_path, self.NAME, self._match_first_line)
+
+    def _match_first_line(self, first_line):
+        for _type, regex in self.types.items():
+            check_type = re.match(regex[0], first_line, flags=re.I)
+            if check_type:
+                return _type, check_type
+        return None, None
+
     def parse(self, file_path, provider=None):
+        _type, _ = self.match_type(file_path)
+        with self.parse_context(file_path, provider, txt_type=_type):
+            return self.parse_file(file_path, _type, provider)
+
+    def parse_file(self, file_path, _type, provider=None):
         item = {}
-        _type = BelgaIPTC7901FeedParser.txt_type
         if _type == "dpa":
             item = self.parse_content_dpa(file_path, provider)
         if _type == "ats":
@@ -83,24 +112,12 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
         # Markup the text and set the content type
         item["body_html"] = (
             "<p>"
-            + item["body_html"].replace("\r\n", " ").replace("\n", "</p><p>")
+            + text_to_html(item["body_html"])
+            .replace("\r\n", " ")
+            .replace("\n", "</p><p>")
             + "</p>"
         )
-
-        invalid_xmlchars = {
-            "&": "&amp;",
-            "<": "&lt;",
-            ">": "&gt;",
-            "\u0007": " ",
-            "\u0003": " ",
-            "\u0004": " ",
-            "\u001f": " ",
-        }
-        for char, replace_char in invalid_xmlchars.items():
-            item["body_html"].replace(char, replace_char)
-            item["headline"].replace(char, replace_char)
-            item.get("lead", "").replace(char, replace_char)
-
+        sanitize_item(item)
         item[ITEM_TYPE] = CONTENT_TYPE.TEXT
         return item
 
@@ -113,8 +130,7 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
                 "language": "fr",
             }
 
-            with open(file_path, "rb") as f:
-                lines = list(f)
+            lines = read_lines(file_path)
 
             # parse first header line
             m = re.match(
@@ -175,8 +191,7 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
                 "versioncreated": utcnow(),
             }
 
-            with open(file_path, "rb") as f:
-                lines = list(f)
+            lines = read_lines(file_path)
             # parse first header line
             m = re.match(
                 b"([a-zA-Z]*)([0-9]*) (.) ([A-Z]{1,3}) ([0-9]*) ([a-zA-Z0-9 ]*)",
@@ -241,7 +256,7 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
                         continue
                     # dpa end header when line end with especially characters (ex '=\r\n')
                     end_string = self.check_mendwith(
-                        line, self.types[BelgaIPTC7901FeedParser.txt_type][1]
+                        line, self.types[self.context.txt_type][1]
                     )
                     if end_string:
                         if line.startswith("By "):
@@ -291,7 +306,7 @@ class BelgaIPTC7901FeedParser(DPAIPTC7901FeedParser):
         """
         item["headline"] = ""
         headers, divider, the_rest = self.mpartition(
-            item.get("body_html", ""), self.types[BelgaIPTC7901FeedParser.txt_type][1]
+            item.get("body_html", ""), self.types[self.context.txt_type][1]
         )
         # If no divider then there was only one line and that is the headline so clean up the stray '='
         if not divider:
@@ -22,16 +22,13 @@ class BelgaKyodoNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
         return xml.tag == "NewsML"
 
     # SDBELGA - 693
-    def parse(self, xml, provider=None):
-        items = super().parse(xml, provider)
-        location_el = xml.find(
-            "NewsItem/NewsComponent/ContentItem/DataContent/nitf/body/body.head/dateline/location"
+    def parse_newsitem(self, item, newsitem_el):
+        super().parse_newsitem(item, newsitem_el)
+        location_el = newsitem_el.find(
+            "NewsComponent/ContentItem/DataContent/nitf/body/body.head/dateline/location"
         )
         if location_el is not None:
-            for item in items:
-                item.setdefault("extra", {})["city"] = location_el.text
-
-        return items
+            item.setdefault("extra", {})["city"] = location_el.text
 
 
 register_feed_parser(
@@ -11,8 +11,6 @@
 import os
 import hashlib
 import logging
-import itertools
-from io import BytesIO
 from copy import deepcopy
 from uuid import uuid4
 from ftplib import error_perm
@@ -20,11 +18,9 @@ from tempfile import gettempdir
 from datetime import datetime
 
 from flask import current_app as app
-from xml.etree import ElementTree
 
 from superdesk import get_resource_service
 from superdesk.ftp import ftp_connect
-from superdesk.errors import ParserError
 from superdesk.io.registry import register_feed_parser
 from superdesk.io.feeding_services import FileFeedingService, FTPFeedingService
 from superdesk.publish.formatters.newsml_g2_formatter import XML_LANG
@@ -33,10 +29,49 @@ from superdesk.utc import local_to_utc
 from superdesk.metadata.item import ITEM_TYPE, CONTENT_TYPE
 
 from .base_belga_newsml_1_2 import BaseBelgaNewsMLOneFeedParser, SkipItemException
+from .context import ParseContext
+from .sanitize import sanitize_item
+from ...subjects import SubjectSet, unique_subjects
 
 
 logger = logging.getLogger(__name__)
 
+#: size of chunks in which attachment files are read
+FILE_CHUNK_SIZE = 64 * 1024
+#: item field with files found while parsing, they are stored by `store_files`
+PENDING_FILES = "_pending_files"
+#: feeding services which read files from ftp
+FTP_FEEDING_SERVICES = ("ftp", "ftp-belga")
+
+
+def get_checksum(content):
+    """
+    Return sha256 hex digest of `content` file.
+
+    File is read in chunks, so it's not kept in memory, and rewound afterwards.
+    """
+    checksum = hashlib.sha256()
+    for chunk in iter(lambda: content.read(FILE_CHUNK_SIZE), b""):
+        checksum.update(chunk)
+    content.seek(0)
+    return checksum.hexdigest()
+
+
+class BelgaNewsMLOneParseContext(ParseContext):
+    """
+    Parse context of Belga NewsML 1.2 file.
+
+    Every NewsComponent is parsed into separate item based on `item_seed`,
+    which is filled from NewsEnvelope and NewsItem metadata.
+    """
+
+    def __init__(self, root=None, provider=None):
+        super().__init__(root, provider if provider is not None else {})
+        self.items = []
+        self.item_seed = {}
+        # ids of ingested attachments keyed on checksum
+        self.attachments = {}
+
 
 class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
     """Feed Parser which can parse specific Belga News ML xml files."""
@@ -61,9 +96,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
     SUPPORTED_BINARY_ASSET_SUBTYPES = ("SOUND", "CLIP", "COMPONENT", "IMAGE")
     MOVE_FILE = False
 
-    def __init__(self):
-        super().__init__()
-        self._provider = None
+    context_class = BelgaNewsMLOneParseContext
 
     def can_parse(self, xml):
         """
@@ -74,58 +107,74 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
         """
         return xml.tag == "NewsML"
 
-    def parse(self, xml, provider=None):
+    def parse_elements(self, elements):
         """
-        Parse content the xml newsml file to json object.
-
-        Example content the xml newsml file:
-
-        <?xml version="1.0" encoding="utf-8"?>
-        <NewsML Version="1.2">
-          <!--AFP NewsML text-photo profile evolution2-->
-          <!--Processed by Xafp1-4ToNewsML1-2 rev21-->
-          <Catalog Href="http://www.afp.com/dtd/AFPCatalog.xml"/>
-          <NewsEnvelope>
-            ......
-          </NewsEnvelope>
-          <NewsItem xml:lang="fr">
-            <Identification>
-                .......
-            </Identification>
-            <NewsManagement>
-                ......
-            </NewsManagement>
-            <NewsComponent>
-                ......
-            </NewsComponent>
-          </NewsItem>
-        </NewsML>
+        Generate items of NewsML elements.
 
-        :param xml:
-        :param provider:
-        :return:
+        :param elements: NewsEnvelope and NewsItem elements in document order
+        :return: generator of items
         """
+        context = self.context
+        for element in elements:
+            if element.tag == "NewsEnvelope":
+                # parser the NewsEnvelope element
+                context.item_seed.update(self.parse_newsenvelop(element))
+                continue
 
-        self._provider = provider
-        if self._provider is None:
-            self._provider = {}
-
-        try:
-            self.root = xml
-            self._items = []
-            self._item_seed = {}
-            # parser the NewsEnvelope element
-            self._item_seed.update(self.parse_newsenvelop(xml.find("NewsEnvelope")))
             # parser the NewsItem element
-            for newsitem_el in xml.findall("NewsItem"):
-                try:
-                    self.parse_newsitem(newsitem_el)
-                except SkipItemException:
-                    continue
+            try:
+                self.parse_newsitem(element)
+            except SkipItemException:
+                pass
+            # items of NewsComponents parsed before the skipped one are kept
+            items, context.items = context.items, []
+            if not context.storage_deferred:
+                self._store_files(items, context.attachments)
+            for item in items:
+                yield sanitize_item(item)
+
+    def store_files(self, items, provider=None, ingested=None):
+        """
+        Store renditions and attachments of items parsed with deferred storage.
 
-            return self._items
-        except Exception as ex:
-            raise ParserError.newsmlOneParserError(ex, self._provider)
+        :param items: parsed items, their `PENDING_FILES` are stored
+        :param provider: ingest provider
+        :param ingested: ids of ingested attachments keyed on checksum,
+            shared by calls for a batch of files to avoid looking them up again
+        :return: items
+        """
+        with self.parse_context(None, provider):
+            return self._store_files(items, {} if ingested is None else ingested)
+
+    def _store_files(self, items, ingested):
+        pending = [(item, item.pop(PENDING_FILES, None) or []) for item in items]
+        attachments = self._store_attachments(
+            [
+                pending_file
+                for _, pending_files in pending
+                for pending_file in pending_files
+                if pending_file["rendition"] is None
+            ],
+            ingested,
+        )
+        for item, pending_files in pending:
+            item_attachments = [
+                dict(attachments[pending_file["filename"]])
+                for pending_file in pending_files
+                if pending_file["rendition"] is None
+                and pending_file["filename"] in attachments
+            ]
+            if item_attachments:
+                item["attachments"] = item_attachments
+                # editorial info of the item is kept
+                item.setdefault(
+                    "ednote",
+                    "The story has {} attachment(s)".format(len(item_attachments)),
+                )
+            for pending_file in pending_files:
+                if pending_file["rendition"] is not None:
+                    self.store_rendition(item, pending_file)
+        return items
 
     def parse_newsenvelop(self, envelop_el):
         """
@@ -168,12 +217,12 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
         :return:
         """
         # Identification
-        self._item_seed.update(
+        self.context.item_seed.update(
             self.parse_identification(newsitem_el.find("Identification"))
         )
 
         # NewsManagement
-        self._item_seed.update(
+        self.context.item_seed.update(
             self.parse_newsmanagement(newsitem_el.find("NewsManagement"))
         )
 
@@ -185,7 +234,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
         # Genre from NewsComponent 1st level
         for element in news_component_1.findall("DescriptiveMetadata/Genre"):
             if element.get("FormalName"):
-                self._add_genre(self._item_seed, element.get("FormalName"))
+                self._add_genre(self.context.item_seed, element.get("FormalName"))
 
         # check if all roles are in `SUPPORTED_MEDIA_ASSET_TYPES`
         is_media_roles = [
@@ -201,7 +250,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
         # save media items as attachments for text items
         if not all(is_text_roles) and not all(is_media_roles):
             # parse attachment
-            self._item_seed.update(self.parse_attachments(news_component_1))
+            self.context.item_seed.update(self.parse_attachments(news_component_1))
 
         # NewsComponent 2nd level
         # NOTE: each NewsComponent of 2nd level is a separate item with unique GUID
@@ -213,7 +262,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                 guid = str(uuid4())
 
             # deepcopy to avoid having a pointer to `subject`
-            item = deepcopy({**self._item_seed, "guid": guid})
+            item = deepcopy({**self.context.item_seed, "guid": guid})
 
             try:
                 # all 2nd level NewsComponents are media items,
@@ -226,7 +275,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                     self.parse_newscomponent_text(item, news_component_2)
             except SkipItemException:
                 continue
-            self._items.append(item)
+            self.context.items.append(item)
 
     def parse_identification(self, indent_el):
         """
@@ -545,7 +594,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                 "audio" if role_name == "QUOTE" else getattr(CONTENT_TYPE, role_name)
             )
 
-        # read files and save them into the storage
+        # files are saved into the storage once the item is parsed
         for newscomponent in newscomponent_el.findall("NewsComponent"):
             component_role = self._get_role(newscomponent)
             if (
@@ -553,42 +602,12 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                 and component_role.upper()
                 in self.SUPPORTED_MEDIA_ASSET_TYPES[role_name].keys()
             ):
-                content_item = newscomponent.find("ContentItem")
-                if content_item is None:
-                    continue
-
-                filename = content_item.attrib.get("Href")
-                if filename is None:
-                    continue
-
-                format_name = ""
-                format_el = content_item.find("Format")
-                if format_el is not None:
-                    format_name = format_el.attrib.get("FormalName")
-
-                content = self._get_file(filename)
-                if not content:
-                    continue
-
-                _, content_type, metadata = process_file_from_stream(
-                    content, "application/" + format_name
-                )
-                content.seek(0)
-                media_id = app.media.put(
-                    content,
-                    filename=filename,
-                    content_type=content_type,
-                    metadata=metadata,
-                )
-
                 rendition_key = self.SUPPORTED_MEDIA_ASSET_TYPES[role_name][
                     component_role.upper()
                 ]
-                item.setdefault("renditions", {})[rendition_key] = {
-                    "media": media_id,
-                    "mimetype": content_type,
-                    "href": app.media.url_for_media(media_id, content_type),
-                }
+                pending_file = self.get_pending_file(newscomponent, rendition_key)
+                if pending_file:
+                    item.setdefault(PENDING_FILES, []).append(pending_file)
 
         # this attibutes are redundand for media item
         attrs_to_be_removed = ("date_id", "item_id", "provider_id", "public_identifier")
@@ -676,9 +695,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                     "sub_label": author_name,
                 }
                 # try to find an author in DB
-                user = get_resource_service("users").find_one(
-                    req=None, username=author_name
-                )
+                user = self.context.get_user(author_name)
                 if user:
                     author["_id"] = [
                         str(user["_id"]),
@@ -695,12 +712,9 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
 
         # Check and remove duplicates authors if any
         if item.get("authors"):
-            item["authors"] = [
-                dict(i)
-                for i, _ in itertools.groupby(
-                    sorted(item["authors"], key=lambda k: k["_id"])
-                )
-            ]
+            item["authors"] = SubjectSet(
+                item["authors"], key=lambda author: tuple(author["_id"])
+            ).sorted(key=lambda author: author["_id"])
 
         if signoff_list:
             item["sign_off"] = "/".join(signoff_list)
@@ -826,15 +840,10 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                     item.setdefault("extra", {})["city"] = element.attrib.get("Value")
 
         # remove duplicated subject
-        item["subject"] = [
-            dict(i)
-            for i, _ in itertools.groupby(
-                sorted(item["subject"], key=lambda k: k["qcode"])
-            )
-        ]
+        item["subject"] = unique_subjects(item["subject"])
 
     def parse_attachments(self, news_component_1):
-        attachments = []
+        attachment_files = []
         for news_component_2 in news_component_1.findall("NewsComponent"):
             role_name = self._get_role(news_component_2)
             if role_name and role_name.upper() not in self.SUPPORTED_TEXT_ASSET_TYPES:
@@ -845,21 +854,19 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                         and component_role.upper()
                         in self.SUPPORTED_BINARY_ASSET_SUBTYPES
                     ):
-                        attachment = self.parse_attachment(newscomponent)
-                        if attachment:
-                            attachments.append(attachment)
+                        attachment_file = self.get_pending_file(newscomponent)
+                        if attachment_file:
+                            attachment_files.append(attachment_file)
                 # remove element to avoid parsing it as news item
                 news_component_1.remove(news_component_2)
-        if attachments:
-            return {
-                "attachments": attachments,
-                "ednote": "The story has {} attachment(s)".format(len(attachments)),
-            }
-        return {}
+        if not attachment_files:
+            return {}
+        # attachments are saved into the storage once items are parsed
+        return {PENDING_FILES: attachment_files}
 
-    def parse_attachment(self, newscomponent_el):
+    def get_pending_file(self, newscomponent_el, rendition=None):
         """
-        Parse attachment component, save it to storage and return attachment id
+        Get file of media or attachment component, it's stored by `store_files`.
 
         <NewsComponent Duid="0" xml:lang="nl">
             <Role FormalName="Image"/>
@@ -875,18 +882,15 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                 </Characteristics>
             </ContentItem>
         </NewsComponent>
+
+        :param newscomponent_el: NewsComponent element of the file
+        :param rendition: rendition of media item, `None` for attachment
+        :return: dict with filename, format and rendition
         """
         content_item = newscomponent_el.find("ContentItem")
         if content_item is None:
             return
 
-        # avoid re-adding media after item is ingested
-        guid = hashlib.md5(ElementTree.tostring(content_item)).hexdigest()
-        attachment_service = get_resource_service("attachments")
-        old_attachment = attachment_service.find_one(req=None, guid=guid)
-        if old_attachment:
-            return {"attachment": old_attachment["_id"]}
-
         filename = content_item.attrib.get("Href")
         if filename is None:
             return
@@ -896,11 +900,106 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
         if format_el is not None:
             format_name = format_el.attrib.get("FormalName")
 
-        content = self._get_file(filename)
+        return {"filename": filename, "format": format_name, "rendition": rendition}
+
+    def store_rendition(self, item, pending_file):
+        """Save file of media item rendition into the storage."""
+        content = self._get_file(pending_file["filename"])
+        if not content:
+            return
+
+        with content:
+            _, content_type, metadata = process_file_from_stream(
+                content, "application/" + pending_file["format"]
+            )
+            content.seek(0)
+            media_id = app.media.put(
+                content,
+                filename=pending_file["filename"],
+                content_type=content_type,
+                metadata=metadata,
+            )
+
+        item.setdefault("renditions", {})[pending_file["rendition"]] = {
+            "media": media_id,
+            "mimetype": content_type,
+            "href": app.media.url_for_media(media_id, content_type),
+        }
+
+    def _store_attachments(self, pending_files, ingested):
+        """
+        Save attachment files into the storage.
+
+        :param pending_files: attachment files found while parsing
+        :param ingested: ids of ingested attachments keyed on checksum, updated with saved ones
+        :return: attachments keyed on filename
+        """
+        attachment_files = {}
+        try:
+            for pending_file in pending_files:
+                if pending_file["filename"] not in attachment_files:
+                    attachment_files[pending_file["filename"]] = (
+                        self.get_attachment_file(pending_file)
+                    )
+            attachment_files = {
+                filename: attachment_file
+                for filename, attachment_file in attachment_files.items()
+                if attachment_file
+            }
+            guids = {
+                attachment_file["guid"]
+                for attachment_file in attachment_files.values()
+                if attachment_file["guid"] not in ingested
+            }
+            if guids:
+                # avoid re-adding media after item is ingested
+                ingested.update(self._find_attachments(guids))
+            attachments = {}
+            for filename, attachment_file in attachment_files.items():
+                attachment = self.parse_attachment(attachment_file, ingested)
+                if attachment:
+                    attachments[filename] = attachment
+            return attachments
+        finally:
+            for attachment_file in attachment_files.values():
+                if attachment_file:
+                    attachment_file["content"].close()
+
+    def get_attachment_file(self, pending_file):
+        """
+        Open attachment file and compute checksum of its content.
+
+        :param pending_file: file returned by `get_pending_file`
+        :return: dict with filename, format, open file as content and its checksum as guid
+        """
+        content = self._get_file(pending_file["filename"])
         if not content:
             return
+        return {
+            "filename": pending_file["filename"],
+            "format": pending_file["format"],
+            "content": content,
+            "guid": get_checksum(content),
+        }
+
+    def parse_attachment(self, attachment_file, ingested):
+        """
+        Save attachment file to storage and return attachment id
+
+        File is not uploaded if the same content was ingested before.
+
+        :param attachment_file: attachment file returned by `get_attachment_file`
+        :param ingested: ids of ingested attachments keyed on checksum,
+            updated with the saved attachment
+        """
+        guid = attachment_file["guid"]
+        if guid in ingested:
+            return {"attachment": ingested[guid]}
+
+        filename = attachment_file["filename"]
+        content = attachment_file["content"]
         _, content_type, metadata = process_file_from_stream(
-            content, "application/" + format_name
+            content, "application/" + attachment_file["format"]
         )
         content.seek(0)
         media_id = app.media.put(
@@ -911,7 +1010,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
             resource="attachments",
         )
         try:
-            ids = attachment_service.post(
+            ids = get_resource_service("attachments").post(
                 [
                     {
                         "media": media_id,
@@ -922,10 +1021,17 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
                     }
                 ]
             )
-            return {"attachment": next(iter(ids), None)}
+            ingested[guid] = next(iter(ids), None)
+            return {"attachment": ingested[guid]}
         except Exception as ex:
             app.media.delete(media_id)
 
+    def _find_attachments(self, guids):
+        attachments = get_resource_service("attachments").find(
+            {"guid": {"$in": list(set(guids))}}
+        )
+        return {attachment["guid"]: attachment["_id"] for attachment in attachments}
+
     def parse_sources(self, item, admin_el):
         names = []
         source = admin_el.find("Source/Party")
@@ -933,7 +1039,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
             names.extend(source.get("FormalName").split("/"))
         if not names:
             names.append("BELGA")
-        sources = get_resource_service("vocabularies").get_items("sources")
+        sources = self.context.get_cv_items("sources")
         for source in sources:
             if source["name"] in names:
                 item.setdefault("subject", []).append(source)
@@ -944,18 +1050,22 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
             return role.attrib.get("FormalName")
 
     def _get_file(self, filename):
-        config = self._provider.get("config", {})
+        config = self.context.provider.get("config", {})
         path = config.get("path", "")
         file_dir = os.path.join(path, "attachments")
         file_path = os.path.join(file_dir, filename)
         try:
-            if self._provider.get("feeding_service") == "ftp":
+            if self.context.provider.get("feeding_service") in FTP_FEEDING_SERVICES:
                 file_path = self._download_file(filename, file_path, config)
-            with open(file_path, "rb") as f:
-                content = f.read()
+            content = open(file_path, "rb")
+            try:
                 if self.MOVE_FILE:
+                    # opened file can still be read after it's moved
                     self._move_file(file_dir, filename, config)
-                return BytesIO(content)
+            except Exception:
+                content.close()
+                raise
+            return content
         except (FileNotFoundError, error_perm) as e:
             logger.warning("File %s not found", file_path)
         except Exception as e:
@@ -968,7 +1078,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
             return tmp_dir
 
     def _move_file(self, file_dir, filename, config):
-        if self._provider.get("feeding_service") == "ftp":
+        if self.context.provider.get("feeding_service") in FTP_FEEDING_SERVICES:
             with ftp_connect(config) as ftp:
                 if config.get("move", False):
                     ftp_service = FTPFeedingService()
@@ -984,7 +1094,7 @@ class BelgaNewsMLOneFeedParser(BaseBelgaNewsMLOneFeedParser):
             file_service = FileFeedingService()
             # move processed attachments to the same folder with XML
             file_dir = os.path.dirname(file_dir)
-            file_service.move_file(file_dir, "attachments/" + filename, self._provider)
+            file_service.move_file(file_dir, "attachments/" + filename, self.context.provider)
 
 
 register_feed_parser(BelgaNewsMLOneFeedParser.NAME, BelgaNewsMLOneFeedParser())
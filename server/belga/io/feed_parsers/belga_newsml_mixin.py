@@ -8,21 +8,82 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
-from superdesk import get_resource_service
+import threading
 
+from flask import g
 
-class BelgaNewsMLMixin:
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self._countries = []
+from .context import find_vocabulary, get_vocabulary_items
 
-    def _get_country(self, country_code):
-        if not self._countries:
-            self._countries = (
-                get_resource_service("vocabularies")
-                .find_one(req=None, _id="country")
-                .get("items", [])
+# compiled vocabulary indexes shared by all parsers, one per vocabulary `_id`
+_vocabulary_indexes = {}
+_vocabulary_indexes_lock = threading.Lock()
+
+
+class VocabularyIndex:
+    """Lookup tables of a single vocabulary revision.
+
+    Keeps position of the first item for every qcode, name and translated name,
+    so keyword mapping doesn't need to scan vocabulary items.
+    """
+
+    def __init__(self, vocabulary):
+        self.etag = vocabulary.get("_etag")
+        self.items = vocabulary.get("items", [])
+        self.by_qcode = {}
+        self.by_name = {}
+        self.by_translation = {}
+        for position, item in enumerate(self.items):
+            self.by_qcode.setdefault(item.get("qcode"), position)
+            self.by_name.setdefault(item.get("name"), position)
+            for name in item.get("translations", {}).get("name", {}).values():
+                self.by_translation.setdefault(name, position)
+
+    def find(self, key, translation_key):
+        """Return first item matching `key` by qcode or name or `translation_key` by translated name."""
+        positions = [
+            position
+            for position in (
+                self.by_qcode.get(key),
+                self.by_translation.get(translation_key),
+                self.by_name.get(key),
             )
+            if position is not None
+        ]
+        if positions:
+            return self.items[min(positions)]
+
+
+def get_vocabulary_index(_id):
+    """Get compiled index of vocabulary `_id`.
+
+    Vocabulary is fetched once per app/request context, index is rebuilt only
+    when vocabulary `_etag` changes.
+    """
+    indexes = g.setdefault("belga_vocabulary_indexes", {})
+    if _id not in indexes:
+        vocabulary = find_vocabulary(_id)
+        indexes[_id] = (
+            _compile_vocabulary_index(_id, vocabulary) if vocabulary else None
+        )
+    return indexes[_id]
+
+
+def _compile_vocabulary_index(_id, vocabulary):
+    etag = vocabulary.get("_etag")
+    with _vocabulary_indexes_lock:
+        index = _vocabulary_indexes.get(_id)
+        if index is None or etag is None or index.etag != etag:
+            index = VocabularyIndex(vocabulary)
+            # vocabulary without etag can't be validated later
+            if etag is not None:
+                _vocabulary_indexes[_id] = index
+    return index
+
+
+class BelgaNewsMLMixin:
+    def _get_country(self, country_code):
+        index = get_vocabulary_index("country")
+        countries = index.items if index is not None else []
 
         return [
             {
@@ -31,7 +92,7 @@ class BelgaNewsMLMixin:
                 "translations": c["translations"],
                 "scheme": "country",
             }
-            for c in self._countries
+            for c in countries
             if c.get("qcode") == "country_" + country_code.lower()
             and c.get("is_active")
         ]
@@ -40,9 +101,7 @@ class BelgaNewsMLMixin:
         if not country_code:
             return []
 
-        countries = get_resource_service("vocabularies").get_items(
-            _id="countries", qcode=country_code.lower()
-        )
+        countries = get_vocabulary_items("countries", qcode=country_code.lower())
 
         return countries
 
@@ -63,24 +122,17 @@ class BelgaNewsMLMixin:
         return [{"name": data, "qcode": data, "scheme": "original-metadata"}]
 
     def _get_mapped_keywords(self, _key, _translation_key, _id_name):
-        _all_keywords = get_resource_service("vocabularies").find_one(
-            req=None, _id=_id_name
-        )
-        if not _all_keywords:
+        index = get_vocabulary_index(_id_name)
+        if index is None:
             return
-        for _keyword in _all_keywords.get("items", []):
-            if (
-                _keyword["qcode"] == _key
-                or _translation_key
-                in _keyword.get("translations", {}).get("name", {}).values()
-                or _keyword["name"] == _key
-            ):
-                return [
-                    {
-                        "name": _keyword["name"],
-                        "qcode": _keyword["qcode"],
-                        "translations": _keyword["translations"],
-                        "scheme": _id_name,
-                    }
-                ]
-        return []
+        _keyword = index.find(_key, _translation_key)
+        if _keyword is None:
+            return []
+        return [
+            {
+                "name": _keyword["name"],
+                "qcode": _keyword["qcode"],
+                "translations": _keyword["translations"],
+                "scheme": _id_name,
+            }
+        ]
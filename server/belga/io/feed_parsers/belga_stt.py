@@ -21,10 +21,6 @@ class BelgaSTTFeedParser(STTNewsMLFeedParser):
     NAME = "belga_stt_newsml"
     label = "Belga STT News ML"
 
-    def __init__(self):
-        super().__init__()
-        self._provider = None
-
     def can_parse(self, xml):
         return xml.tag.endswith("newsItem")
 
@@ -40,12 +40,12 @@ class BelgaTipNewsMLOneFeedParser(BelgaNewsMLOneFeedParser):
         :return:
         """
         # Identification
-        self._item_seed.update(
+        self.context.item_seed.update(
             self.parse_identification(newsitem_el.find("Identification"))
         )
 
         # NewsManagement
-        self._item_seed.update(
+        self.context.item_seed.update(
             self.parse_newsmanagement(newsitem_el.find("NewsManagement"))
         )
 
@@ -55,14 +55,14 @@ class BelgaTipNewsMLOneFeedParser(BelgaNewsMLOneFeedParser):
             # Genre from NewsComponent 1st level
             for element in news_component_1.findall("DescriptiveMetadata/Genre"):
                 if element.get("FormalName"):
-                    self._add_genre(self._item_seed, element.get("FormalName"))
+                    self._add_genre(self.context.item_seed, element.get("FormalName"))
 
             # NewsComponent 2nd level
             # NOTE: each NewsComponent of 2nd level is a separate item with unique GUID
             for news_component_2 in news_component_1.findall("NewsComponent"):
                 # create an item
                 salt = hashlib.md5(ElementTree.tostring(news_component_2)).hexdigest()
-                item = {**self._item_seed, "guid": salt}
+                item = {**self.context.item_seed, "guid": salt}
 
                 # NewsComponent
                 try:
@@ -73,7 +73,7 @@ class BelgaTipNewsMLOneFeedParser(BelgaNewsMLOneFeedParser):
                 # type
                 self.populate_fields(item)
 
-                self._items.append(item)
+                self.context.items.append(item)
 
     def parse_newscomponent(self, item, newscomponent_el):
         """
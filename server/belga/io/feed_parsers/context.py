@@ -0,0 +1,226 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from copy import deepcopy
+
+from superdesk import get_resource_service
+
+# context of the file which is being parsed, separate for every thread
+_current_context = ContextVar("belga_parse_context", default=None)
+# files of parsed items are stored by the caller of parser, see `defer_storage`
+_storage_deferred = ContextVar("belga_parse_storage_deferred", default=False)
+# db data fetched by the caller of parser, see `use_prefetched`
+_prefetched = ContextVar("belga_parse_prefetched", default=None)
+
+
+@contextmanager
+def defer_storage():
+    """
+    Keep files of items parsed inside of the `with` block out of the storage.
+
+    Parsers supporting it leave files in items and the caller stores them
+    later, parse workers use it so media and attachments are stored by ingest process.
+    """
+    token = _storage_deferred.set(True)
+    try:
+        yield
+    finally:
+        _storage_deferred.reset(token)
+
+
+class PrefetchedData:
+    """
+    Vocabularies and users fetched from db at once.
+
+    Parse workers get it from the ingest process, so they don't query db
+    for every parsed file, see `use_prefetched`.
+
+    :param vocabularies: vocabularies
+    :param users: users
+    """
+
+    #: user fields used by parsers
+    USER_FIELDS = ("_id", "username", "display_name", "sign_off")
+
+    def __init__(self, vocabularies=(), users=()):
+        self.vocabularies = {
+            vocabulary["_id"]: vocabulary for vocabulary in vocabularies
+        }
+        self.users = {}
+        for user in users:
+            self.users.setdefault(
+                user.get("username"),
+                {key: user[key] for key in self.USER_FIELDS if key in user},
+            )
+
+    @classmethod
+    def fetch(cls):
+        return cls(
+            get_resource_service("vocabularies").find({}),
+            get_resource_service("users").find({}),
+        )
+
+    def get_vocabulary_items(self, _id, qcode=None):
+        """Same items as `VocabulariesService.get_items` returns."""
+        vocabulary = self.vocabularies.get(_id) or {}
+        items = vocabulary.get("items") or []
+        if qcode is not None:
+            # only first item with qcode is projected by db
+            items = [item for item in items if item.get("qcode") == qcode][:1]
+        active_items = []
+        for item in items:
+            if item.get("is_active", True):
+                item = dict(item, scheme=_id)
+                item.pop("is_active", None)
+                active_items.append(item)
+        return active_items
+
+
+@contextmanager
+def use_prefetched(prefetched):
+    """Use `prefetched` data instead of db queries for files parsed inside of the `with` block."""
+    token = _prefetched.set(prefetched)
+    try:
+        yield prefetched
+    finally:
+        _prefetched.reset(token)
+
+
+def find_vocabulary(_id):
+    """Get vocabulary `_id` from prefetched data or db."""
+    prefetched = _prefetched.get()
+    if prefetched is not None:
+        return prefetched.vocabularies.get(_id)
+    return get_resource_service("vocabularies").find_one(req=None, _id=_id)
+
+
+def get_vocabulary_items(_id, qcode=None):
+    """Get active items of vocabulary `_id` from prefetched data or db."""
+    prefetched = _prefetched.get()
+    if prefetched is not None:
+        return prefetched.get_vocabulary_items(_id, qcode=qcode)
+    return list(get_resource_service("vocabularies").get_items(_id, qcode=qcode))
+
+
+def find_user(username):
+    """Get user by `username` from prefetched data or db."""
+    prefetched = _prefetched.get()
+    if prefetched is not None:
+        return prefetched.users.get(username)
+    return get_resource_service("users").find_one(req=None, username=username)
+
+
+class ParseContext:
+    """
+    State of a single parsed file.
+
+    Parsers are registered as singletons, so everything related to the parsed file
+    lives here instead of parser attributes.
+    Vocabularies, vocabulary items and users are fetched from db once per context,
+    unless they are prefetched (see `use_prefetched`), and qcode maps are built
+    once per vocabulary.
+
+    :param root: parsed xml tree or path of the parsed file
+    :param provider: ingest provider
+    """
+
+    def __init__(self, root=None, provider=None):
+        self.root = root
+        self.provider = provider
+        #: files of parsed items are stored later, see `defer_storage`
+        self.storage_deferred = _storage_deferred.get()
+        self._cvs = {}
+        self._cv_items = {}
+        self._subject_maps = {}
+        self._users = {}
+
+    def get_cv(self, _id):
+        if _id not in self._cvs:
+            self._cvs[_id] = find_vocabulary(_id)
+        return self._cvs[_id]
+
+    def get_cv_items(self, _id, qcode=None):
+        """
+        Cached `VocabulariesService.get_items`.
+        Items are copied, so they can be modified by the caller.
+        """
+        key = (_id, qcode)
+        if key not in self._cv_items:
+            self._cv_items[key] = get_vocabulary_items(_id, qcode=qcode)
+        return deepcopy(self._cv_items[key])
+
+    def get_subject_map(self, _id):
+        """Map qcode to the first active item of vocabulary `_id`."""
+        if _id not in self._subject_maps:
+            cv = self.get_cv(_id) or {}
+            subject_map = {}
+            for item in cv.get("items", []):
+                if item.get("is_active"):
+                    subject_map.setdefault(item.get("qcode"), item)
+            self._subject_maps[_id] = subject_map
+        return self._subject_maps[_id]
+
+    def get_user(self, username):
+        if username not in self._users:
+            self._users[username] = find_user(username)
+        return self._users[username]
+
+
+class ParseContextMixin:
+    """
+    Per parse state for registered parsers.
+
+    `parse` runs inside `parse_context` and other methods use `context`,
+    so one parser instance can parse several files at once from threads.
+    """
+
+    #: class of context created by `parse_context`
+    context_class = ParseContext
+
+    @property
+    def context(self):
+        """Context of the file which is being parsed in current thread."""
+        return _current_context.get()
+
+    @property
+    def root(self):
+        context = self.context
+        return context.root if context is not None else None
+
+    @root.setter
+    def root(self, root):
+        # superdesk parsers set `root` in `__init__` and `parse`,
+        # it's kept in context of current parse and ignored outside of it
+        context = self.context
+        if context is not None:
+            context.root = root
+
+    @contextmanager
+    def parse_context(self, *args, **kwargs):
+        """Create new context, it's available via `context` inside of the `with` block."""
+        context = self.context_class(*args, **kwargs)
+        with self.activate_context(context):
+            yield context
+
+    @contextmanager
+    def activate_context(self, context):
+        """
+        Make existing `context` available via `context` inside of the `with` block.
+
+        Generators must activate their context only between yields,
+        otherwise it would leak to the consumer.
+        """
+        token = _current_context.set(context)
+        try:
+            yield context
+        finally:
+            _current_context.reset(token)
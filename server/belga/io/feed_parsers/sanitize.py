@@ -0,0 +1,57 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Removal of characters which are not allowed in XML from parsed items.
+
+Wire files contain transmission control characters (SOH, STX, ETX, EOT, ...)
+which would make NewsML output of the items invalid, so they are replaced
+by spaces using translation tables built once on import.
+"""
+
+#: control characters not allowed in XML 1.0, tab and line feeds are kept
+INVALID_XML_CHARS = "".join(
+    chr(code) for code in range(0x20) if chr(code) not in "\t\n\r"
+)
+
+_INVALID_XML_TABLE = str.maketrans(INVALID_XML_CHARS, " " * len(INVALID_XML_CHARS))
+
+# plain text converted to html must also escape markup characters
+_TEXT_TO_HTML_TABLE = {
+    **_INVALID_XML_TABLE,
+    **str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;"}),
+}
+
+
+def sanitize_text(text):
+    """Replace characters not allowed in XML by spaces."""
+    return text.translate(_INVALID_XML_TABLE)
+
+
+def text_to_html(text):
+    """Escape plain `text` to be used in html and replace characters not allowed in XML."""
+    return text.translate(_TEXT_TO_HTML_TABLE)
+
+
+def sanitize_item(item):
+    """
+    Replace characters not allowed in XML in all text fields of `item`.
+
+    Text fields of `extra` are fixed as well.
+
+    :param item: parsed item, updated in place
+    :return: the same item
+    """
+    for fields in (item, item.get("extra")):
+        if not isinstance(fields, dict):
+            continue
+        for key, value in fields.items():
+            if isinstance(value, str):
+                fields[key] = value.translate(_INVALID_XML_TABLE)
+    return item
@@ -0,0 +1,80 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Format detection of text wire files shared by parsers.
+
+Feeding services call `can_parse` of parsers on every file, so the beginning
+of the file is read once and reused by all parsers and by `parse` until
+the file is modified.
+"""
+
+import io
+import os
+
+from ...cache import TTLCache
+
+#: bytes read from the beginning of a file to detect its format
+HEAD_SIZE = 4096
+
+# beginning of recently sniffed files and formats detected by parsers,
+# keyed on file path, modification time and size
+_heads_cache = TTLCache(maxsize=256)
+_formats_cache = TTLCache(maxsize=1024)
+_missing = object()
+
+
+def _file_key(file_path):
+    stat = os.stat(file_path)
+    return file_path, stat.st_mtime_ns, stat.st_size
+
+
+def _read_head(key):
+    head = _heads_cache.get(key)
+    if head is None:
+        with open(key[0], "rb") as f:
+            head = f.read(HEAD_SIZE)
+        _heads_cache.set(key, head)
+    return head
+
+
+def sniff(file_path, name, detect):
+    """
+    Detect format of the file by its first line.
+
+    :param file_path: path of the file
+    :param name: name of the detection, parser NAME usually
+    :param detect: function taking first line of the file (at most `HEAD_SIZE` bytes)
+        and returning detected format
+    :return: format returned by `detect`, cached until the file is modified
+    """
+    file_key = _file_key(file_path)
+    key = (name,) + file_key
+    # detected format is kept locally, entry might be evicted by other threads
+    result = _formats_cache.get(key, _missing)
+    if result is _missing:
+        first_line = io.BytesIO(_read_head(file_key)).readline()
+        result = detect(first_line)
+        _formats_cache.set(key, result)
+    return result
+
+
+def read_lines(file_path):
+    """
+    Read lines of the file, same as iterating over the file opened in binary mode.
+
+    Files smaller than `HEAD_SIZE` are not read again after sniffing.
+    """
+    file_key = _file_key(file_path)
+    if file_key[2] <= HEAD_SIZE:
+        content = _read_head(file_key)
+    else:
+        with open(file_path, "rb") as f:
+            content = f.read()
+    return io.BytesIO(content).readlines()
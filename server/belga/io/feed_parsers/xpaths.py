@@ -0,0 +1,34 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+from functools import lru_cache
+
+from superdesk.etree import etree
+
+
+def compile_xpath(path, namespaces=None):
+    """
+    Get compiled `etree.XPath` of `path`.
+
+    Expressions are compiled once and shared by all parsers, so they can be
+    created at module level or even inside of item loops.
+    Use relative paths (``.//``) to search only inside of the element
+    the expression is called with.
+
+    :param str path: XPath expression
+    :param dict namespaces: prefix to namespace map
+    :rtype: etree.XPath
+    """
+    return _compile_xpath(path, tuple(sorted((namespaces or {}).items())))
+
+
+@lru_cache(maxsize=None)
+def _compile_xpath(path, namespaces):
+    return etree.XPath(path, namespaces=dict(namespaces))
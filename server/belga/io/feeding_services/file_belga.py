@@ -0,0 +1,283 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import os
+import logging
+import multiprocessing
+import pickle
+
+from collections import deque
+from uuid import uuid4
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app as app
+from superdesk.errors import ParserError, SuperdeskIngestError
+from superdesk.etree import etree
+from superdesk.io.feed_parsers import XMLFeedParser
+from superdesk.io.feeding_services import FileFeedingService
+from superdesk.io.registry import (
+    registered_feed_parsers,
+    register_feeding_service,
+    register_feeding_service_parser,
+)
+from superdesk.notification import push_notification
+from superdesk.utils import get_sorted_files, FileSortAttributes
+
+from belga.io.feed_parsers.context import (
+    PrefetchedData,
+    defer_storage,
+    use_prefetched,
+)
+
+logger = logging.getLogger(__name__)
+
+# app used by parse workers, inherited from the ingest process
+_worker_app = None
+# db data prefetched for the batch which is being parsed, see `_get_prefetched`
+_worker_prefetched = (None, None)
+
+# pool of parse workers of the ingest process, forked on first use
+_executor = None
+_executor_key = None
+
+
+def parse_file(parser, file_path, provider):
+    """
+    Parse a single file the same way as `FileFeedingService` does.
+
+    :param parser: registered feed parser
+    :param file_path: path of the file
+    :param provider: ingest provider
+    :return: list of parsed items
+    """
+    if hasattr(parser, "iterparse"):
+        # NewsML 1.2 is parsed item by item, whole tree of the file is never built
+        if not parser.can_parse(_get_root_element(file_path)):
+            raise SuperdeskIngestError.parserNotFoundError(provider=provider)
+        return list(parser.iterparse(file_path, provider))
+    if isinstance(parser, XMLFeedParser):
+        with open(file_path, "rb") as f:
+            article = etree.parse(f).getroot()
+    else:
+        article = file_path
+    if not parser.can_parse(article):
+        raise SuperdeskIngestError.parserNotFoundError(provider=provider)
+    items = parser.parse(article, provider)
+    return items if isinstance(items, list) else [items]
+
+
+def _get_root_element(file_path):
+    """Get root element of the xml file, only its tag and attributes are complete."""
+    with open(file_path, "rb") as f:
+        for _, element in etree.iterparse(f, events=("start",)):
+            return element
+    return None
+
+
+def parse_files(parser, file_paths, provider, workers=None):
+    """
+    Parse files using a pool of `workers` processes.
+
+    Generates ``(items, error)`` for every file in the order of `file_paths`.
+    At most two files per worker are parsed ahead of the consumer,
+    so a big backlog of files is not kept in memory.
+
+    Workers don't write anything, parsers which support deferred storage
+    (see `defer_storage`) leave files of items to `store_files` of the parser,
+    which is called by the ingest process once the file is parsed.
+    Vocabularies and users are fetched once per call by the ingest process
+    and passed to workers, so they don't query db for every file.
+
+    :param parser: registered feed parser
+    :param file_paths: paths of files
+    :param provider: ingest provider
+    :param workers: number of processes, ``BELGA_PARSE_WORKERS`` config by default
+    """
+    if workers is None:
+        workers = app.config.get("BELGA_PARSE_WORKERS", 1)
+    file_paths = list(file_paths)
+    if workers < 2 or len(file_paths) < 2:
+        for file_path in file_paths:
+            try:
+                yield parse_file(parser, file_path, provider), None
+            except Exception as ex:
+                yield None, ex
+        return
+
+    executor = get_executor(workers)
+    # pickled once, workers unpickle it once per call
+    prefetched = (uuid4().hex, pickle.dumps(PrefetchedData.fetch()))
+    pending = deque()
+    # attachments stored or found for previous files
+    ingested = {}
+    try:
+        for file_path in file_paths:
+            pending.append(
+                executor.submit(
+                    _parse_in_worker, parser.NAME, file_path, provider, prefetched
+                )
+            )
+            if len(pending) >= workers * 2:
+                yield _store_files(
+                    parser, pending.popleft().result(), provider, ingested
+                )
+        while pending:
+            yield _store_files(parser, pending.popleft().result(), provider, ingested)
+    except BrokenProcessPool:
+        # a worker died, pool is forked again for next files
+        shutdown_executor()
+        raise
+    finally:
+        # pool is shared by updates, only files of this one are cancelled
+        for future in pending:
+            future.cancel()
+
+
+def _store_files(parser, result, provider, ingested):
+    """Store files of items parsed by a worker."""
+    items, error = result
+    if error is None and hasattr(parser, "store_files"):
+        try:
+            items = parser.store_files(items, provider, ingested)
+        except Exception as ex:
+            return None, ex
+    return items, error
+
+
+def get_executor(workers):
+    """
+    Get pool of parse workers of the ingest process.
+
+    The pool is forked once and reused by updates of all providers,
+    it's forked again only when number of workers changes or in a forked process.
+    Workers share registered parsers and app with the ingest process.
+
+    :param workers: number of processes
+    """
+    global _executor, _executor_key
+    key = (os.getpid(), workers)
+    if _executor is not None and _executor_key != key:
+        shutdown_executor()
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(app._get_current_object(),),
+        )
+        _executor_key = key
+    return _executor
+
+
+def shutdown_executor():
+    """Stop parse workers, they are forked again on next use."""
+    global _executor, _executor_key
+    executor, key = _executor, _executor_key
+    _executor = _executor_key = None
+    # pool inherited by a forked process belongs to its parent
+    if executor is not None and key[0] == os.getpid():
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _init_worker(flask_app):
+    global _worker_app
+    _worker_app = flask_app
+
+
+def _get_prefetched(prefetched):
+    global _worker_prefetched
+    key, data = prefetched
+    if _worker_prefetched[0] != key:
+        _worker_prefetched = (key, pickle.loads(data))
+    return _worker_prefetched[1]
+
+
+def _parse_in_worker(parser_name, file_path, provider, prefetched):
+    parser = registered_feed_parsers[parser_name]
+    with _worker_app.app_context(), defer_storage(), use_prefetched(
+        _get_prefetched(prefetched)
+    ):
+        try:
+            return parse_file(parser, file_path, provider), None
+        except Exception as ex:
+            logger.exception("Parsing of %s failed", file_path)
+            # superdesk errors can't be unpickled in the ingest process
+            return None, Exception("{}: {}".format(type(ex).__name__, ex))
+
+
+class FileBelgaFeedingService(FileFeedingService):
+    """
+    Feeding Service which parses files of a folder in parallel.
+
+    Files are parsed by ``BELGA_PARSE_WORKERS`` processes and items are ingested
+    in the order of files, same as by `FileFeedingService`.
+    Worker processes are forked on first update and kept for the lifetime
+    of the ingest process, see `get_executor`.
+    """
+
+    NAME = "file-belga"
+
+    label = "File feed (parallel parsing)"
+
+    def _update(self, provider, update):
+        self.provider = provider
+        self.path = provider.get("config", {}).get("path", None)
+
+        if not self.path:
+            logger.warning(
+                "File Feeding Service {} is configured without path. Please check the configuration".format(
+                    provider["name"]
+                )
+            )
+            return []
+
+        files = []
+        for filename in get_sorted_files(self.path, sort_by=FileSortAttributes.created):
+            file_path = os.path.join(self.path, filename)
+            if not os.path.isfile(file_path):
+                continue
+            last_updated = self.get_last_updated(file_path)
+            if not self.is_latest_content(last_updated, provider.get("last_updated")):
+                self.move_file(self.path, filename, provider=provider, success=False)
+            elif self.is_empty(file_path):
+                logger.info("Ignoring empty file {}".format(filename))
+            else:
+                files.append((filename, last_updated))
+
+        parser = self.get_feed_parser(provider)
+        results = parse_files(
+            parser,
+            [os.path.join(self.path, filename) for filename, _ in files],
+            provider,
+        )
+        for (filename, last_updated), (items, error) in zip(files, results):
+            try:
+                if error is not None:
+                    raise error
+                self.after_extracting(items, provider)
+                failed = yield items
+                self.move_file(
+                    self.path, filename, provider=provider, success=not failed
+                )
+            except Exception as ex:
+                if self.is_old_content(last_updated):
+                    self.move_file(
+                        self.path, filename, provider=provider, success=False
+                    )
+                raise ParserError.parseFileError(
+                    "{}-{}".format(provider["name"], self.NAME), filename, ex, provider
+                )
+
+        push_notification("ingest:update")
+
+
+register_feeding_service(FileBelgaFeedingService)
+register_feeding_service_parser(FileBelgaFeedingService.NAME, None)
@@ -0,0 +1,219 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2020 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import os
+import ftplib
+import logging
+import tempfile
+from datetime import datetime
+
+from flask import current_app as app
+from superdesk.errors import IngestFtpError
+from superdesk.ftp import ftp_connect
+from superdesk.io.feeding_services.ftp import EmptyFile, FTPFeedingService
+from superdesk.io.registry import (
+    register_feeding_service,
+    register_feeding_service_parser,
+)
+from superdesk.utc import utc
+
+from .file_belga import parse_files
+
+logger = logging.getLogger(__name__)
+
+
+class FTPBelgaFeedingService(FTPFeedingService):
+    """
+    FTP Feeding Service which parses downloaded files in parallel.
+
+    Files of an update are downloaded first and then parsed by ``BELGA_PARSE_WORKERS``
+    processes, see `parse_files`. Items are ingested in the order of files
+    and files are moved on the server same as by `FTPFeedingService`.
+    """
+
+    NAME = "ftp-belga"
+
+    label = "FTP feed (parallel parsing)"
+
+    def _get_files_to_process(self, files, last_processed_file_modify, allowed_ext):
+        """Filter sorted ``(filename, modify)`` pairs same as `FTPFeedingService`."""
+        limit = app.config.get("FTP_INGEST_FILES_LIST_LIMIT", 100)
+        files_to_process = []
+        for filename, modify in files:
+            # filter by extension
+            if not self._is_allowed(filename, allowed_ext):
+                logger.info(
+                    "ignoring file {filename} because of file extension".format(
+                        filename=filename
+                    )
+                )
+                continue
+
+            # filter by modify datetime
+            file_modify = (
+                modify
+                if isinstance(modify, datetime)
+                else datetime.strptime(modify, self.DATE_FORMAT).replace(tzinfo=utc)
+            )
+            if last_processed_file_modify:
+                # ignore limit and add files for processing
+                if last_processed_file_modify == file_modify:
+                    files_to_process.append((filename, file_modify))
+                elif last_processed_file_modify < file_modify:
+                    # even if we have reached a limit, we must add at least one file to increment
+                    # a `last_processed_file_modify` in provider
+                    files_to_process.append((filename, file_modify))
+                    # limit amount of files to process per ingest update
+                    if len(files_to_process) >= limit:
+                        break
+            else:
+                # limit amount of files to process per ingest update
+                if len(files_to_process) >= limit:
+                    break
+                # add files for processing
+                files_to_process.append((filename, file_modify))
+        return files_to_process
+
+    def _retrieve(self, ftp, config, filename):
+        """Download `filename` into local path of provider, return path of the file."""
+        if "dest_path" not in config:
+            config["dest_path"] = tempfile.mkdtemp(prefix="superdesk_ingest_")
+        local_file_path = os.path.join(config["dest_path"], filename)
+
+        with open(local_file_path, "wb") as f:
+            try:
+                ftp.retrbinary("RETR %s" % filename, f.write)
+            except ftplib.all_errors:
+                os.remove(local_file_path)
+                raise Exception(
+                    "Exception retrieving file from FTP server ({filename})".format(
+                        filename=filename
+                    )
+                )
+
+        if self._is_empty(local_file_path):
+            logger.info("ignoring empty file {filename}".format(filename=filename))
+            raise EmptyFile(local_file_path)
+
+        return local_file_path
+
+    def _update(self, provider, update):
+        config = provider.get("config", {})
+        do_move = config.get("move", False)
+        last_processed_file_modify = provider.get("private", {}).get(
+            "last_processed_file_modify"
+        )
+        registered_parser = self.get_feed_parser(provider)
+        allowed_ext = getattr(
+            registered_parser, "ALLOWED_EXT", self.ALLOWED_EXT_DEFAULT
+        )
+
+        try:
+            with ftp_connect(config) as ftp:
+                ftp.encoding = "UTF-8"
+                files = self._sort_files(self._list_files(ftp, provider))
+
+                if do_move:
+                    move_path, move_path_error = self._create_move_folders(config, ftp)
+
+                files_to_process = self._get_files_to_process(
+                    files, last_processed_file_modify, allowed_ext
+                )
+
+                # whole batch is downloaded, so it can be parsed in parallel
+                self._timer.start("retrieve")
+                downloaded = []
+                for filename, file_modify in files_to_process:
+                    try:
+                        downloaded.append(
+                            (
+                                filename,
+                                file_modify,
+                                self._retrieve(ftp, config, filename),
+                            )
+                        )
+                    except EmptyFile:
+                        continue
+                    except Exception as e:
+                        logger.error(
+                            "Error while retrieving {filename}: {msg}".format(
+                                filename=filename, msg=e
+                            )
+                        )
+                        if do_move:
+                            self._move(
+                                ftp,
+                                filename,
+                                os.path.join(move_path_error, filename),
+                                file_modify,
+                                failed=True,
+                            )
+                self._log_msg(
+                    "Downloaded {} files. Exec time: {:.4f} secs.".format(
+                        len(downloaded), self._timer.stop("retrieve")
+                    )
+                )
+
+                self._timer.start("start_processing")
+                results = parse_files(
+                    registered_parser,
+                    [local_file_path for _, _, local_file_path in downloaded],
+                    provider,
+                )
+                for (filename, file_modify, _), (items, error) in zip(
+                    downloaded, results
+                ):
+                    update["private"] = {"last_processed_file_modify": file_modify}
+                    try:
+                        if error is not None:
+                            raise error
+                        failed = yield items
+
+                        if do_move:
+                            move_dest_file_path = os.path.join(
+                                move_path if not failed else move_path_error, filename
+                            )
+                            self._move(
+                                ftp, filename, move_dest_file_path, file_modify, failed
+                            )
+                    except Exception as e:
+                        logger.error(
+                            "Error while parsing {filename}: {msg}".format(
+                                filename=filename, msg=e
+                            )
+                        )
+                        if do_move:
+                            self._move(
+                                ftp,
+                                filename,
+                                os.path.join(move_path_error, filename),
+                                file_modify,
+                                failed=True,
+                            )
+
+                if files_to_process:
+                    # empty files and failed downloads are skipped by next update too
+                    update["private"] = {
+                        "last_processed_file_modify": files_to_process[-1][1]
+                    }
+                self._log_msg(
+                    "Processing finished. Exec time: {:.4f} secs.".format(
+                        self._timer.stop("start_processing")
+                    )
+                )
+
+        except IngestFtpError:
+            raise
+        except Exception as ex:
+            raise IngestFtpError.ftpError(ex, provider)
+
+
+register_feeding_service(FTPBelgaFeedingService)
+register_feeding_service_parser(FTPBelgaFeedingService.NAME, None)
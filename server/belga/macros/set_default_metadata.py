@@ -10,6 +10,7 @@
 import logging
 from superdesk import get_resource_service
 from apps.archive.common import CONTENT_STATE
+from belga.subjects import SubjectSet
 
 
 logger = logging.getLogger(__name__)
@@ -78,29 +79,20 @@ def set_default_metadata(item, **kwargs):
         item["keywords"] = data.get("keywords", [])
 
     # subject contains remaining metadata to copy
-    subject = item.setdefault("subject", [])
+    subject = SubjectSet(item.get("subject") or [])
 
     # we first remove conflicting metadata, if any
-    to_delete = []
-    for s in subject:
-        if s.get("scheme") in SUBJECT_SCHEMES:
-            to_delete.append(s)
-    for s in to_delete:
-        subject.remove(s)
+    subject.discard_schemes(*SUBJECT_SCHEMES)
 
     # and now we add the new one
-    subject.extend(
+    subject.update(
         [i for i in data.get("subject", []) if i.get("scheme") in SUBJECT_SCHEMES]
     )
 
     # SDBELGA-715
-    brief_already_exists = any(
-        subject
-        for subject in subject
-        if subject["qcode"] == "BRIEF" and subject["scheme"] == "belga-keywords"
-    )
-    if not brief_already_exists and item.get("state") == CONTENT_STATE.INGESTED:
-        subject.append(
+    if item.get("state") == CONTENT_STATE.INGESTED:
+        # it's not added when brief already exists
+        subject.add(
             {
                 "name": "BRIEF",
                 "qcode": "BRIEF",
@@ -108,6 +100,7 @@ def set_default_metadata(item, **kwargs):
                 "scheme": "belga-keywords",
             }
         )
+    item["subject"] = list(subject)
 
     return item
 
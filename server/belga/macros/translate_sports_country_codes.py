@@ -1,4 +1,7 @@
+import re
+
 from superdesk.editor_utils import replace_text
+from superdesk.text_utils import get_text
 
 COUNTRIES = {
     "nl": [
@@ -640,21 +643,49 @@ COUNTRIES = {
 }
 
 
+def get_translations(language):
+    """Map country codes of all other languages to codes of `language`.
+
+    When same code is used by more languages, the first one wins.
+    """
+    translations = {}
+    for lang, countries in COUNTRIES.items():
+        if lang == language:
+            continue
+        for country, translated in zip(countries, COUNTRIES[language]):
+            translations.setdefault(country, translated)
+    return translations
+
+
+def compile_pattern(codes):
+    """Compile regex matching `(CODE)` and `(CODE/` for all `codes` at once."""
+    alternation = "|".join(
+        re.escape(code) for code in sorted(codes, key=len, reverse=True)
+    )
+    return re.compile(r"\((" + alternation + r")([)/])")
+
+
+TRANSLATIONS = {lang: get_translations(lang) for lang in COUNTRIES}
+PATTERNS = {lang: compile_pattern(TRANSLATIONS[lang]) for lang in COUNTRIES}
+
+
 def callback(item, **kwargs):
     if not item.get("language") or not COUNTRIES.get(item["language"]):
         return
 
-    translated = COUNTRIES[item["language"]]
-    tpls = ("({})", "({}/")
+    translations = TRANSLATIONS[item["language"]]
+    text = get_text(item.get("body_html") or "", lf_on_block=True)
 
-    for lang in COUNTRIES:
-        if lang == item["language"]:
-            continue
-        for i, country in enumerate(COUNTRIES[lang]):
-            for tpl in tpls:
-                replace_text(
-                    item, "body_html", tpl.format(country), tpl.format(translated[i])
-                )
+    # find all codes used in the text in one pass,
+    # so editor state is updated only for codes which are there
+    replacements = {}
+    for match in PATTERNS[item["language"]].finditer(text):
+        country, end = match.groups()
+        if translations[country] != country:
+            replacements[match.group(0)] = "({}{}".format(translations[country], end)
+
+    for old, new in replacements.items():
+        replace_text(item, "body_html", old, new)
 
     return item
 
@@ -8,16 +8,20 @@
 # AUTHORS and LICENSE files distributed with this source code, or
 # at https://www.sourcefabric.org/superdesk/license
 
+import re
 import pytz
 import logging
 import mimetypes
 
-from copy import deepcopy
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor
 from typing import NamedTuple
+from bson import ObjectId
 from urllib.parse import urljoin
 from dateutil import parser as dateutil_parser
 
 from lxml import etree
+from lxml import html as lxml_html
 from lxml.etree import SubElement
 from lxml.html.clean import Cleaner
 from eve.utils import config
@@ -39,10 +43,111 @@ from superdesk.metadata.item import (
 )
 from superdesk.publish.formatters import NewsML12Formatter
 from superdesk.publish.formatters.newsml_g2_formatter import XML_LANG
+from ..cache import TTLCache
 from ..search_providers import get_service_by_id, get_provider_by_guid
 
 logger = logging.getLogger(__name__)
 
+# raw `getGalleryById` responses keyed by (provider id, gallery id)
+_coverages_cache = TTLCache(maxsize=1024)
+# formatted documents keyed by `BelgaNewsML12Formatter._get_cache_key`
+_formatted_cache = TTLCache(maxsize=256)
+# size in bytes of stored media files keyed by media id, stored files are never modified
+_media_lengths_cache = TTLCache(maxsize=4096)
+
+# cuts off all tags except paragraph and headings
+text_cleaner = Cleaner(
+    allow_tags=("p", "h1", "h2", "h3", "h4", "h5", "h6"),
+    remove_unknown_tags=False,
+)
+# text without any markup, entities or characters which are changed by html parser
+PLAIN_TEXT_RE = re.compile(r"[^<>&\r\x00-\x08\x0b\x0c\x0e-\x1f\x7f]*")
+# tags kept by `text_cleaner`
+TEXT_TAGS = frozenset(text_cleaner.allow_tags)
+# elements removed by `text_cleaner` together with their content
+TEXT_CLEANER_KILL_TAGS = (
+    "script",
+    "link",
+    "meta",
+    "applet",
+    "button",
+    "input",
+    "select",
+    "textarea",
+    "frameset",
+    "frame",
+    "noframes",
+    etree.Comment,
+    etree.ProcessingInstruction,
+)
+# inline elements which keep paragraphs and headings in place when html is parsed again
+PHRASING_TAGS = frozenset(
+    (
+        "a",
+        "abbr",
+        "b",
+        "big",
+        "br",
+        "cite",
+        "code",
+        "em",
+        "font",
+        "i",
+        "img",
+        "q",
+        "s",
+        "small",
+        "span",
+        "strike",
+        "strong",
+        "sub",
+        "sup",
+        "tt",
+        "u",
+        "var",
+    )
+)
+# elements with raw text or whitespace handled by html parser on its own
+RAW_TEXT_TAGS = frozenset(
+    (
+        "script",
+        "style",
+        "textarea",
+        "title",
+        "pre",
+        "xmp",
+        "listing",
+        "plaintext",
+        "noscript",
+    )
+)
+# control characters and document structure which are changed when html is parsed again
+UNSTABLE_HTML_RE = re.compile(
+    r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]|</?(?:html|head|body)\b", re.I
+)
+# separator of text of elements used by `get_component_text`
+TEXT_SPACE = "   "
+
+
+def invalidate_formatted_cache(guid=None):
+    """
+    Remove formatted documents of items chains containing `guid`, all by default.
+
+    Versions of the chain are part of the cache key, this removes documents
+    which depend on item changes saved without a new version.
+    The cache lives in the process, so other processes keep their documents until ttl.
+    :param str guid: guid of an item in the chain
+    """
+    if guid is None:
+        _formatted_cache.clear()
+        return
+    for key in _formatted_cache.keys():
+        original_guid, current_guid, _, _, chain = key
+        if guid in (original_guid, current_guid) or any(
+            chain_guid == guid for chain_guid, _ in chain
+        ):
+            _formatted_cache.pop(key)
+
 
 def generate_sequence_number(subscriber):
     """
@@ -87,6 +192,37 @@ class NewsComponent2Roles(NamedTuple):
     RELATED_ARTICLE: str
 
 
+class FormatContext:
+    """
+    State of one formatted article.
+    Formatter is a singleton, so it is created per `format` call and passed to all `_format_*` methods,
+    it allows to format items concurrently and the article is not kept after the call.
+    """
+
+    def __init__(self):
+        # services
+        self.archive_service = None
+        self.attachments_service = None
+        self.content_types_service = None
+        self.roles_service = None
+        self.users_service = None
+        self.vocabularies_service = None
+        # items chain fetched from db and its original and published items
+        self.items_chain = ()
+        self.original_item = None
+        self.current_item = None
+        self.cache_key = None
+        self.duid = None
+        self.tz = None
+        self.string_now = None
+        # 2nd level NewsComponents and data used by them
+        self.newsml_items_chain = ()
+        self.belga_coverage_field_ids = []
+        self.seen_pictures = set()
+        self.users = {}
+        self.roles = {}
+
+
 class BelgaNewsML12Formatter(NewsML12Formatter):
     """
     Belga News ML 1.2 Formatter
@@ -97,6 +233,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
     DATETIME_FORMAT = "%Y%m%dT%H%M%S"
     BELGA_TEXT_PROFILE = "belga_text"
     DEFAULT_CREDITLINE = "BELGA"
+    # must be increased when the output is changed, formatted documents are cached
+    VERSION = 1
 
     SD_BELGA_IMAGE_RENDITIONS_MAP = {
         "original": "full",
@@ -127,6 +265,9 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         """
         Create output in Belga NewsML 1.2 format
 
+        The document is the same for all subscribers, so it's rendered once
+        and kept in a short living cache, only the sequence number is generated per subscriber.
+
         :param dict article:
         :param dict subscriber:
         :param list codes:
@@ -134,60 +275,30 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             publish sequence number and formatted output string.
         :raises FormatterError: if the formatter fails to format an article
         """
-        self._seen_pictures = set()
-
         try:
-            self.archive_service = superdesk.get_resource_service("archive")
-            self.content_types_service = superdesk.get_resource_service("content_types")
-            self.roles_service = superdesk.get_resource_service("roles")
-            self.users_service = superdesk.get_resource_service("users")
-            self.vocabularies_service = superdesk.get_resource_service("vocabularies")
-            self.attachments_service = superdesk.get_resource_service("attachments")
-            self._belga_coverage_field_ids = [
-                i["_id"]
-                for i in self.vocabularies_service.find(
-                    {"custom_field_type": "belga.coverage"}
+            context = self._create_context(article)
+
+            xml_string = _formatted_cache.get(context.cache_key)
+            if xml_string is None:
+                self._prepare_newsml(context)
+
+                newsml = etree.Element("NewsML")
+                self._format_catalog(newsml)
+                self._format_newsenvelope(context, newsml)
+                self._format_newsitem(context, newsml)
+
+                xml_string = (
+                    self.XML_ROOT
+                    + "\n"
+                    + etree.tostring(
+                        newsml, pretty_print=True, encoding=self.ENCODING
+                    ).decode(self.ENCODING)
+                )
+                _formatted_cache.set(
+                    context.cache_key,
+                    xml_string,
+                    ttl=app.config.get("BELGA_NEWSML_CACHE_TTL", 60),
                 )
-            ]
-
-            # original/initial item
-            items_chain = self.archive_service.get_items_chain(article)
-            self._original_item = items_chain[0]
-            # the actual item which was selected for publishing in the UI.
-            # just fetched doc from the db (the one in `items_chain`) is used instead of `article` to avoid
-            # a possible difference in `versioncreated` datetime
-            for item in items_chain:
-                if item["guid"] == article["guid"]:
-                    self._current_item = item
-                    break
-            else:
-                # in theory, it'll never happen
-                logger.warning("Published item was not found in the items chain")
-                self._current_item = article
-
-            # items chain in context of Belga NewsML
-            self._newsml_items_chain = self._get_newsml_items_chain(items_chain)
-            # `NewsItemId` and `Duid` must always use guid of original item
-            # SDBELGA-348
-            self._duid = self._original_item[GUID_FIELD]
-
-            self._tz = pytz.timezone(superdesk.app.config["DEFAULT_TIMEZONE"])
-            self._string_now = self._get_formatted_datetime(
-                self._current_item["firstpublished"]
-            )
-
-            self._newsml = etree.Element("NewsML")
-            self._format_catalog()
-            self._format_newsenvelope()
-            self._format_newsitem()
-
-            xml_string = (
-                self.XML_ROOT
-                + "\n"
-                + etree.tostring(
-                    self._newsml, pretty_print=True, encoding=self.ENCODING
-                ).decode(self.ENCODING)
-            )
             pub_seq_num = generate_sequence_number(subscriber)
 
             return [(pub_seq_num, xml_string)]
@@ -195,6 +306,155 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             raise
             raise FormatterError.newml12FormatterError(ex, subscriber)
 
+    def format_to(self, article, subscriber, output, codes=None):
+        """
+        Write output in Belga NewsML 1.2 format into `output`.
+
+        Unlike `format` the whole document is not kept in memory,
+        every 2nd level NewsComponent is serialized and written to `output` as soon as it's created.
+        Written bytes are the same as the output of `format` encoded with `ENCODING`,
+        a document already rendered by `format` is written from the cache.
+
+        :param dict article:
+        :param dict subscriber:
+        :param output: binary file-like object
+        :param list codes:
+        :return int: publish sequence number
+        :raises FormatterError: if the formatter fails to format an article
+        """
+        try:
+            context = self._create_context(article)
+            xml_string = _formatted_cache.get(context.cache_key)
+            if xml_string is None:
+                self._prepare_newsml(context)
+                self._write_newsml(context, output)
+            else:
+                output.write(xml_string.encode(self.ENCODING))
+            return generate_sequence_number(subscriber)
+        except Exception as ex:
+            raise FormatterError.newml12FormatterError(ex, subscriber)
+
+    def _create_context(self, article):
+        """
+        Create context of formatting of `article`: fetch its items chain
+        and get the key of its formatted document.
+        :param dict article:
+        :rtype: FormatContext
+        """
+        context = FormatContext()
+        context.archive_service = superdesk.get_resource_service("archive")
+        context.content_types_service = superdesk.get_resource_service("content_types")
+        context.roles_service = superdesk.get_resource_service("roles")
+        context.users_service = superdesk.get_resource_service("users")
+        context.vocabularies_service = superdesk.get_resource_service("vocabularies")
+        context.attachments_service = superdesk.get_resource_service("attachments")
+
+        # original/initial item
+        context.items_chain = context.archive_service.get_items_chain(article)
+        context.original_item = context.items_chain[0]
+        # the actual item which was selected for publishing in the UI.
+        # just fetched doc from the db (the one in `items_chain`) is used instead of `article` to avoid
+        # a possible difference in `versioncreated` datetime
+        for item in context.items_chain:
+            if item["guid"] == article["guid"]:
+                context.current_item = item
+                break
+        else:
+            # in theory, it'll never happen
+            logger.warning("Published item was not found in the items chain")
+            context.current_item = article
+
+        # `NewsItemId` and `Duid` must always use guid of original item
+        # SDBELGA-348
+        context.duid = context.original_item[GUID_FIELD]
+
+        context.tz = pytz.timezone(superdesk.app.config["DEFAULT_TIMEZONE"])
+        context.string_now = self._get_formatted_datetime(
+            context, context.current_item["firstpublished"]
+        )
+
+        context.cache_key = self._get_cache_key(context)
+        return context
+
+    def _get_cache_key(self, context):
+        """
+        Get the key of formatted document in `_formatted_cache`.
+        Versions of all published items in the chain are part of the key,
+        so publishing of an update or a translation never uses an outdated document.
+        :param FormatContext context: format context
+        :return tuple: (original guid, current guid, current version, formatter version, chain versions)
+        """
+        return (
+            context.original_item[GUID_FIELD],
+            context.current_item[GUID_FIELD],
+            context.current_item.get(config.VERSION),
+            self.VERSION,
+            tuple(
+                (item[GUID_FIELD], item.get(config.VERSION))
+                for item in context.items_chain
+                if item.get(ITEM_STATE)
+                in (CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED)
+            ),
+        )
+
+    def _prepare_newsml(self, context):
+        """
+        Fetch everything else which is needed to format the items chain.
+        :param FormatContext context: format context
+        """
+        context.belga_coverage_field_ids = [
+            i["_id"]
+            for i in context.vocabularies_service.find(
+                {"custom_field_type": "belga.coverage"}
+            )
+        ]
+
+        # items chain in context of Belga NewsML
+        context.newsml_items_chain = self._get_newsml_items_chain(
+            context, context.items_chain
+        )
+        # users and roles used in `Creator` and `Validator` of all NewsComponents
+        self._prefetch_authors(context)
+        # sizes of all internally stored renditions and attachments
+        self._prefetch_media_lengths(context)
+
+    def _write_newsml(self, context, output):
+        """
+        Write `<NewsML>` into `output` element by element.
+        :param FormatContext context: format context
+        :param output: binary file-like object
+        """
+        writer = NewsMLWriter(output, self.ENCODING)
+        output.write((self.XML_ROOT + "\n").encode(self.ENCODING))
+
+        newsml = etree.Element("NewsML")
+        writer.start(newsml, level=0)
+        self._format_catalog(newsml)
+        self._format_newsenvelope(context, newsml)
+        for element in newsml:
+            writer.write(element, level=1)
+
+        newsitem = etree.Element("NewsItem")
+        writer.start(newsitem, level=1)
+        self._format_identification(context, newsitem)
+        self._format_newsmanagement(context, newsitem)
+        for element in newsitem:
+            writer.write(element, level=2)
+
+        newscomponent_1_level = etree.Element(
+            "NewsComponent", self._get_newscomponent_1_level_attrib(context)
+        )
+        writer.start(newscomponent_1_level, level=2)
+        self._format_newscomponent_1_level_metadata(context, newscomponent_1_level)
+        for element in newscomponent_1_level:
+            writer.write(element, level=3)
+        for element in self._iter_newscomponents_2_level(context):
+            writer.write(element, level=3)
+        writer.end(newscomponent_1_level, level=2)
+
+        writer.end(newsitem, level=1)
+        writer.end(newsml, level=0)
+
     def can_format(self, format_type, item):
         """
         Test if the item can be formatted to Belga NewsML 1.2 or not.
@@ -215,34 +475,46 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 return True
         return False
 
-    def _format_catalog(self):
-        """Creates `<Catalog>` and adds it to `<NewsML>`."""
+    def _format_catalog(self, newsml):
+        """
+        Creates `<Catalog>` and adds it to `<NewsML>`.
+        :param Element newsml: NewsML
+        """
 
         SubElement(
-            self._newsml,
+            newsml,
             "Catalog",
             {"Href": "http://www.belga.be/dtd/BelgaCatalog.xml"},
         )
 
-    def _format_newsenvelope(self):
-        """Creates `<NewsEnvelope>` and adds it to `<NewsML>`."""
+    def _format_newsenvelope(self, context, newsml):
+        """
+        Creates `<NewsEnvelope>` and adds it to `<NewsML>`.
+        :param FormatContext context: format context
+        :param Element newsml: NewsML
+        """
 
-        newsenvelope = SubElement(self._newsml, "NewsEnvelope")
-        SubElement(newsenvelope, "DateAndTime").text = self._string_now
+        newsenvelope = SubElement(newsml, "NewsEnvelope")
+        SubElement(newsenvelope, "DateAndTime").text = context.string_now
         SubElement(newsenvelope, "NewsService", {"FormalName": ""})
         SubElement(newsenvelope, "NewsProduct", {"FormalName": ""})
 
-    def _format_newsitem(self):
-        """Creates `<NewsItem>` and all internal elements and adds it to `<NewsML>`."""
+    def _format_newsitem(self, context, newsml):
+        """
+        Creates `<NewsItem>` and all internal elements and adds it to `<NewsML>`.
+        :param FormatContext context: format context
+        :param Element newsml: NewsML
+        """
 
-        newsitem = SubElement(self._newsml, "NewsItem")
-        self._format_identification(newsitem)
-        self._format_newsmanagement(newsitem)
-        self._format_newscomponent_1_level(newsitem)
+        newsitem = SubElement(newsml, "NewsItem")
+        self._format_identification(context, newsitem)
+        self._format_newsmanagement(context, newsitem)
+        self._format_newscomponent_1_level(context, newsitem)
 
-    def _format_identification(self, newsitem):
+    def _format_identification(self, context, newsitem):
         """
         Creates the `<Identification>` element and adds it to `<NewsItem>`.
+        :param FormatContext context: format context
         :param Element newsitem: NewsItem
         """
 
@@ -252,77 +524,100 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             "NEWSML_PROVIDER_ID"
         ]
         SubElement(news_identifier, "DateId").text = self._get_formatted_datetime(
-            self._current_item.get("firstcreated")
+            context, context.current_item.get("firstcreated")
         )
-        SubElement(news_identifier, "NewsItemId").text = self._duid
-        revision = self._process_revision(self._current_item)
+        SubElement(news_identifier, "NewsItemId").text = context.duid
+        revision = self._process_revision(context.current_item)
         SubElement(news_identifier, "RevisionId", attrib=revision).text = str(
-            self._current_item.get(config.VERSION, "")
+            context.current_item.get(config.VERSION, "")
         )
         SubElement(news_identifier, "PublicIdentifier").text = (
             self._generate_public_identifier(
-                self._current_item[config.ID_FIELD],
-                self._current_item.get(config.VERSION, ""),
+                context.current_item[config.ID_FIELD],
+                context.current_item.get(config.VERSION, ""),
                 revision.get("Update", ""),
             )
         )
 
-    def _format_newsmanagement(self, newsitem):
+    def _format_newsmanagement(self, context, newsitem):
         """
         Creates the `<NewsManagement>` element and adds it to `<NewsItem>`.
+        :param FormatContext context: format context
         :param Element newsitem: NewsItem
         """
 
         news_management = SubElement(newsitem, "NewsManagement")
         SubElement(news_management, "NewsItemType", {"FormalName": "NEWS"})
         SubElement(news_management, "FirstCreated").text = self._get_formatted_datetime(
-            self._current_item.get("firstcreated")
+            context, context.current_item.get("firstcreated")
         )
-        SubElement(news_management, "ThisRevisionCreated").text = self._string_now
+        SubElement(news_management, "ThisRevisionCreated").text = context.string_now
 
-        if self._current_item.get(EMBARGO):
+        if context.current_item.get(EMBARGO):
             SubElement(news_management, "Status", {"FormalName": "Embargoed"})
             status_will_change = SubElement(news_management, "StatusWillChange")
             SubElement(
                 status_will_change,
                 "FutureStatus",
-                {"FormalName": self._current_item.get("pubstatus", "").upper()},
+                {"FormalName": context.current_item.get("pubstatus", "").upper()},
             )
             SubElement(status_will_change, "DateAndTime").text = get_utc_schedule(
-                self._current_item, EMBARGO
+                context.current_item, EMBARGO
             ).isoformat()
         else:
             SubElement(
                 news_management,
                 "Status",
-                {"FormalName": self._current_item.get("pubstatus", "").upper()},
+                {"FormalName": context.current_item.get("pubstatus", "").upper()},
             )
 
-    def _format_newscomponent_1_level(self, newsitem):
+    def _format_newscomponent_1_level(self, context, newsitem):
         """
         Creates the `<NewsComponent>` element and adds it to `<NewsItem>`.
+        :param FormatContext context: format context
         :param Element newsitem: NewsItem
         """
 
         newscomponent_1_level = SubElement(
-            newsitem,
-            "NewsComponent",
-            {"Duid": self._duid, XML_LANG: self._current_item.get("language")},
+            newsitem, "NewsComponent", self._get_newscomponent_1_level_attrib(context)
         )
+        self._format_newscomponent_1_level_metadata(context, newscomponent_1_level)
+        self._format_newscomponent_2_level(context, newscomponent_1_level)
+
+    def _get_newscomponent_1_level_attrib(self, context):
+        return {"Duid": context.duid, XML_LANG: context.current_item.get("language")}
+
+    def _format_newscomponent_1_level_metadata(self, context, newscomponent_1_level):
+        """
+        Creates `<NewsLines>`, `<AdministrativeMetadata>` and `<DescriptiveMetadata>` of 1st level NewsComponent.
+        :param FormatContext context: format context
+        :param Element newscomponent_1_level: NewsComponent of 1st level
+        """
+
         newslines = SubElement(newscomponent_1_level, "NewsLines")
-        SubElement(newslines, "HeadLine").text = self._current_item.get("headline", "")
+        SubElement(newslines, "HeadLine").text = context.current_item.get(
+            "headline", ""
+        )
         SubElement(newscomponent_1_level, "AdministrativeMetadata")
         descriptivemetadata = SubElement(newscomponent_1_level, "DescriptiveMetadata")
         SubElement(descriptivemetadata, "Genre", {"FormalName": ""})
 
-        self._format_newscomponent_2_level(newscomponent_1_level)
-
-    def _format_newscomponent_2_level(self, newscomponent_1_level):
+    def _format_newscomponent_2_level(self, context, newscomponent_1_level):
         """
         Creates the `<NewsComponent>`(s) of a 2nd level and appends them to `newscomponent_1_level`.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         """
 
+        for newscomponent_2_level in self._iter_newscomponents_2_level(context):
+            newscomponent_1_level.append(newscomponent_2_level)
+
+    def _iter_newscomponents_2_level(self, context):
+        """
+        Generate the `<NewsComponent>`(s) of a 2nd level one by one.
+        :return: generator of 2nd level NewsComponent elements
+        """
+
         ROLE_FORMATTER_MAP = {
             self.NEWSCOMPONENT2_ROLES.PICTURE: self._format_picture,
             self.NEWSCOMPONENT2_ROLES.VIDEO: self._format_video,
@@ -333,13 +628,18 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             self.NEWSCOMPONENT2_ROLES.URL: self._format_url,
         }
 
-        for item in self._newsml_items_chain:
+        for item in context.newsml_items_chain:
             _format = ROLE_FORMATTER_MAP.get(item["_role"], self._format_text)
-            _format(newscomponent_1_level, item)
+            # item formatters append NewsComponent(s) to the parent,
+            # detached parent is used to hand them over one by one
+            parent = etree.Element("NewsComponent")
+            _format(context, parent, item)
+            yield from list(parent)
 
-    def _format_text(self, newscomponent_1_level, item):
+    def _format_text(self, context, newscomponent_1_level, item):
         """
         Creates a `<NewsComponent>` of a 2nd level with information related to content profile.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict item: item
         """
@@ -365,15 +665,16 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         # NewsLines
         self._format_newslines(newscomponent_2_level, item=item)
         # AdministrativeMetadata
-        self._format_administrative_metadata(newscomponent_2_level, item=item)
+        self._format_administrative_metadata(context, newscomponent_2_level, item=item)
         # DescriptiveMetadata
-        self._format_descriptive_metadata(newscomponent_2_level, item=item)
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=item)
         # NewsComponent 3rd level
         self._format_newscomponent_3_level(newscomponent_2_level, item=item)
 
-    def _format_related_text_item(self, newscomponent_1_level, item):
+    def _format_related_text_item(self, context, newscomponent_1_level, item):
         """
         Creates a `<NewsComponent>` of a 2nd level with associated related text item.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict picture: picture item
         :param dict item: item
@@ -390,15 +691,16 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         # NewsLines
         self._format_newslines(newscomponent_2_level, item=item)
         # AdministrativeMetadata
-        self._format_administrative_metadata(newscomponent_2_level, item=item)
+        self._format_administrative_metadata(context, newscomponent_2_level, item=item)
         # DescriptiveMetadata
-        self._format_descriptive_metadata(newscomponent_2_level, item=item)
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=item)
         # NewsComponent 3rd level
         self._format_newscomponent_3_level(newscomponent_2_level, item=item)
 
-    def _format_url(self, newscomponent_1_level, item_url):
+    def _format_url(self, context, newscomponent_1_level, item_url):
         """
         Creates a `NewsComponent`(s) of a 2nd level with belga url item.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict item_url: newsml url item
         """
@@ -415,8 +717,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         SubElement(newslines, "HeadLine").text = item_url.get("description")
         SubElement(newslines, "CopyrightLine").text = item_url.get("copyrightholder")
         SubElement(newslines, "CreditLine").text = self.DEFAULT_CREDITLINE
-        self._format_administrative_metadata(newscomponent_2_level, item=item_url)
-        self._format_descriptive_metadata(newscomponent_2_level, item=item_url)
+        self._format_administrative_metadata(
+            context, newscomponent_2_level, item=item_url
+        )
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=item_url)
 
         for role, key in (("Title", "description"), ("Locator", "url")):
             newscomponent_3_level = SubElement(
@@ -444,9 +748,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 {"FormalName": "maxCharCount", "Value": "0"},
             )
 
-    def _format_picture(self, newscomponent_1_level, picture):
+    def _format_picture(self, context, newscomponent_1_level, picture):
         """
         Creates a `<NewsComponent>` of a 2nd level with associated picture data.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict picture: picture item
         """
@@ -455,9 +760,9 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         image_id = (picture.get("guid") or picture["_id"]) + picture.get(
             "language", "en"
         )
-        if image_id in self._seen_pictures:
+        if image_id in context.seen_pictures:
             return
-        self._seen_pictures.add(image_id)
+        context.seen_pictures.add(image_id)
 
         self._set_belga_urn(picture)
 
@@ -472,8 +777,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         # NewsLines
         self._format_newslines(newscomponent_2_level, item=picture)
         # AdministrativeMetadata
-        self._format_administrative_metadata(newscomponent_2_level, item=picture)
-        self._format_descriptive_metadata(newscomponent_2_level, item=picture)
+        self._format_administrative_metadata(
+            context, newscomponent_2_level, item=picture
+        )
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=picture)
 
         for role, key in (("Title", "headline"), ("Caption", "description_text")):
             newscomponent_3_level = SubElement(newscomponent_2_level, "NewsComponent")
@@ -545,10 +852,11 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 newscomponent_3_level, rendition=picture["renditions"][key]
             )
 
-    def _format_coverage(self, newscomponent_1_level, coverage):
+    def _format_coverage(self, context, newscomponent_1_level, coverage):
         """
         Creates a `<NewsComponent>` of a 2nd level with associated graphic item's data
         or with data from `belga.coverage` field.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict coverage: coverage data
         """
@@ -561,8 +869,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             newscomponent_2_level.attrib[XML_LANG] = coverage.get("language")
         SubElement(newscomponent_2_level, "Role", {"FormalName": coverage["_role"]})
         self._format_newslines(newscomponent_2_level, item=coverage)
-        self._format_administrative_metadata(newscomponent_2_level, item=coverage)
-        self._format_descriptive_metadata(newscomponent_2_level, item=coverage)
+        self._format_administrative_metadata(
+            context, newscomponent_2_level, item=coverage
+        )
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=coverage)
 
         for role, key in (("Title", "headline"), ("Caption", "description_text")):
             newscomponent_3_level = SubElement(newscomponent_2_level, "NewsComponent")
@@ -604,9 +914,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             newscomponent_3_level, rendition=coverage["renditions"]["original"]
         )
 
-    def _format_audio(self, newscomponent_1_level, audio):
+    def _format_audio(self, context, newscomponent_1_level, audio):
         """
         Creates a `<NewsComponent>` of a 2nd level with associated audio data.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict audio: audio item
         """
@@ -620,8 +931,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             newscomponent_2_level.attrib[XML_LANG] = audio.get("language")
         SubElement(newscomponent_2_level, "Role", {"FormalName": audio["_role"]})
         self._format_newslines(newscomponent_2_level, item=audio)
-        self._format_administrative_metadata(newscomponent_2_level, item=audio)
-        self._format_descriptive_metadata(newscomponent_2_level, item=audio)
+        self._format_administrative_metadata(context, newscomponent_2_level, item=audio)
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=audio)
 
         for role, key in (("Title", "headline"), ("Body", "description_text")):
             newscomponent_3_level = SubElement(newscomponent_2_level, "NewsComponent")
@@ -664,9 +975,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             newscomponent_3_level, rendition=audio["renditions"]["original"]
         )
 
-    def _format_video(self, newscomponent_1_level, video):
+    def _format_video(self, context, newscomponent_1_level, video):
         """
         Creates a `<NewsComponent>` of a 2nd level with associated video data.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict audio: video item
         """
@@ -680,8 +992,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             newscomponent_2_level.attrib[XML_LANG] = video.get("language")
         SubElement(newscomponent_2_level, "Role", {"FormalName": video["_role"]})
         self._format_newslines(newscomponent_2_level, item=video)
-        self._format_administrative_metadata(newscomponent_2_level, item=video)
-        self._format_descriptive_metadata(newscomponent_2_level, item=video)
+        self._format_administrative_metadata(context, newscomponent_2_level, item=video)
+        self._format_descriptive_metadata(context, newscomponent_2_level, item=video)
 
         for role, key in (("Title", "headline"), ("Body", "description_text")):
             newscomponent_3_level = SubElement(newscomponent_2_level, "NewsComponent")
@@ -768,9 +1080,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 newscomponent_3_level, rendition=video["renditions"][key]
             )
 
-    def _format_attachment(self, newscomponent_1_level, attachment):
+    def _format_attachment(self, context, newscomponent_1_level, attachment):
         """
         Creates a `<NewsComponent>` of a 2nd level with file attached to the item.
+        :param FormatContext context: format context
         :param Element newscomponent_1_level: NewsComponent of 1st level
         :param dict attachment: attachment
         """
@@ -790,8 +1103,12 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
 
         SubElement(newscomponent_2_level, "Role", {"FormalName": attachment["_role"]})
         self._format_newslines(newscomponent_2_level, item=attachment)
-        self._format_administrative_metadata(newscomponent_2_level, item=attachment)
-        self._format_descriptive_metadata(newscomponent_2_level, item=attachment)
+        self._format_administrative_metadata(
+            context, newscomponent_2_level, item=attachment
+        )
+        self._format_descriptive_metadata(
+            context, newscomponent_2_level, item=attachment
+        )
 
         for role, key in (("Title", "headline"), ("Body", "description_text")):
             newscomponent_3_level = SubElement(newscomponent_2_level, "NewsComponent")
@@ -832,6 +1149,7 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 "filename": attachment["filename"],
                 "media": attachment["media"],
                 "mimetype": attachment["mimetype"],
+                "length": attachment.get("length"),
                 "href": urljoin(
                     app.config["MEDIA_PREFIX"] + "/", "{}".format(attachment["media"])
                 ),
@@ -850,7 +1168,12 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         :type media_item: dict
         """
         provider = get_provider_by_guid(media_item.get(GUID_FIELD, ""))
-        for key, rendition in media_item.get("renditions", {}).items():
+        # renditions are shared with items chain docs, so they are copied before the update
+        media_item["renditions"] = {
+            key: dict(rendition)
+            for key, rendition in media_item.get("renditions", {}).items()
+        }
+        for key, rendition in media_item["renditions"].items():
             # rendition is from Belga image search provider
             if provider and not hasattr(provider, "GALLERY_URN"):
                 if key in self.SD_BELGA_IMAGE_RENDITIONS_MAP:
@@ -945,9 +1268,9 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         characteristics = SubElement(contentitem, "Characteristics")
 
         if rendition.get("media"):
-            media = app.media.get(str(rendition["media"]))
-            length = media.length if media.length else media.metadata.get("length")
-            SubElement(characteristics, "SizeInBytes").text = str(length)
+            SubElement(characteristics, "SizeInBytes").text = str(
+                self._get_media_length(rendition)
+            )
         if rendition.get("width"):
             SubElement(
                 characteristics,
@@ -1032,9 +1355,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         SubElement(newsline, "NewsLineType", {"FormalName": item.get("line_type", "")})
         SubElement(newsline, "NewsLineText").text = item.get("line_text")
 
-    def _format_administrative_metadata(self, newscomponent_2_level, item):
+    def _format_administrative_metadata(self, context, newscomponent_2_level, item):
         """
         Creates the `<AdministrativeMetadata>` element and add it to `newscomponent_2_level`
+        :param FormatContext context: format context
         :param Element newscomponent_2_level: NewsComponent of 2nd level
         :param dict item: item
         """
@@ -1049,14 +1373,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         )
         creator = SubElement(administrative_metadata, "Creator")
 
-        if item.get("type") == CONTENT_TYPE.PICTURE:
-            authors = (
-                (item["original_creator"],) if item.get("original_creator") else tuple()
-            )
-        else:
-            authors = item.get("authors", tuple())
-        for author in authors:
-            author = self._get_author_info(author)
+        for author in self._get_item_authors(item):
+            author = self._get_author_info(context, author)
             SubElement(
                 creator,
                 "Party",
@@ -1075,9 +1393,9 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 "Property",
                 {
                     "FormalName": "Validator",
-                    "Value": self._get_author_info(str(item["version_creator"]))[
-                        "initials"
-                    ],
+                    "Value": self._get_author_info(
+                        context, str(item["version_creator"])
+                    )["initials"],
                 },
             )
         elif item.get("administrative", {}).get("validator"):
@@ -1094,7 +1412,7 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             "Property",
             {
                 "FormalName": "ValidationDate",
-                "Value": self._get_formatted_datetime(item["firstpublished"]),
+                "Value": self._get_formatted_datetime(context, item["firstpublished"]),
             },
         )
         if item.get("administrative", {}).get("foreign_id"):
@@ -1188,9 +1506,10 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 {"FormalName": "/".join([source for source in sources])},
             )
 
-    def _format_descriptive_metadata(self, newscomponent_2_level, item):
+    def _format_descriptive_metadata(self, context, newscomponent_2_level, item):
         """
         Creates the `<DescriptiveMetadata>` element and add it to `newscomponent_2_level`
+        :param FormatContext context: format context
         :param Element newscomponent_2_level: NewsComponent of 2nd level
         :param dict item: item
         """
@@ -1198,7 +1517,7 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         descriptive_metadata = SubElement(newscomponent_2_level, "DescriptiveMetadata")
         if item.get("firstcreated"):
             descriptive_metadata.attrib["DateAndTime"] = self._get_formatted_datetime(
-                item["firstcreated"]
+                context, item["firstcreated"]
             )
 
         SubElement(descriptive_metadata, "SubjectCode")
@@ -1240,15 +1559,14 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         """
 
         # output first paragraph of the body as a lead
-        item["lead"] = ""
-        if item.get("body_html"):
-            tree = parse_html(item["body_html"], content="html")
-            for el in tree:
-                if el.tag == "p":
-                    item["lead"] = to_string(el)
-                    tree.remove(el)
-                    item["body_html"] = to_string(tree, pretty_print=True)
-                break
+        lead_text, body_text = get_lead_and_body_text(item.get("body_html"))
+        texts = {
+            "headline": (
+                get_component_text(item["headline"]) if item.get("headline") else None
+            ),
+            "lead": lead_text,
+            "body_html": body_text,
+        }
 
         # Title, Lead, Body
         for formalname, item_key in (
@@ -1256,7 +1574,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             ("Lead", "lead"),
             ("Body", "body_html"),
         ):
-            if item.get(item_key):
+            text = texts[item_key]
+            if text is not None:
                 newscomponent_3_level = SubElement(
                     newscomponent_2_level,
                     "NewsComponent",
@@ -1273,18 +1592,6 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 # ContentItem
                 contentitem = SubElement(newscomponent_3_level, "ContentItem")
                 SubElement(contentitem, "Format", {"FormalName": "Text"})
-
-                # cut off all tags except paragraph and headings
-                cleaner = Cleaner(
-                    allow_tags=("p", "h1", "h2", "h3", "h4", "h5", "h6"),
-                    remove_unknown_tags=False,
-                )
-                html_str = cleaner.clean_html(item.get(item_key))
-                text = text_utils.get_text(
-                    html_str, content="html", space_on_elements=True, space="   "
-                )
-                text = text.strip()
-
                 SubElement(contentitem, "DataContent").text = text
                 characteristics = SubElement(contentitem, "Characteristics")
                 # string's length is used in original belga's newsml
@@ -1295,7 +1602,46 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                     {"FormalName": "maxCharCount", "Value": "0"},
                 )
 
-    def _get_author_info(self, author):
+    def _get_item_authors(self, item):
+        if item.get("type") == CONTENT_TYPE.PICTURE:
+            return (
+                (item["original_creator"],) if item.get("original_creator") else tuple()
+            )
+        return item.get("authors", tuple())
+
+    def _prefetch_authors(self, context):
+        """
+        Fetch all users and their roles referenced in `context.newsml_items_chain`.
+        Only one query per collection is used, results are used by `_get_author_info`.
+        """
+        user_ids = set()
+        for item in context.newsml_items_chain:
+            for author in self._get_item_authors(item):
+                if type(author) is dict and "_id" in author:
+                    user_ids.add(str(author["_id"][0]))
+                elif type(author) is str:
+                    user_ids.add(author)
+            if item.get("version_creator"):
+                user_ids.add(str(item["version_creator"]))
+
+        context.users = {}
+        context.roles = {}
+        if not user_ids:
+            return
+        context.users = {
+            str(user["_id"]): user
+            for user in context.users_service.find({"_id": {"$in": _db_ids(user_ids)}})
+        }
+        role_ids = {str(u["role"]) for u in context.users.values() if u.get("role")}
+        if role_ids:
+            context.roles = {
+                str(role["_id"]): role
+                for role in context.roles_service.find(
+                    {"_id": {"$in": _db_ids(role_ids)}}
+                )
+            }
+
+    def _get_author_info(self, context, author):
         author_info = {"initials": "", "role": ""}
         author_type = type(author)
 
@@ -1306,9 +1652,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         # manually added author
         elif author_type is dict:
             author_info["role"] = author["_id"][1]
-            try:
-                user = next(self.users_service.find({"_id": author["_id"][0]}))
-            except StopIteration:
+            user = context.users.get(str(author["_id"][0]))
+            if user is None:
                 logger.warning(
                     "unknown user: {user_id}".format(user_id=author["_id"][0])
                 )
@@ -1317,15 +1662,13 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         # in case of version_creator
         elif author_type is str:
             author_id = author
-            try:
-                user = next(self.users_service.find({"_id": author_id}))
-            except StopIteration:
+            user = context.users.get(author_id)
+            if user is None:
                 logger.warning("unknown user: {user_id}".format(user_id=author_id))
             else:
                 if user.get("role"):
-                    try:
-                        role = next(self.roles_service.find({"_id": user["role"]}))
-                    except StopIteration:
+                    role = context.roles.get(str(user["role"]))
+                    if role is None:
                         logger.warning(
                             "unknown role: {role_id}".format(role_id=user["role"])
                         )
@@ -1337,25 +1680,154 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
 
         return author_info
 
-    def _get_formatted_datetime(self, _datetime):
+    def _get_media_renditions(self, item):
+        """
+        Get internally stored renditions of `item` which are used in NewsML.
+        :param dict item: item of `context.newsml_items_chain`
+        :return: list of renditions
+        """
+        if item.get("_role") == self.NEWSCOMPONENT2_ROLES.RELATED_DOCUMENT:
+            renditions = [{"media": item.get("media"), "length": item.get("length")}]
+        else:
+            renditions = [
+                item.get("renditions", {}).get(key)
+                for key in self.SD_BELGA_IMAGE_RENDITIONS_MAP
+            ]
+        return [r for r in renditions if r and r.get("media")]
+
+    def _prefetch_media_lengths(self, context):
+        """
+        Fetch sizes of all media files referenced in `context.newsml_items_chain`.
+        Sizes stored in renditions or already cached are not fetched, the rest is fetched
+        concurrently and kept in a cache shared by all formatter runs.
+        """
+        media_ids = {
+            str(rendition["media"])
+            for item in context.newsml_items_chain
+            for rendition in self._get_media_renditions(item)
+            if rendition.get("length") is None
+        }
+        media_ids = [i for i in media_ids if i not in _media_lengths_cache]
+        if not media_ids:
+            return
+
+        max_workers = min(len(media_ids), app.config.get("BELGA_MEDIA_WORKERS", 4))
+        flask_app = app._get_current_object()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            lengths = executor.map(
+                lambda media_id: _fetch_media_length(flask_app, media_id), media_ids
+            )
+            for media_id, length in zip(media_ids, lengths):
+                _media_lengths_cache.set(media_id, length)
+
+    def _get_media_length(self, rendition):
+        """
+        Get size in bytes of `rendition`'s media file.
+        :param dict rendition: rendition with `media` id
+        :return int: size in bytes
+        """
+        if rendition.get("length") is not None:
+            return rendition["length"]
+        media_id = str(rendition["media"])
+        length = _media_lengths_cache.get(media_id)
+        if length is None:
+            length = _fetch_media_length(app._get_current_object(), media_id)
+            _media_lengths_cache.set(media_id, length)
+        return length
+
+    def _get_formatted_datetime(self, context, _datetime):
         if type(_datetime) is str:
             _datetime = dateutil_parser.parse(_datetime)
 
-        return _datetime.astimezone(self._tz).strftime(self.DATETIME_FORMAT)
+        return _datetime.astimezone(context.tz).strftime(self.DATETIME_FORMAT)
 
-    def _get_content_profile_name(self, item):
+    def _get_content_profile_name(self, context, item):
         if item.get("profile") in self.SD_CP_NAME_ROLE_MAP:
             return self.SD_CP_NAME_ROLE_MAP[item.get("profile")]
 
         req = ParsedRequest()
         req.args = {}
         req.projection = '{"label": 1}'
-        content_type = self.content_types_service.find_one(
+        content_type = context.content_types_service.find_one(
             req=req, _id=item.get("profile")
         )
         return content_type["label"].capitalize()
 
-    def _get_newsml_items_chain(self, items_chain):
+    def _get_coverage_ids(self, context, item):
+        """
+        Get galleries used in `belga.coverage` custom fields of `item`.
+        :param FormatContext context: format context
+        :param dict item: item
+        :return: list of (provider id, gallery id) tuples
+        """
+        coverage_ids = []
+        extra = item.get("extra", {})
+        for field_id in context.belga_coverage_field_ids:
+            if extra.get(field_id):
+                for belga_item_id in extra[field_id].split(";"):
+                    coverage_ids.append(
+                        (belga_item_id.split(":")[-2], belga_item_id.split(":")[-1])
+                    )
+        return coverage_ids
+
+    def _get_coverages(self, coverage_ids):
+        """
+        Fetch galleries from belga coverage search providers.
+        One provider instance is used per provider id, galleries are fetched concurrently
+        and kept in a short living cache, so updates and translations of the same story
+        don't fetch them again.
+        :param coverage_ids: iterable of (provider id, gallery id) tuples
+        :return: dict where key is (provider id, gallery id) and value is (provider, gallery data) tuple
+        """
+        coverages = {}
+        providers = {}
+        to_fetch = {}
+
+        for coverage_id in coverage_ids:
+            provider_id, gallery_id = coverage_id
+            if coverage_id in coverages or coverage_id in to_fetch:
+                continue
+            if provider_id not in providers:
+                providers[provider_id] = get_service_by_id(provider_id)
+            provider = providers[provider_id]
+            if provider is None:
+                logger.warning(
+                    "Failed to fetch belga coverage: unknown provider {}".format(
+                        provider_id
+                    )
+                )
+                continue
+            data = _coverages_cache.get(coverage_id)
+            if data is not None:
+                coverages[coverage_id] = (provider, data)
+            else:
+                to_fetch[coverage_id] = provider
+
+        if not to_fetch:
+            return coverages
+
+        ttl = app.config.get("BELGA_COVERAGE_CACHE_TTL", 60)
+        max_workers = min(len(to_fetch), app.config.get("BELGA_COVERAGE_WORKERS", 4))
+        flask_app = app._get_current_object()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                coverage_id: executor.submit(
+                    _fetch_coverage, flask_app, provider, coverage_id[1]
+                )
+                for coverage_id, provider in to_fetch.items()
+            }
+            for coverage_id, future in futures.items():
+                try:
+                    data = future.result()
+                except Exception as e:
+                    logger.warning("Failed to fetch belga coverage: {}".format(e))
+                else:
+                    _coverages_cache.set(coverage_id, data, ttl=ttl)
+                    coverages[coverage_id] = (to_fetch[coverage_id], data)
+
+        return coverages
+
+    def _get_newsml_items_chain(self, context, items_chain):
         """
         Get the whole items chain in context of Belga NewsML.
         Entities which are treated as a standalone items (NewsComponent 2nd level) in Belga NewsML:
@@ -1369,6 +1841,7 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
         - every item.extra.belga-url
         - every attachment
 
+        :param FormatContext context: format context
         :param items_chain: chain of items
         :type items_chain: list
         :return: tuple where every item represents a 2nd level NewsComponent in Belga NewsML
@@ -1391,26 +1864,86 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
             "authors",
             "original_creator",
         )
-        # sd items chain including updates and translations
-        sd_items_chain = deepcopy(
-            tuple(
-                i
-                for i in items_chain
-                if i.get(ITEM_STATE)
-                in (CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED)
+        # sd items chain including updates and translations.
+        # items are not copied, values set by formatter (`_role`, `lead`, `body_html`)
+        # are stored in the overlay (1st mapping) of every item
+        sd_items_chain = tuple(
+            ChainMap({}, i)
+            for i in items_chain
+            if i.get(ITEM_STATE) in (CONTENT_STATE.PUBLISHED, CONTENT_STATE.CORRECTED)
+        )
+
+        # gather ids of associated items and attachments of the whole chain
+        media_items_ids = []
+        rel_text_items_ids = []
+        attachments_ids = []
+        for sd_item in sd_items_chain:
+            sd_item_associations = sd_item.get("associations", {})
+            # get all associated media items `_id`s where `renditions` are NOT IN the item
+            media_items_ids.append(
+                [
+                    sd_item_associations[i]["_id"]
+                    for i in sd_item_associations
+                    if sd_item_associations[i]
+                    and sd_item_associations[i].get(ITEM_TYPE)
+                    in (
+                        CONTENT_TYPE.PICTURE,
+                        CONTENT_TYPE.GRAPHIC,
+                        CONTENT_TYPE.AUDIO,
+                        CONTENT_TYPE.VIDEO,
+                    )
+                    and "renditions" not in sd_item_associations[i]
+                ]
+            )
+            # get all associated `text` items ids where `_type` is not `externalsource`.
+            rel_text_items_ids.append(
+                [
+                    sd_item_associations[i]["_id"]
+                    for i in sd_item_associations
+                    if (
+                        sd_item_associations[i]
+                        and sd_item_associations[i].get(ITEM_TYPE) == "text"
+                        and sd_item_associations[i].get("_type") != "externalsource"
+                    )
+                ]
             )
+            attachments_ids.append(
+                [i["attachment"] for i in sd_item.get("attachments", [])]
+            )
+
+        # and fetch them at once, one query per collection
+        archive_docs = DocsByIds(
+            context.archive_service,
+            [_id for ids in media_items_ids + rel_text_items_ids for _id in ids],
+        )
+        attachments_docs = DocsByIds(
+            context.attachments_service, [_id for ids in attachments_ids for _id in ids]
+        )
+        logger.debug(
+            "Belga NewsML items chain of %s: %d sd items, %d archive and %d attachments queries",
+            context.original_item.get(GUID_FIELD),
+            len(sd_items_chain),
+            archive_docs.queries,
+            attachments_docs.queries,
+        )
+
+        # fetch all galleries from belga.coverage custom fields at once
+        coverages = self._get_coverages(
+            coverage_id
+            for sd_item in sd_items_chain
+            for coverage_id in self._get_coverage_ids(context, sd_item)
         )
 
         # newsml items chain
         newsml_items_chain = []
 
-        for sd_item in sd_items_chain:
+        for index, sd_item in enumerate(sd_items_chain):
             # get newscomponent role
             try:
                 sd_item["_role"] = self.SD_MEDIA_TYPE_ROLE_MAP[sd_item[ITEM_TYPE]]
             except KeyError:
                 # for text items `Role` is defined by content profile name
-                sd_item["_role"] = self._get_content_profile_name(sd_item)
+                sd_item["_role"] = self._get_content_profile_name(context, sd_item)
             newsml_items_chain.append(sd_item)
 
             sd_item_associations = sd_item.get("associations", {})
@@ -1437,25 +1970,8 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 )
                 and "renditions" in sd_item_associations[i]
             ]
-            # get all associated media items `_id`s where `renditions` are NOT IN the item
-            media_items_ids = [
-                sd_item_associations[i]["_id"]
-                for i in sd_item_associations
-                if sd_item_associations[i]
-                and sd_item_associations[i].get(ITEM_TYPE)
-                in (
-                    CONTENT_TYPE.PICTURE,
-                    CONTENT_TYPE.GRAPHIC,
-                    CONTENT_TYPE.AUDIO,
-                    CONTENT_TYPE.VIDEO,
-                )
-                and "renditions" not in sd_item_associations[i]
-            ]
-            # fetch associated docs by _id
-            if media_items_ids:
-                media_items += list(
-                    self.archive_service.find({"_id": {"$in": media_items_ids}})
-                )
+            # associated docs fetched by _id
+            media_items += archive_docs.get(media_items_ids[index])
             # pictures
             used_ids = []
             for picture in [
@@ -1513,38 +2029,19 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                 newsml_item["_role"] = self.NEWSCOMPONENT2_ROLES.VIDEO
                 newsml_items_chain.append(newsml_item)
             # belga.coverage custom fields
-            for field_id in self._belga_coverage_field_ids:
-                if sd_item_extra.get(field_id):
-                    for belga_item_id in sd_item_extra[field_id].split(";"):
-                        provider_id = belga_item_id.split(":")[-2]
-                        gallery_id = belga_item_id.split(":")[-1]
-                        belga_cov_search_provider = get_service_by_id(provider_id)
-                        try:
-                            data = belga_cov_search_provider.proxy(
-                                "getGalleryById", {"i": gallery_id}
-                            )
-                        except Exception as e:
-                            logger.warning(
-                                "Failed to fetch belga coverage: {}".format(e)
-                            )
-                        else:
-                            newsml_item = {
-                                k: v for k, v in sd_item.items() if k in KEYS_TO_INHERIT
-                            }
-                            newsml_item.update(
-                                belga_cov_search_provider.format_list_item(data)
-                            )
-                            newsml_item["guid"] = (
-                                belga_cov_search_provider.GUID_PREFIX + gallery_id
-                            )
-                            newsml_item["_role"] = self.NEWSCOMPONENT2_ROLES.GALLERY
-                            newsml_items_chain.append(newsml_item)
+            for coverage_id in self._get_coverage_ids(context, sd_item):
+                if coverage_id not in coverages:
+                    continue
+                belga_cov_search_provider, data = coverages[coverage_id]
+                newsml_item = {k: v for k, v in sd_item.items() if k in KEYS_TO_INHERIT}
+                newsml_item.update(belga_cov_search_provider.format_list_item(data))
+                newsml_item["guid"] = (
+                    belga_cov_search_provider.GUID_PREFIX + coverage_id[1]
+                )
+                newsml_item["_role"] = self.NEWSCOMPONENT2_ROLES.GALLERY
+                newsml_items_chain.append(newsml_item)
             # attachments
-            attachments_ids = [i["attachment"] for i in sd_item.get("attachments", [])]
-            attachments = list(
-                self.attachments_service.find({"_id": {"$in": attachments_ids}})
-            )
-            for attachment in attachments:
+            for attachment in attachments_docs.get(attachments_ids[index]):
                 newsml_item = {k: v for k, v in sd_item.items() if k in KEYS_TO_INHERIT}
                 newsml_item.update(attachment)
                 newsml_item["_role"] = self.NEWSCOMPONENT2_ROLES.RELATED_DOCUMENT
@@ -1560,35 +2057,198 @@ class BelgaNewsML12Formatter(NewsML12Formatter):
                     and sd_item_associations[i].get("_type") == "externalsource"
                 )
             ]
-            # get all associated `text` items ids where `_type` is not `externalsource`.
-            rel_text_items_ids = [
-                sd_item_associations[i]["_id"]
-                for i in sd_item_associations
-                if (
-                    sd_item_associations[i]
-                    and sd_item_associations[i].get(ITEM_TYPE) == "text"
-                    and sd_item_associations[i].get("_type") != "externalsource"
-                )
-            ]
-            # fetch associated docs by _id
-            if rel_text_items_ids:
-                rel_text_items += list(
-                    self.archive_service.find({"_id": {"$in": rel_text_items_ids}})
-                )
+            # associated docs fetched by _id
+            rel_text_items += archive_docs.get(rel_text_items_ids[index])
             for rel_text_item in rel_text_items:
                 newsml_item = {k: v for k, v in sd_item.items() if k in KEYS_TO_INHERIT}
                 newsml_item.update(rel_text_item)
                 newsml_item["_role"] = self.NEWSCOMPONENT2_ROLES.RELATED_ARTICLE
                 newsml_items_chain.append(newsml_item)
 
-            # no need to store this data anymore
-            sd_item.pop("associations", None)
-            sd_item.pop("attachments", None)
-            sd_item.pop("fields_meta", None)
-
         return tuple(newsml_items_chain)
 
 
+class DocsByIds:
+    """
+    Docs of a service fetched by `_id` with one query.
+    Docs are returned in the order of the query result, same as if they were fetched separately.
+    Docs are not copied, formatter doesn't modify them.
+
+    :param service: resource service
+    :param ids: ids of docs
+    """
+
+    def __init__(self, service, ids):
+        self.docs = list(service.find({"_id": {"$in": list(set(ids))}})) if ids else []
+        self.queries = 1 if ids else 0
+
+    def get(self, ids):
+        """
+        Get docs with `_id` in `ids`.
+        :param ids: ids of docs
+        :rtype: list
+        """
+        ids = set(ids)
+        return [doc for doc in self.docs if doc["_id"] in ids]
+
+
+class NewsMLWriter:
+    """
+    Writes NewsML document into binary file-like object element by element.
+    Output is the same as pretty printed `etree.tostring` of the whole document.
+    """
+
+    INDENT = "  "
+
+    def __init__(self, output, encoding):
+        self.output = output
+        self.encoding = encoding
+
+    def start(self, element, level):
+        """Write start tag of `element` with its attributes."""
+        tag = etree.tostring(
+            etree.Element(element.tag, element.attrib), encoding=self.encoding
+        )
+        self.output.write(self._indent(level) + tag[: -len(b"/>")] + b">\n")
+
+    def end(self, element, level):
+        """Write end tag of `element`."""
+        self.output.write(
+            self._indent(level) + "</{}>\n".format(element.tag).encode(self.encoding)
+        )
+
+    def write(self, element, level):
+        """Write `element` with all its children."""
+        etree.indent(element, space=self.INDENT, level=level)
+        self.output.write(
+            self._indent(level)
+            + etree.tostring(element, encoding=self.encoding, with_tail=False)
+            + b"\n"
+        )
+
+    def _indent(self, level):
+        return (self.INDENT * level).encode(self.encoding)
+
+
+def _fetch_coverage(flask_app, provider, gallery_id):
+    with flask_app.app_context():
+        return provider.proxy("getGalleryById", {"i": gallery_id})
+
+
+def _fetch_media_length(flask_app, media_id):
+    with flask_app.app_context():
+        media = flask_app.media.get(media_id)
+    return media.length if media.length else media.metadata.get("length")
+
+
+def get_component_text(html):
+    """
+    Get text of Title, Lead or Body component.
+    Plain text (usually headline) is returned as is, it would be the same after parsing.
+    :param str html: html or plain text
+    :rtype: str
+    """
+    if PLAIN_TEXT_RE.fullmatch(html):
+        return html.strip()
+    text = text_utils.get_text(
+        text_cleaner.clean_html(html),
+        content="html",
+        space_on_elements=True,
+        space="   ",
+    )
+    return text.strip()
+
+
+def get_lead_and_body_text(html):
+    """
+    Get text of Lead and Body components of `body_html`.
+
+    First paragraph of the body is used as a lead, the rest is the body.
+    Text is taken from one parsed tree and it's the same as `get_component_text`
+    of the lead and of the pretty printed rest of the body.
+    Html which would be changed by parsing it again goes through `get_component_text`.
+
+    :param str html: body html
+    :return: tuple of lead and body text, ``None`` if the component is missing
+    """
+    if not html:
+        return None, None
+    unstable = UNSTABLE_HTML_RE.search(html)
+    tree = parse_html(html, content="html")
+    lead = tree[0] if len(tree) else None
+    if lead is None or lead.tag != "p":
+        if unstable or PLAIN_TEXT_RE.fullmatch(html):
+            return None, get_component_text(html)
+        # same parsing as in `text_cleaner.clean_html`
+        root = lxml_html.fromstring(html)
+        if not _is_stable_html(root):
+            return None, get_component_text(html)
+        return None, _get_cleaned_text(root)
+
+    if unstable or not _is_stable_html(tree):
+        lead_html = to_string(lead)
+        tree.remove(lead)
+        return (
+            get_component_text(lead_html),
+            get_component_text(to_string(tree, pretty_print=True)),
+        )
+    # lead is moved together with its tail
+    lead_root = etree.Element("div")
+    lead_root.append(lead)
+    _indent_like_pretty_print(tree)
+    return _get_cleaned_text(lead_root), _get_cleaned_text(tree)
+
+
+def _is_stable_html(root):
+    """Test if `root` would be parsed into the same paragraphs and headings again."""
+    for elem in root.iter(etree.Element):
+        if elem.tag in RAW_TEXT_TAGS:
+            return False
+        if elem.tag in TEXT_TAGS:
+            for child in elem.iterdescendants(etree.Element):
+                if child.tag not in PHRASING_TAGS:
+                    return False
+    return True
+
+
+def _indent_like_pretty_print(elem, level=0):
+    """Add whitespace to `elem` the same way as serializing it with `pretty_print`."""
+    if elem.text or not len(elem) or any(child.tail for child in elem):
+        return
+    indent = "\n" + "  " * (level + 1)
+    elem.text = indent
+    for child in elem:
+        if isinstance(child.tag, str):
+            _indent_like_pretty_print(child, level + 1)
+        child.tail = indent
+    elem[-1].tail = "\n" + "  " * level
+
+
+def _get_cleaned_text(elem):
+    """
+    Get text of `elem` the same way as `get_component_text`, `elem` is modified.
+
+    Removing tags keeps text in place, so only elements removed with content
+    by `text_cleaner` are removed before tags, which is enough for getting text.
+    """
+    root = etree.Element("div")
+    root.append(elem)
+    etree.strip_elements(root, *TEXT_CLEANER_KILL_TAGS, with_tail=False)
+    etree.strip_tags(root, *({el.tag for el in elem.iter()} - TEXT_TAGS))
+    for el in root.iterdescendants():
+        el.tail = (el.tail or "") + TEXT_SPACE
+    return etree.tostring(
+        root, encoding="unicode", method="text", with_tail=False
+    ).strip()
+
+
+def _db_ids(ids):
+    """Return `ids` with both string and `ObjectId` variants, so `$in` matches any of them."""
+    db_ids = list(ids)
+    db_ids += [ObjectId(_id) for _id in ids if ObjectId.is_valid(_id)]
+    return db_ids
+
+
 def get_distribution_value(qcode):
     if str(qcode).lower() == "bilingual":
         return "B"
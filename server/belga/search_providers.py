@@ -6,10 +6,10 @@ import hashlib
 import requests
 import superdesk
 import logging
-import itertools
 
 import re
 from pytz import utc
+from copy import deepcopy
 from datetime import datetime
 from urllib.parse import urljoin
 from typing import Any, Dict, Optional
@@ -20,14 +20,40 @@ from superdesk.utils import ListCursor
 from superdesk.metadata.item import MEDIA_TYPES
 from superdesk.timer import timer
 from superdesk.text_utils import get_text as _get_text
+from belga.cache import TTLCache
+from belga.subjects import unique_subjects
 from belga.io.feed_parsers.belga_newsml_mixin import BelgaNewsMLMixin
 from apps.search_providers.registry import registered_search_providers
 
 BELGA_TZ = "Europe/Brussels"
 TIMEOUT = (5, 30)
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 20
 
 logger = logging.getLogger(__name__)
 session = requests.Session()
+# keep connections to belga apis alive for concurrent requests from the same process
+for _prefix in ("https://", "http://"):
+    session.mount(
+        _prefix,
+        requests.adapters.HTTPAdapter(
+            pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE
+        ),
+    )
+
+# `idToken` and `authToken` of belga image providers keyed by provider id and config hash
+_credentials_cache = TTLCache(maxsize=64)
+# image and coverage providers instances keyed by provider id and config hash
+_providers_registry = TTLCache(maxsize=64)
+# `newsItemId` of belga 360 archive news objects keyed by api url and `newsObjectId`
+_archive_news_item_ids = TTLCache(maxsize=4096)
+# formatted belga 360 archive previews keyed by api url and `newsObjectId`
+_archive_previews_cache = TTLCache(maxsize=256)
+
+
+def get_config_hash(provider):
+    config = json.dumps(provider.get("config") or {}, sort_keys=True, default=str)
+    return hashlib.sha1(config.encode()).hexdigest()
 
 
 def get_text(value, strip_html=True):
@@ -99,6 +125,13 @@ class BelgaImageSearchProvider(superdesk.SearchProvider):
         ).hexdigest()
 
     def auth(self):
+        """Authorize user, tokens are reused by all instances of the same provider until they expire."""
+        cache_key = (str(self.provider.get("_id")), get_config_hash(self.provider))
+        credentials = _credentials_cache.get(cache_key)
+        if credentials:
+            self._id_token, self._auth_token = credentials
+            return
+
         url = "/authorizeUser?l={}".format(self.provider["config"]["username"])
         headers = self.auth_headers(url, self.provider["config"].get("password"))
         resp = session.get(self.url(url), headers=headers, timeout=TIMEOUT)
@@ -107,6 +140,20 @@ class BelgaImageSearchProvider(superdesk.SearchProvider):
             data = resp.json()
             self._id_token = data.get("idToken")
             self._auth_token = data.get("authToken")
+            _credentials_cache.set(
+                cache_key,
+                (self._id_token, self._auth_token),
+                ttl=app.config.get("BELGA_IMAGE_AUTH_TTL", 3600),
+            )
+
+    def reauth(self):
+        """Drop cached tokens and authorize again."""
+        _credentials_cache.pop(
+            (str(self.provider.get("_id")), get_config_hash(self.provider))
+        )
+        self._id_token = None
+        self._auth_token = None
+        self.auth()
 
     def url(self, resource):
         return urljoin(self.base_url, resource.lstrip("/"))
@@ -159,6 +206,12 @@ class BelgaImageSearchProvider(superdesk.SearchProvider):
         headers = self.auth_headers(url.replace("%2C", ","))  # decode spaces
         with timer(self.label):
             resp = session.get(self.url(url), headers=headers, timeout=TIMEOUT)
+        if resp.status_code == 401 and self._id_token:
+            # cached tokens expired
+            self.reauth()
+            headers = self.auth_headers(url.replace("%2C", ","))
+            with timer(self.label):
+                resp = session.get(self.url(url), headers=headers, timeout=TIMEOUT)
         resp.raise_for_status()
         return resp.json()
 
@@ -322,7 +375,7 @@ class Belga360ArchiveSearchProvider(superdesk.SearchProvider, BelgaNewsMLMixin):
         self.content_types = {
             c["_id"] for c in superdesk.get_resource_service("content_types").find({})
         }
-        self._countries = []
+        self._services_products = None
 
     def url(self, resource):
         return urljoin(self.base_url, resource.lstrip("/"))
@@ -393,6 +446,12 @@ class Belga360ArchiveSearchProvider(superdesk.SearchProvider, BelgaNewsMLMixin):
         api_params["searchText"] = self.get_search_text(query)
 
         data = self.api_get(self.search_endpoint, api_params)
+        # preview of found item can skip fetching of its news object
+        for item in data[self.items_field]:
+            if item.get("newsItemId"):
+                _archive_news_item_ids.set(
+                    (self.base_url, str(item["newsObjectId"])), item["newsItemId"]
+                )
         docs = [self.format_list_item(item) for item in data[self.items_field]]
 
         # SDBELGA-667
@@ -402,17 +461,43 @@ class Belga360ArchiveSearchProvider(superdesk.SearchProvider, BelgaNewsMLMixin):
         return BelgaListCursor(docs, data[self.count_field])
 
     def get_detailed_info(self, newsObjectId, query):
+        cache_key = (self.base_url, str(newsObjectId))
+        formatted_data = _archive_previews_cache.get(cache_key)
+        if formatted_data is None:
+            formatted_data = self.get_preview(newsObjectId)
+            if formatted_data:
+                _archive_previews_cache.set(
+                    cache_key,
+                    formatted_data,
+                    ttl=app.config.get("BELGA_360ARCHIVE_PREVIEW_TTL", 60),
+                )
+        # highlight must not change cached preview
+        formatted_data = deepcopy(formatted_data)
+
+        if searchText := self.get_search_text(query):
+            self.set_highlight(searchText, formatted_data)
+        return formatted_data
+
+    def get_preview(self, newsObjectId):
+        """
+        Fetch news item of the news object with all related items.
+        `newsItemId` is known already when the news object was found by `find`,
+        so only one request to the api is done in such case.
+        """
         formatted_data = []
-        resp = self.api_get(self.search_endpoint + "/" + newsObjectId, {})
-        if not resp.get("newsItemId"):
-            logger.warning(
-                "Unable to fetch detailed information for guid: {}".format(
-                    str(newsObjectId)
+        news_item_id = _archive_news_item_ids.get((self.base_url, str(newsObjectId)))
+        if news_item_id is None:
+            resp = self.api_get(self.search_endpoint + "/" + newsObjectId, {})
+            if not resp.get("newsItemId"):
+                logger.warning(
+                    "Unable to fetch detailed information for guid: {}".format(
+                        str(newsObjectId)
+                    )
                 )
-            )
-            return [self.format_list_item(resp)]
+                return [self.format_list_item(resp)]
+            news_item_id = resp["newsItemId"]
 
-        detailed_resp = self.api_get("archivenewsitems/" + str(resp["newsItemId"]), {})
+        detailed_resp = self.api_get("archivenewsitems/" + str(news_item_id), {})
         data = detailed_resp.get(self.items_field)
         if data:
             if str(data[0]["newsObjectId"]) == newsObjectId:
@@ -424,9 +509,6 @@ class Belga360ArchiveSearchProvider(superdesk.SearchProvider, BelgaNewsMLMixin):
                     for d in data[1:]
                     if str(d["newsObjectId"]) == newsObjectId
                 ]
-
-        if searchText := self.get_search_text(query):
-            self.set_highlight(searchText, formatted_data)
         return formatted_data
 
     def get_related_article(self, data):
@@ -618,18 +700,20 @@ class Belga360ArchiveSearchProvider(superdesk.SearchProvider, BelgaNewsMLMixin):
         if data.get("packages"):
             for package in data["packages"]:
                 key = package["newsService"] + "/" + package["newsProduct"]
-                serviceProduct = get_resource_service("vocabularies").get_items(
-                    _id="services-products", qcode=key
-                )
-                if serviceProduct:
-                    subjects += serviceProduct
+                subjects += self._get_services_products(key)
 
         # remove Duplicates
-        subjects = [
-            dict(i)
-            for i, _ in itertools.groupby(sorted(subjects, key=lambda k: k["qcode"]))
-        ]
-        return subjects
+        return unique_subjects(subjects)
+
+    def _get_services_products(self, qcode):
+        # all packages are fetched at once for all formatted items
+        if self._services_products is None:
+            self._services_products = {}
+            for item in get_resource_service("vocabularies").get_items(
+                _id="services-products"
+            ):
+                self._services_products.setdefault(item.get("qcode"), []).append(item)
+        return deepcopy(self._services_products.get(qcode, []))
 
 
 class BelgaPressSearchProvider(superdesk.SearchProvider):
@@ -819,9 +903,19 @@ def get_service_by_id(provider_id):
             req=None, search_provider="belga_coverage"
         )
     if provider:
-        return registered_search_providers[provider["search_provider"]]["class"](
-            provider
-        )
+        provider_class = registered_search_providers[provider["search_provider"]][
+            "class"
+        ]
+        if provider_class not in _image_coverage_providers:
+            return provider_class(provider)
+        # image and coverage providers have no state except of auth tokens,
+        # so the same instance is reused while provider config is not changed
+        registry_key = (str(provider["_id"]), get_config_hash(provider))
+        service = _providers_registry.get(registry_key)
+        if service is None:
+            service = provider_class(provider)
+            _providers_registry.set(registry_key, service)
+        return service
 
 
 _image_coverage_providers = [
@@ -4,6 +4,7 @@ from superdesk.signals import (
     item_move,
     item_rewrite,
     item_duplicate,
+    item_updated,
 )
 from planning.signals import assignment_content_create
 
@@ -12,6 +13,7 @@ from . import unmark_user_when_moved_to_incoming_stage
 from . import update
 from . import handle_translate
 from . import copy_related_article_from_assignment
+from . import formatted_cache
 
 
 def init_app(_app):
@@ -26,6 +28,8 @@ def init_app(_app):
     item_rewrite.connect(update.handle_coming_up_field)
     # remove all belga archive 360 associations from a translation item
     item_duplicate.connect(handle_translate.handle_duplicate)
+    # drop formatted Belga NewsML of updated item
+    item_updated.connect(formatted_cache.handle_updated)
 
     assignment_content_create.connect(
         copy_related_article_from_assignment.on_assignment_start_working
@@ -0,0 +1,6 @@
+from belga.publish.belga_newsml_1_2 import invalidate_formatted_cache
+
+
+def handle_updated(sender, item, original, **kwargs):
+    # formatted Belga NewsML of the item chain is outdated
+    invalidate_formatted_cache(original.get("guid") or item.get("guid"))
@@ -0,0 +1,65 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+
+def subject_key(subject):
+    return subject.get("scheme"), subject.get("qcode")
+
+
+class SubjectSet:
+    """Ordered set of subjects keyed on (scheme, qcode).
+
+    The first added subject wins and iteration follows insertion order.
+
+    :param subjects: initial subjects
+    :param key: function returning hashable key of a subject
+    """
+
+    def __init__(self, subjects=(), key=subject_key):
+        self._key = key
+        self._subjects = {}
+        self.update(subjects)
+
+    def add(self, subject):
+        self._subjects.setdefault(self._key(subject), subject)
+
+    def update(self, subjects):
+        for subject in subjects:
+            self.add(subject)
+
+    def discard_schemes(self, *schemes):
+        """Remove all subjects of given `schemes`."""
+        self._subjects = {
+            key: subject
+            for key, subject in self._subjects.items()
+            if subject.get("scheme") not in schemes
+        }
+
+    def replace(self, scheme, subjects):
+        """Replace all subjects of `scheme` by `subjects`."""
+        self.discard_schemes(scheme)
+        self.update(subjects)
+
+    def sorted(self, key=lambda subject: subject["qcode"]):
+        return sorted(self._subjects.values(), key=key)
+
+    def __contains__(self, subject):
+        return self._key(subject) in self._subjects
+
+    def __iter__(self):
+        return iter(self._subjects.values())
+
+    def __len__(self):
+        return len(self._subjects)
+
+
+def unique_subjects(subjects):
+    """Remove duplicated subjects, the rest is sorted by qcode."""
+    return SubjectSet(subjects).sorted()
@@ -334,6 +334,24 @@ WORKFLOW_ALLOW_DUPLICATE_NON_MEMBERS = True
 
 BELGA_IMAGE_APIKEY = env("BELGA_IMAGE_APIKEY")
 BELGA_IMAGE_LIMIT = env("BELGA_IMAGE_LIMIT", "")
+# seconds to reuse belga image api auth tokens
+BELGA_IMAGE_AUTH_TTL = int(env("BELGA_IMAGE_AUTH_TTL", 3600))
+
+# belga.coverage galleries fetching in Belga NewsML 1.2 formatter
+BELGA_COVERAGE_CACHE_TTL = int(env("BELGA_COVERAGE_CACHE_TTL", 60))
+BELGA_COVERAGE_WORKERS = int(env("BELGA_COVERAGE_WORKERS", 4))
+
+# seconds to reuse Belga NewsML 1.2 document formatted for other subscribers
+BELGA_NEWSML_CACHE_TTL = int(env("BELGA_NEWSML_CACHE_TTL", 60))
+
+# concurrent media storage requests for renditions sizes in Belga NewsML 1.2 formatter
+BELGA_MEDIA_WORKERS = int(env("BELGA_MEDIA_WORKERS", 4))
+
+# processes parsing files of "file-belga" and "ftp-belga" ingest providers
+BELGA_PARSE_WORKERS = int(env("BELGA_PARSE_WORKERS", 4))
+
+# seconds to keep belga 360 archive previews
+BELGA_360ARCHIVE_PREVIEW_TTL = int(env("BELGA_360ARCHIVE_PREVIEW_TTL", 60))
 
 DEFAULT_CREATE_PLANNING_SERIES_WITH_EVENT_SERIES = True
 SYNC_EVENT_FIELDS_TO_PLANNING = [
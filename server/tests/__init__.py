@@ -4,6 +4,7 @@ from superdesk.tests import TestCase as CoreTestCase
 from apps.prepopulate.app_populate import AppPopulateCommand
 
 import belga  # noqa
+from belga.publish.belga_newsml_1_2 import invalidate_formatted_cache
 
 
 class TestCase(CoreTestCase):
@@ -21,3 +22,5 @@ class TestCase(CoreTestCase):
 
         # belga related configs
         self.app.config["OUTPUT_BELGA_URN_SUFFIX"] = "tst"
+        # tests are reusing same guids and versions for different items
+        invalidate_formatted_cache()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Throughput benchmarks of the publish and ingest paths.
+
+Benchmarks are not collected by the test runner, use::
+
+    $ python -m tests.benchmarks --help
+
+Services are replaced by the in memory ones from :mod:`tests.benchmarks.services`,
+so numbers reflect formatter/parser code and not the database.
+"""
+
+import gc
+import time
+import resource
+
+from typing import NamedTuple, List
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    items: int
+    total: float
+    p50: float
+    p99: float
+    peak_rss: int
+
+    @property
+    def items_per_second(self):
+        return self.items / self.total if self.total else 0.0
+
+
+def peak_rss():
+    """Peak resident set size of the current process in KiB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def percentile(timings, percent):
+    """Nearest-rank percentile of sorted `timings`."""
+    if not timings:
+        return 0.0
+    rank = max(int(round(percent / 100.0 * len(timings))) - 1, 0)
+    return timings[min(rank, len(timings) - 1)]
+
+
+def measure(name, func, payloads):
+    """Call `func` once for every payload and collect latency stats.
+
+    :param str name: benchmark name used in report
+    :param func: callable taking single payload and returning number of produced items
+    :param payloads: iterable of payloads
+    :rtype: BenchmarkResult
+    """
+    timings: List[float] = []
+    items = 0
+    gc.collect()
+    for payload in payloads:
+        start = time.perf_counter()
+        items += func(payload)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return BenchmarkResult(
+        name=name,
+        items=items,
+        total=sum(timings),
+        p50=percentile(timings, 50),
+        p99=percentile(timings, 99),
+        peak_rss=peak_rss(),
+    )
+
+
+def report(results, output):
+    """Write `results` as plain text table into `output`."""
+    header = "{:<48} {:>8} {:>12} {:>10} {:>10} {:>12}\n"
+    row = "{:<48} {:>8} {:>12.1f} {:>10.2f} {:>10.2f} {:>12}\n"
+    output.write(
+        header.format(
+            "benchmark", "items", "items/s", "p50 ms", "p99 ms", "peak RSS KiB"
+        )
+    )
+    for result in results:
+        output.write(
+            row.format(
+                result.name,
+                result.items,
+                result.items_per_second,
+                result.p50 * 1000,
+                result.p99 * 1000,
+                result.peak_rss,
+            )
+        )
@@ -0,0 +1,78 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+"""Run benchmarks and print report.
+
+Example::
+
+    $ python -m tests.benchmarks --benchmark formatter --iterations 100 --replicas 500
+    $ python -m tests.benchmarks --benchmark parse_files --replicas 100 --workers 1 4
+"""
+
+import sys
+import argparse
+import logging
+
+from . import report
+
+BENCHMARKS = ("formatter", "parsers", "parse_files")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m tests.benchmarks")
+    parser.add_argument(
+        "--benchmark",
+        action="append",
+        choices=BENCHMARKS,
+        help="benchmark to run, all by default",
+    )
+    parser.add_argument(
+        "--iterations",
+        type=int,
+        default=50,
+        help="format calls per items chain size",
+    )
+    parser.add_argument(
+        "--replicas",
+        type=int,
+        default=200,
+        help="parse calls per fixture",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        nargs="+",
+        default=[1, 2, 4],
+        help="numbers of parse workers compared by parse_files benchmark",
+    )
+    args = parser.parse_args(argv)
+    benchmarks = args.benchmark or BENCHMARKS
+
+    # parsers and formatter are logging warnings for fixtures data
+    logging.disable(logging.WARNING)
+
+    results = []
+    if "formatter" in benchmarks:
+        from . import formatter
+
+        results += formatter.run(iterations=args.iterations)
+    if "parsers" in benchmarks:
+        from . import parsers
+
+        results += parsers.run(replicas=args.replicas)
+    if "parse_files" in benchmarks:
+        from . import parse_files
+
+        results += parse_files.run(replicas=args.replicas, workers=args.workers)
+    report(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
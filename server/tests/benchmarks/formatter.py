@@ -0,0 +1,226 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import datetime
+
+from unittest import mock
+from typing import NamedTuple
+
+import pytz
+from bson import ObjectId
+
+from belga.publish.belga_newsml_1_2 import (
+    BelgaNewsML12Formatter,
+    invalidate_formatted_cache,
+)
+from . import measure
+from .services import (
+    InMemoryService,
+    InMemoryArchiveService,
+    InMemoryVocabulariesService,
+    create_app,
+    services_context,
+)
+
+LANGUAGES = ("fr", "nl", "en", "de", "es", "it", "ru", "ar")
+
+USER_ID = ObjectId("5d385f31fe985ec67a0ca583")
+ROLE_ID = ObjectId("5d542206c04280bc6d6157f9")
+
+BODY_HTML = (
+    "<p>Curabitur non nulla sit amet nisl <b>tempus</b> convallis quis ac lectus. Donec sollicitudin "
+    "<b>molestie</b> malesuada.</p>\n<h2>books</h2>\n<p>Praesent sapien massa, convallis a "
+    "pellentesque nec, egestas non nisi. Vestibulum ante ipsum primis in faucibus orci luctus et "
+    "ultrices posuere cubilia Curae.</p>"
+) * 4
+
+
+class ChainSize(NamedTuple):
+    translations: int
+    pictures: int
+    attachments: int
+    urls: int
+
+    def __str__(self):
+        return "{}t x {}p x {}a x {}u".format(*self)
+
+
+CHAIN_SIZES = (
+    ChainSize(1, 0, 0, 0),
+    ChainSize(1, 2, 1, 1),
+    ChainSize(2, 5, 2, 2),
+    ChainSize(4, 10, 5, 5),
+    ChainSize(8, 20, 10, 10),
+)
+
+
+def get_picture(index):
+    media = "pic_{}".format(index)
+    rendition = {
+        "href": "http://localhost:5000/api/upload-raw/{}.jpg".format(media),
+        "media": media,
+        "mimetype": "image/jpeg",
+        "width": 3000,
+        "height": 2000,
+    }
+    return {
+        "_id": "urn:newsml:localhost:5000:picture:{}".format(index),
+        "guid": "tag:localhost:5000:2019:picture:{}".format(index),
+        "type": "picture",
+        "media": media,
+        "pubstatus": "usable",
+        "headline": "Picture {}".format(index),
+        "description_text": "Description of picture {}".format(index),
+        "byline": "BELGA",
+        "copyrightholder": "Belga",
+        "original_creator": str(USER_ID),
+        "firstcreated": "2019-08-19T13:15:01+0000",
+        "versioncreated": "2019-08-19T13:15:01+0000",
+        "extra": {"belga-keywords": "one, two, three", "city": "Brussels"},
+        "renditions": {
+            name: dict(rendition)
+            for name in ("original", "baseImage", "thumbnail", "viewImage")
+        },
+    }
+
+
+def get_attachment(index):
+    return {
+        "_id": ObjectId(),
+        "media": "pdf_{}".format(index),
+        "title": "Attachment {}".format(index),
+        "description": "Description of attachment {}".format(index),
+        "user": USER_ID,
+        "filename": "attachment_{}.pdf".format(index),
+        "mimetype": "application/pdf",
+        "length": 40248,
+        "_created": datetime.datetime(2019, 4, 3, 12, 41, 53, tzinfo=pytz.UTC),
+    }
+
+
+def get_items_chain(size, attachments):
+    """Build published original item and its translations."""
+    now = datetime.datetime(2019, 4, 3, 12, 45, 14, tzinfo=pytz.UTC)
+    original_guid = "urn:newsml:localhost:5000:2019-04-03T15:41:53:benchmark"
+    items_chain = []
+    for index in range(size.translations):
+        language = LANGUAGES[index % len(LANGUAGES)]
+        guid = original_guid if not index else "{}:{}".format(original_guid, language)
+        items_chain.append(
+            {
+                "_id": guid,
+                "guid": guid,
+                "family_id": original_guid,
+                "translated_from": original_guid if index else None,
+                "type": "text",
+                "state": "published",
+                "profile": "belga_text",
+                "pubstatus": "usable",
+                "language": language,
+                "headline": "Headline {}".format(language),
+                "slugline": "Slugline",
+                "abstract": "<p>Abstract of the story</p>",
+                "body_html": BODY_HTML,
+                "word_count": 120,
+                "priority": 3,
+                "urgency": 3,
+                "byline": "BELGA",
+                "sign_off": "ADM",
+                "version_creator": str(USER_ID),
+                "original_creator": str(USER_ID),
+                "firstcreated": now,
+                "versioncreated": now,
+                "firstpublished": now,
+                "_current_version": 2,
+                "authors": [
+                    {
+                        "_id": [str(USER_ID), "AUTHOR"],
+                        "role": "AUTHOR",
+                        "name": "AUTHOR",
+                        "parent": str(USER_ID),
+                        "sub_label": "John Smith",
+                    }
+                ],
+                "subject": [
+                    {
+                        "name": "BELGIUM",
+                        "qcode": "bel",
+                        "translations": {"name": {"nl": "België", "fr": "Belgique"}},
+                        "scheme": "countries",
+                    },
+                ],
+                "extra": {
+                    "city": "Brussels",
+                    "belga-url": [
+                        {
+                            "url": "https://example.com/{}".format(url),
+                            "description": "Example {}".format(url),
+                            "guid": "{}-url-{}".format(guid, url),
+                        }
+                        for url in range(size.urls)
+                    ],
+                },
+                "associations": {
+                    "belga_related_images--{}".format(picture): get_picture(picture)
+                    for picture in range(size.pictures)
+                },
+                "attachments": [
+                    {"attachment": attachment["_id"]} for attachment in attachments
+                ],
+            }
+        )
+    return items_chain
+
+
+def run(iterations=50, sizes=CHAIN_SIZES):
+    """Benchmark `BelgaNewsML12Formatter.format` over synthetic items chains of growing size.
+
+    :param int iterations: number of format calls per chain size
+    :param sizes: chain sizes
+    :rtype: list
+    """
+    app = create_app()
+    subscriber = {"_id": "benchmark", "name": "Benchmark Subscriber"}
+    results = []
+    for size in sizes:
+        attachments = [get_attachment(index) for index in range(size.attachments)]
+        items_chain = get_items_chain(size, attachments)
+        article = items_chain[-1]
+        services = {
+            "archive": InMemoryArchiveService(items_chain=items_chain),
+            "attachments": InMemoryService(attachments),
+            "content_types": InMemoryService(),
+            "users": InMemoryService(
+                [{"_id": USER_ID, "username": "adm", "role": ROLE_ID}]
+            ),
+            "roles": InMemoryService([{"_id": ROLE_ID, "author_role": "AUTHOR"}]),
+            "vocabularies": InMemoryVocabulariesService(),
+        }
+
+        def format_article(article):
+            # measure rendering, not the cache of formatted documents
+            invalidate_formatted_cache()
+            BelgaNewsML12Formatter().format(article, subscriber)
+            return 1
+
+        with services_context(app, **services), mock.patch(
+            "belga.publish.belga_newsml_1_2.generate_sequence_number",
+            lambda subscriber: 1,
+        ):
+            # warm up
+            format_article(article)
+            results.append(
+                measure(
+                    "formatter: {}".format(size),
+                    format_article,
+                    (article for _ in range(iterations)),
+                )
+            )
+    return results
@@ -0,0 +1,94 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import os
+import shutil
+import tempfile
+
+from belga.io.feeding_services import file_belga
+from belga.io.feeding_services.file_belga import parse_files
+from . import measure
+from .parsers import FIXTURES_PATH, PARSERS
+from .services import (
+    InMemoryService,
+    InMemoryVocabulariesService,
+    create_app,
+    load_vocabularies,
+    services_context,
+)
+
+WORKERS = (1, 2, 4)
+
+
+def replicate_fixture(filename, replicas, dest):
+    """Copy fixture `filename` `replicas` times into `dest` folder, return paths of copies."""
+    name, ext = os.path.splitext(filename)
+    paths = []
+    for i in range(replicas):
+        path = os.path.join(dest, "{}-{}{}".format(name, i, ext))
+        shutil.copyfile(os.path.join(FIXTURES_PATH, filename), path)
+        paths.append(path)
+    return paths
+
+
+def get_parse_files_func(parser, paths, workers):
+    provider = {"name": "benchmark"}
+
+    def parse(_):
+        items = 0
+        for parsed, error in parse_files(parser, paths, provider, workers=workers):
+            if error is not None:
+                raise error
+            items += len(parsed)
+        return items
+
+    return parse
+
+
+def run(replicas=200, workers=WORKERS, rounds=3, parsers=PARSERS):
+    """Benchmark `parse_files` over the fixture files replicated `replicas` times.
+
+    Every round parses all copies of a fixture, so p50/p99 are per batch.
+
+    :param int replicas: number of files per fixture
+    :param workers: numbers of parse workers to compare
+    :param int rounds: number of batches per fixture and number of workers
+    :param parsers: list of (parser class, fixture filename, is xml) tuples
+    :rtype: list
+    """
+    app = create_app()
+    services = {
+        "vocabularies": InMemoryVocabulariesService(load_vocabularies()),
+        "users": InMemoryService(),
+        "attachments": InMemoryService(),
+    }
+    dest = tempfile.mkdtemp(prefix="belga_benchmark_")
+    results = []
+    try:
+        with services_context(app, **services):
+            for parser_class, filename, _ in parsers:
+                paths = replicate_fixture(filename, replicas, dest)
+                for count in workers:
+                    parse = get_parse_files_func(parser_class(), paths, count)
+                    # warm up, workers are forked on first use
+                    parse(None)
+                    results.append(
+                        measure(
+                            "parse_files: {} ({}, {} workers)".format(
+                                parser_class.__name__, filename, count
+                            ),
+                            parse,
+                            range(rounds),
+                        )
+                    )
+    finally:
+        file_belga.shutdown_executor()
+        shutil.rmtree(dest, ignore_errors=True)
+    return results
@@ -0,0 +1,117 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import os
+
+from lxml import etree
+
+from belga.io.feed_parsers.belga_newsml_1_2 import BelgaNewsMLOneFeedParser
+from belga.io.feed_parsers.belga_dpa_newsml_2_0 import BelgaDPANewsMLTwoFeedParser
+from belga.io.feed_parsers.belga_ansa import BelgaANSAFeedParser, remove_comments
+from belga.io.feed_parsers.belga_anpa import BelgaANPAFeedParser
+from belga.io.feed_parsers.belga_iptc7901 import BelgaIPTC7901FeedParser
+from . import measure
+from .services import (
+    InMemoryService,
+    InMemoryVocabulariesService,
+    create_app,
+    load_vocabularies,
+    services_context,
+)
+
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "..", "io", "fixtures")
+
+# (parser class, fixture filename, fixture is parsed as xml)
+PARSERS = (
+    (BelgaNewsMLOneFeedParser, "belga_newsml_1_2.xml", True),
+    (BelgaDPANewsMLTwoFeedParser, "dpa_newsml_2_0_belga.xml", True),
+    (BelgaANSAFeedParser, "ansa_belga.xml", True),
+    (BelgaANPAFeedParser, "kyodo.txt", False),
+    (BelgaIPTC7901FeedParser, "dpa.txt", False),
+)
+
+
+def get_parse_func(parser_class, path, is_xml):
+    provider = {"name": "benchmark"}
+
+    if is_xml:
+        with open(path, "rb") as f:
+            content = f.read()
+
+        def parse(_):
+            # ingest parses raw xml too, so it's part of the measurement
+            items = parser_class().parse(etree.fromstring(content), provider)
+            return len(items) if isinstance(items, list) else 1
+
+    else:
+
+        def parse(_):
+            items = parser_class().parse(path, provider)
+            return len(items) if isinstance(items, list) else 1
+
+    return parse
+
+
+def get_remove_comments_funcs(path):
+    """Comment removal of ANSA parser compared with serializing and parsing again."""
+    with open(path, "rb") as f:
+        content = f.read()
+
+    def reparse(_):
+        xml = etree.fromstring(content)
+        etree.fromstring(
+            etree.tostring(xml, encoding="unicode"),
+            parser=etree.XMLParser(remove_comments=True),
+        )
+        return 1
+
+    def in_place(_):
+        remove_comments(etree.fromstring(content))
+        return 1
+
+    return (("reparse", reparse), ("in place", in_place))
+
+
+def run(replicas=200, parsers=PARSERS):
+    """Benchmark feed parsers over the fixture files replicated `replicas` times.
+
+    :param int replicas: number of parse calls per fixture
+    :param parsers: list of (parser class, fixture filename, is xml) tuples
+    :rtype: list
+    """
+    app = create_app()
+    services = {
+        "vocabularies": InMemoryVocabulariesService(load_vocabularies()),
+        "users": InMemoryService(),
+        "attachments": InMemoryService(),
+    }
+    results = []
+    with services_context(app, **services):
+        for parser_class, filename, is_xml in parsers:
+            parse = get_parse_func(
+                parser_class, os.path.join(FIXTURES_PATH, filename), is_xml
+            )
+            # warm up
+            parse(None)
+            results.append(
+                measure(
+                    "parser: {} ({})".format(parser_class.__name__, filename),
+                    parse,
+                    range(replicas),
+                )
+            )
+    for name, remove in get_remove_comments_funcs(
+        os.path.join(FIXTURES_PATH, "ansa_belga.xml")
+    ):
+        remove(None)
+        results.append(
+            measure("ansa comments: {}".format(name), remove, range(replicas))
+        )
+    return results
@@ -0,0 +1,146 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import os
+import json
+
+from copy import deepcopy
+from contextlib import contextmanager
+from typing import NamedTuple
+from unittest import mock
+
+import flask
+
+from bson import ObjectId
+
+VOCABULARIES_PATH = os.path.join(
+    os.path.dirname(__file__), "..", "..", "data", "vocabularies.json"
+)
+
+
+class Resource:
+    def __init__(self, service):
+        self.service = service
+
+
+class InMemoryService:
+    """Minimal service backed by list of docs.
+
+    Only lookups used by belga formatters and parsers are supported:
+    equality and `$in` of top level fields.
+    Docs are copied on read, same as they are decoded from db on every query.
+    """
+
+    def __init__(self, docs=()):
+        self.docs = [deepcopy(doc) for doc in docs]
+
+    def _match(self, doc, lookup):
+        for key, value in lookup.items():
+            if isinstance(value, dict) and "$in" in value:
+                if doc.get(key) not in value["$in"]:
+                    return False
+            elif doc.get(key) != value:
+                return False
+        return True
+
+    def find(self, where, **kwargs):
+        return [deepcopy(doc) for doc in self.docs if self._match(doc, where)]
+
+    def find_one(self, req, **lookup):
+        for doc in self.docs:
+            if self._match(doc, lookup):
+                return deepcopy(doc)
+
+    def post(self, docs, **kwargs):
+        ids = []
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs.append(deepcopy(doc))
+            ids.append(doc["_id"])
+        return ids
+
+
+class InMemoryArchiveService(InMemoryService):
+    def __init__(self, docs=(), items_chain=()):
+        super().__init__(docs)
+        self.items_chain = [deepcopy(item) for item in items_chain]
+
+    def get_items_chain(self, item):
+        return deepcopy(self.items_chain)
+
+
+class InMemoryVocabulariesService(InMemoryService):
+    def get_items(self, _id, qcode=None, is_active=True, name=None, lang=None):
+        vocabulary = self.find_one(req=None, _id=_id)
+        if not vocabulary:
+            return []
+        items = vocabulary.get("items", [])
+        if is_active is not None:
+            items = [i for i in items if i.get("is_active", True) == is_active]
+        if qcode:
+            items = [i for i in items if i.get("qcode") == qcode]
+        if name:
+            items = [i for i in items if (i.get("name") or "").lower() == name.lower()]
+        for item in items:
+            item["scheme"] = _id
+        return items
+
+
+class MediaFile(NamedTuple):
+    length: int
+    metadata: dict
+
+
+class InMemoryMedia:
+    """Media storage keeping only size and metadata of stored files."""
+
+    def __init__(self):
+        self.files = {}
+
+    def put(self, content, filename=None, content_type=None, metadata=None, **kwargs):
+        media_id = str(ObjectId())
+        data = content.read() if hasattr(content, "read") else content
+        self.files[media_id] = MediaFile(len(data), metadata or {})
+        return media_id
+
+    def get(self, media_id, resource=None):
+        return self.files.get(media_id) or MediaFile(0, {"length": 0})
+
+    def delete(self, media_id, resource=None):
+        self.files.pop(media_id, None)
+
+    def url_for_media(self, media_id, content_type=None):
+        return "http://localhost/media/{}".format(media_id)
+
+
+def load_vocabularies():
+    with open(VOCABULARIES_PATH) as f:
+        vocabularies = json.load(f)
+    # docs coming from db always have an etag
+    for vocabulary in vocabularies:
+        vocabulary.setdefault("_etag", "benchmark")
+    return vocabularies
+
+
+def create_app():
+    app = flask.Flask(__name__)
+    app.config.from_object("superdesk.default_settings")
+    app.config.from_object("settings")
+    app.config["OUTPUT_BELGA_URN_SUFFIX"] = "bench"
+    app.media = InMemoryMedia()
+    return app
+
+
+@contextmanager
+def services_context(app, **services):
+    """Push app context with `services` available via `get_resource_service`."""
+    resources = {name: Resource(service) for name, service in services.items()}
+    with app.app_context(), mock.patch.dict("superdesk.resources", resources):
+        yield
@@ -0,0 +1,36 @@
+import unittest
+from unittest import mock
+
+from belga.cache import TTLCache
+
+
+class TTLCacheTestCase(unittest.TestCase):
+    def test_get_set(self):
+        cache = TTLCache()
+        cache.set("foo", 1)
+        self.assertEqual(cache.get("foo"), 1)
+        self.assertIn("foo", cache)
+        self.assertIsNone(cache.get("bar"))
+        self.assertEqual(cache.pop("foo"), 1)
+        self.assertNotIn("foo", cache)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(len(cache), 2)
+
+    @mock.patch("belga.cache.time.monotonic")
+    def test_expiration(self, monotonic):
+        monotonic.return_value = 100
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=30)
+        monotonic.return_value = 120
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("b"), 2)
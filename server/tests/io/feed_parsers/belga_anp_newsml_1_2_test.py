@@ -24,6 +24,7 @@ class BelgaANPNewsMLOneTestCase(TestCase):
         dirname = os.path.dirname(os.path.realpath(__file__))
         fixture = os.path.normpath(os.path.join(dirname, "../fixtures", self.filename))
         provider = {"name": "test"}
+        self.fixture = fixture
         with open(fixture, "rb") as f:
             parser = BelgaANPNewsMLOneFeedParser()
             self.xml_root = etree.parse(f).getroot()
@@ -32,6 +33,10 @@ class BelgaANPNewsMLOneTestCase(TestCase):
     def test_can_parse(self):
         self.assertTrue(BelgaANPNewsMLOneFeedParser().can_parse(self.xml_root))
 
+    def test_iterparse(self):
+        items = BelgaANPNewsMLOneFeedParser().iterparse(self.fixture, {"name": "test"})
+        self.assertEqual(list(items), self.item)
+
     def test_content(self):
         item = self.item[0]
         self.assertEqual(item["ingest_provider_sequence"], "20181210123731041")
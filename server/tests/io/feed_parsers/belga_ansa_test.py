@@ -1,4 +1,4 @@
-from belga.io.feed_parsers.belga_ansa import BelgaANSAFeedParser
+from belga.io.feed_parsers.belga_ansa import BelgaANSAFeedParser, remove_comments
 import os
 from lxml import etree
 from tests import TestCase
@@ -92,3 +92,8 @@ class BelgaANSATestCase(TestCase):
             "\n                </p>"
         )
         self.assertEqual(item["body_html"], expected_body)
+
+    def test_remove_comments(self):
+        xml = etree.fromstring("<p>a<!-- x -->b<b/>c<!-- y -->d<!-- z --><i/></p>")
+        remove_comments(xml)
+        self.assertEqual(etree.tostring(xml), b"<p>ab<b/>cd<i/></p>")
@@ -171,3 +171,16 @@ class BelgaDPANewsMLTwoTestCase(TestCase):
         self._initialize_parser(filename)
         item = self.item[0]
         self.assertEqual(item["ednote"], "updated with a photo")
+
+    def test_items_of_item_set_are_parsed_separately(self):
+        parser = BelgaDPANewsMLTwoFeedParser()
+        items, xml_root = self.item, self.xml_root
+        self._initialize_parser("dpa_newsml_2_0_1_belga.xml")
+        items = items + self.item
+        item_set = xml_root.find(parser.qname("itemSet"))
+        item_set.extend(self.xml_root.find(parser.qname("itemSet")))
+        parsed = parser.parse(xml_root, {"name": "test"})
+        self.assertEqual(
+            [(item["headline"], item["body_html"]) for item in parsed],
+            [(item["headline"], item["body_html"]) for item in items],
+        )
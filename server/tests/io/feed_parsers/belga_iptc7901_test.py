@@ -145,6 +145,6 @@ class ATSBelgaFeedParserTestCase(BaseBelgaIPTC7901FeedParserTestCase):
             "<p>préparées» par le gouvernement ayant conduit, selon elle, à la  </p>"
             "<p>crise des «gilets jaunes» en raison de leur impact sur le pouvoir  </p>"
             "<p>d'achat.  </p><p>  </p><p>(SDA\\/sj)  </p><p>  </p>"
-            "<p>\x03091223 dec 18 </p><p> </p><p> </p><p>\x04 </p>"
+            "<p> 091223 dec 18 </p><p> </p><p> </p><p>  </p>"
         )
         self.assertEqual(item["body_html"], expected_body)
@@ -13,11 +13,15 @@ import os
 import pytz
 import datetime
 from io import BytesIO
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 from lxml import etree
 
 from superdesk import get_resource_service
-from belga.io.feed_parsers.belga_newsml_1_2 import BelgaNewsMLOneFeedParser
+from belga.io.feed_parsers.belga_newsml_1_2 import (
+    PENDING_FILES,
+    BelgaNewsMLOneFeedParser,
+)
+from belga.io.feed_parsers.context import defer_storage
 from tests import TestCase
 
 
@@ -36,6 +40,7 @@ class BelgaNewsMLOneTestCase(TestCase):
         dirname = os.path.dirname(os.path.realpath(__file__))
         fixture = os.path.normpath(os.path.join(dirname, "../fixtures", self.filename))
         provider = {"name": "test"}
+        self.fixture = fixture
         with open(fixture, "rb") as f:
             parser = BelgaNewsMLOneFeedParser()
             self.xml_root = etree.parse(f).getroot()
@@ -44,6 +49,10 @@ class BelgaNewsMLOneTestCase(TestCase):
     def test_can_parse(self):
         self.assertTrue(BelgaNewsMLOneFeedParser().can_parse(self.xml_root))
 
+    def test_iterparse(self):
+        items = BelgaNewsMLOneFeedParser().iterparse(self.fixture, {"name": "test"})
+        self.assertEqual(list(items), self.item)
+
     def test_content(self):
         item = self.item[0]
         self.assertEqual(item["administrative"]["foreign_id"], "BIN118")
@@ -177,20 +186,25 @@ class BelgaRemoteNewsMLOneTestCase(TestCase):
         self.users = [{"username": "COR360", "display_name": "John Doe"}]
         get_resource_service("users").create(self.users)
         dirname = os.path.dirname(os.path.realpath(__file__))
-        fixture = os.path.normpath(os.path.join(dirname, "../fixtures", self.filename))
-        media_fixture = os.path.normpath(
+        self.fixture = os.path.normpath(
+            os.path.join(dirname, "../fixtures", self.filename)
+        )
+        self.media_fixture = os.path.normpath(
             os.path.join(dirname, "../fixtures", self.media_file)
         )
-        provider = {
+        self.provider = {
             "name": "test",
             "config": {"path": os.path.join(dirname, "../fixtures")},
         }
+        self.xml_root, self.item = self.parse()
+
+    def parse(self):
         parser = BelgaNewsMLOneFeedParser()
-        with open(media_fixture, "rb") as f:
+        with open(self.media_fixture, "rb") as f:
             parser._get_file = MagicMock(return_value=BytesIO(f.read()))
-        with open(fixture, "rb") as f:
-            self.xml_root = etree.parse(f).getroot()
-            self.item = parser.parse(self.xml_root, provider)
+        with open(self.fixture, "rb") as f:
+            xml_root = etree.parse(f).getroot()
+            return xml_root, parser.parse(xml_root, self.provider)
 
     def test_can_parse(self):
         self.assertTrue(BelgaNewsMLOneFeedParser().can_parse(self.xml_root))
@@ -315,6 +329,36 @@ class BelgaRemoteNewsMLOneTestCase(TestCase):
         self.assertEqual(data["mimetype"], "image/jpeg")
         self.assertEqual(data["length"], 4680)
 
+    def test_ingested_attachment_is_not_uploaded(self):
+        with patch.object(self.app.media, "put") as put:
+            _, items = self.parse()
+        put.assert_not_called()
+        self.assertEqual(items[0]["attachments"], self.item[0]["attachments"])
+
+    def test_attachments_are_stored_by_caller(self):
+        parser = BelgaNewsMLOneFeedParser()
+        with open(self.media_fixture, "rb") as f:
+            parser._get_file = MagicMock(return_value=BytesIO(f.read()))
+        with open(self.fixture, "rb") as f, defer_storage():
+            items = parser.parse(etree.parse(f).getroot(), self.provider)
+        parser._get_file.assert_not_called()
+        self.assertNotIn("attachments", items[0])
+        self.assertEqual(
+            items[0][PENDING_FILES],
+            [{"filename": self.media_file, "format": "Jpeg", "rendition": None}],
+        )
+
+        ingested = {}
+        with patch.object(self.app.media, "put") as put:
+            parser.store_files(items, self.provider, ingested)
+        put.assert_not_called()
+        self.assertNotIn(PENDING_FILES, items[0])
+        self.assertEqual(items[0]["attachments"], self.item[0]["attachments"])
+        self.assertEqual(items[0]["ednote"], self.item[0]["ednote"])
+        self.assertEqual(
+            list(ingested.values()), [items[0]["attachments"][0]["attachment"]]
+        )
+
 
 class BelgaNewsMLOneVideoIngestTestCase(TestCase):
     filename = "belga_newsml_1_2_video.xml"
@@ -0,0 +1,52 @@
+import unittest
+
+from belga.io.feed_parsers.belga_newsml_mixin import (
+    VocabularyIndex,
+    _compile_vocabulary_index,
+)
+
+
+class VocabularyIndexTestCase(unittest.TestCase):
+    vocabulary = {
+        "_id": "countries",
+        "_etag": "1",
+        "items": [
+            {
+                "name": "Belgium",
+                "qcode": "bel",
+                "translations": {"name": {"nl": "België", "fr": "Belgique"}},
+            },
+            {
+                "name": "France",
+                "qcode": "fra",
+                "translations": {"name": {"nl": "Frankrijk", "fr": "France"}},
+            },
+            {
+                "name": "fra",
+                "qcode": "fra-duplicate",
+                "translations": {"name": {}},
+            },
+        ],
+    }
+
+    def test_find(self):
+        index = VocabularyIndex(self.vocabulary)
+        self.assertEqual(index.find("bel", "Bel")["name"], "Belgium")
+        self.assertEqual(index.find("belgium", "Belgique")["name"], "Belgium")
+        self.assertEqual(index.find("Belgium", "Belgium")["name"], "Belgium")
+        self.assertIsNone(index.find("deu", "Deu"))
+
+    def test_find_keeps_first_match(self):
+        index = VocabularyIndex(self.vocabulary)
+        # matched by qcode of 2nd item and by name of 3rd one
+        self.assertEqual(index.find("fra", "Fra")["qcode"], "fra")
+
+    def test_index_is_rebuilt_on_etag_change(self):
+        index = _compile_vocabulary_index("test-countries", self.vocabulary)
+        self.assertIs(
+            index, _compile_vocabulary_index("test-countries", dict(self.vocabulary))
+        )
+        updated = dict(self.vocabulary, _etag="2", items=[])
+        updated_index = _compile_vocabulary_index("test-countries", updated)
+        self.assertIsNot(index, updated_index)
+        self.assertIsNone(updated_index.find("bel", "Belgique"))
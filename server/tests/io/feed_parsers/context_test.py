@@ -0,0 +1,159 @@
+import unittest
+import threading
+from unittest import mock
+
+from belga.io.feed_parsers.belga_dpa_newsml_2_0 import BelgaDPANewsMLTwoFeedParser
+from belga.io.feed_parsers.belga_iptc7901 import BelgaIPTC7901FeedParser
+from belga.io.feed_parsers.belga_newsml_1_2 import BelgaNewsMLOneFeedParser
+from belga.io.feed_parsers.context import (
+    ParseContext,
+    ParseContextMixin,
+    PrefetchedData,
+    use_prefetched,
+)
+
+
+class ParseContextTestCase(unittest.TestCase):
+    cv = {
+        "_id": "iptc_subject_codes",
+        "items": [
+            {"qcode": "01000000", "name": "arts", "is_active": True},
+            {"qcode": "02000000", "name": "crime", "is_active": False},
+            {"qcode": "01000000", "name": "arts duplicate", "is_active": True},
+        ],
+    }
+
+    @mock.patch("belga.io.feed_parsers.context.get_resource_service")
+    def test_cv_is_fetched_once(self, get_resource_service):
+        get_resource_service.return_value.find_one.return_value = self.cv
+        context = ParseContext()
+        self.assertEqual(context.get_cv("iptc_subject_codes"), self.cv)
+        subject_map = context.get_subject_map("iptc_subject_codes")
+        self.assertEqual(list(subject_map), ["01000000"])
+        self.assertEqual(subject_map["01000000"]["name"], "arts")
+        self.assertIs(subject_map, context.get_subject_map("iptc_subject_codes"))
+        get_resource_service.return_value.find_one.assert_called_once_with(
+            req=None, _id="iptc_subject_codes"
+        )
+
+    @mock.patch("belga.io.feed_parsers.context.get_resource_service")
+    def test_cv_items_are_copied(self, get_resource_service):
+        get_resource_service.return_value.get_items.return_value = [
+            {"qcode": "bel", "name": "Belgium", "scheme": "countries"}
+        ]
+        context = ParseContext()
+        context.get_cv_items("countries", qcode="bel")[0]["name"] = "foo"
+        self.assertEqual(
+            context.get_cv_items("countries", qcode="bel")[0]["name"], "Belgium"
+        )
+        get_resource_service.return_value.get_items.assert_called_once_with(
+            "countries", qcode="bel"
+        )
+
+    @mock.patch("belga.io.feed_parsers.context.get_resource_service")
+    def test_missing_user_is_cached(self, get_resource_service):
+        get_resource_service.return_value.find_one.return_value = None
+        context = ParseContext()
+        self.assertIsNone(context.get_user("john"))
+        self.assertIsNone(context.get_user("john"))
+        get_resource_service.return_value.find_one.assert_called_once_with(
+            req=None, username="john"
+        )
+
+
+class PrefetchedDataTestCase(unittest.TestCase):
+    prefetched = PrefetchedData(
+        [ParseContextTestCase.cv],
+        [{"_id": 1, "username": "john", "display_name": "John", "password": "x"}],
+    )
+
+    def test_cv_items_are_same_as_from_db(self):
+        self.assertEqual(
+            self.prefetched.get_vocabulary_items("iptc_subject_codes", "01000000"),
+            [{"qcode": "01000000", "name": "arts", "scheme": "iptc_subject_codes"}],
+        )
+        self.assertEqual(
+            self.prefetched.get_vocabulary_items("iptc_subject_codes", "02000000"), []
+        )
+        self.assertEqual(
+            [
+                item["name"]
+                for item in self.prefetched.get_vocabulary_items("iptc_subject_codes")
+            ],
+            ["arts", "arts duplicate"],
+        )
+        self.assertEqual(self.prefetched.get_vocabulary_items("missing"), [])
+        self.assertIn("is_active", ParseContextTestCase.cv["items"][0])
+
+    @mock.patch("belga.io.feed_parsers.context.get_resource_service")
+    def test_db_is_not_queried(self, get_resource_service):
+        with use_prefetched(self.prefetched):
+            context = ParseContext()
+            self.assertEqual(
+                list(context.get_subject_map("iptc_subject_codes")), ["01000000"]
+            )
+            self.assertEqual(
+                context.get_cv_items("iptc_subject_codes", qcode="01000000")[0]["name"],
+                "arts",
+            )
+            self.assertEqual(
+                context.get_user("john"),
+                {"_id": 1, "username": "john", "display_name": "John"},
+            )
+            self.assertIsNone(context.get_user("jane"))
+            self.assertIsNone(context.get_cv("missing"))
+        get_resource_service.assert_not_called()
+        get_resource_service.return_value.find_one.return_value = None
+        self.assertIsNone(ParseContext().get_user("john"))
+        get_resource_service.assert_called_once_with("users")
+
+
+class ParseContextMixinTestCase(unittest.TestCase):
+    def test_context_is_per_parse(self):
+        parser = ParseContextMixin()
+        self.assertIsNone(parser.context)
+        with parser.parse_context("outer", {"name": "outer"}) as outer:
+            self.assertIs(parser.context, outer)
+            self.assertEqual(parser.root, "outer")
+            with parser.parse_context("inner") as inner:
+                self.assertIs(parser.context, inner)
+                self.assertIsNone(inner.provider)
+            self.assertIs(parser.context, outer)
+        self.assertIsNone(parser.context)
+        self.assertIsNone(parser.root)
+
+    def test_context_is_per_thread(self):
+        parser = ParseContextMixin()
+        roots = {}
+
+        def parse(root):
+            with parser.parse_context(root):
+                barrier.wait()
+                roots[root] = parser.root
+
+        barrier = threading.Barrier(2)
+        threads = [threading.Thread(target=parse, args=(root,)) for root in "ab"]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(roots, {"a": "a", "b": "b"})
+
+    def test_root_is_set_in_context(self):
+        parser = ParseContextMixin()
+        parser.root = "ignored"
+        self.assertIsNone(parser.root)
+        with parser.parse_context("root") as context:
+            parser.root = "other"
+            self.assertEqual(context.root, "other")
+        self.assertIsNone(parser.root)
+
+    def test_parsers_can_be_created(self):
+        for parser_class in (
+            BelgaNewsMLOneFeedParser,
+            BelgaDPANewsMLTwoFeedParser,
+            BelgaIPTC7901FeedParser,
+        ):
+            parser = parser_class()
+            self.assertIsNone(parser.context)
+            self.assertIsNone(parser.root)
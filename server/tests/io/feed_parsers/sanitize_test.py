@@ -0,0 +1,68 @@
+import os
+import unittest
+
+import settings
+from superdesk import config
+
+from belga.io.feed_parsers import sanitize
+from belga.io.feed_parsers.belga_anpa import BelgaANPAFeedParser
+from belga.io.feed_parsers.belga_iptc7901 import BelgaIPTC7901FeedParser
+from tests import TestCase
+
+
+class SanitizeTestCase(unittest.TestCase):
+    def test_sanitize_text(self):
+        self.assertEqual(
+            sanitize.sanitize_text("\x01foo\x03\tbar\x1f\r\n<&>"), " foo \tbar \r\n<&>"
+        )
+
+    def test_text_to_html(self):
+        self.assertEqual(
+            sanitize.text_to_html("\x04a < b && c > d\n"),
+            " a &lt; b &amp;&amp; c &gt; d\n",
+        )
+
+    def test_sanitize_item(self):
+        item = {
+            "headline": "foo\x07",
+            "body_html": "<p>\x03bar</p>",
+            "priority": 3,
+            "subject": [{"name": "\x01"}],
+            "extra": {"city": "\x1fParis"},
+        }
+        self.assertIs(sanitize.sanitize_item(item), item)
+        self.assertEqual(
+            item,
+            {
+                "headline": "foo ",
+                "body_html": "<p> bar</p>",
+                "priority": 3,
+                "subject": [{"name": "\x01"}],
+                "extra": {"city": " Paris"},
+            },
+        )
+
+
+class SanitizeFixturesTestCase(TestCase):
+    parsers = {
+        "dpa.txt": BelgaIPTC7901FeedParser,
+        "ats.txt": BelgaIPTC7901FeedParser,
+        "kyodo.txt": BelgaANPAFeedParser,
+    }
+
+    def setUp(self):
+        for key in dir(settings):
+            if key.isupper():
+                setattr(config, key, getattr(settings, key))
+
+    def test_items_of_fixtures_are_valid_xml_text(self):
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        for filename, parser_class in self.parsers.items():
+            fixture = os.path.normpath(os.path.join(dirname, "../fixtures", filename))
+            item = parser_class().parse(fixture, {"name": "test"})
+            for fields in (item, item.get("extra", {})):
+                for key, value in fields.items():
+                    if isinstance(value, str):
+                        self.assertEqual(
+                            value, sanitize.sanitize_text(value), (filename, key)
+                        )
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from belga.io.feed_parsers import sniff
+
+
+class SniffTestCase(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+        self.write(b"\x01header\r\nfirst\r\nsecond")
+
+    def write(self, content, mtime=None):
+        with open(self.path, "wb") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(self.path, ns=(mtime, mtime))
+
+    def test_format_is_detected_once(self):
+        detect = mock.Mock(return_value="foo")
+        self.assertEqual(sniff.sniff(self.path, "test", detect), "foo")
+        self.assertEqual(sniff.sniff(self.path, "test", detect), "foo")
+        detect.assert_called_once_with(b"\x01header\r\n")
+
+        self.write(b"\x01other", mtime=10**9)
+        self.assertEqual(sniff.sniff(self.path, "test", detect), "foo")
+        detect.assert_called_with(b"\x01other")
+        self.assertEqual(detect.call_count, 2)
+
+    def test_format_is_returned_when_evicted(self):
+        detect = mock.Mock(return_value="foo")
+        with mock.patch.object(sniff, "_formats_cache", sniff.TTLCache(maxsize=0)):
+            self.assertEqual(sniff.sniff(self.path, "test", detect), "foo")
+
+    def test_none_format_is_cached(self):
+        detect = mock.Mock(return_value=None)
+        self.assertIsNone(sniff.sniff(self.path, "none", detect))
+        self.assertIsNone(sniff.sniff(self.path, "none", detect))
+        detect.assert_called_once_with(b"\x01header\r\n")
+
+    def test_read_lines(self):
+        with open(self.path, "rb") as f:
+            self.assertEqual(sniff.read_lines(self.path), list(f))
+
+        with mock.patch.object(sniff, "HEAD_SIZE", 4):
+            self.assertEqual(
+                sniff.read_lines(self.path),
+                [b"\x01header\r\n", b"first\r\n", b"second"],
+            )
@@ -0,0 +1,143 @@
+import os
+from io import BytesIO
+from unittest import mock
+
+from lxml import etree
+
+from belga.io.feed_parsers.belga_ats_newsml_1_2 import BelgaATSNewsMLOneFeedParser
+from belga.io.feed_parsers.belga_iptc7901 import BelgaIPTC7901FeedParser
+from belga.io.feed_parsers.belga_newsml_1_2 import BelgaNewsMLOneFeedParser
+from belga.io.feeding_services import file_belga
+from belga.io.feeding_services.file_belga import parse_file, parse_files
+from tests import TestCase
+
+
+class ParseFilesTestCase(TestCase):
+    filenames = ("dpa.txt", "ats.txt", "dpa.txt", "missing.txt", "ats.txt")
+
+    def setUp(self):
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        self.file_paths = [
+            os.path.normpath(os.path.join(dirname, "../fixtures", filename))
+            for filename in self.filenames
+        ]
+        self.parser = BelgaIPTC7901FeedParser()
+        self.provider = {"name": "test"}
+        self.addCleanup(file_belga.shutdown_executor)
+
+    def parse(self, workers):
+        return list(
+            parse_files(self.parser, self.file_paths, self.provider, workers=workers)
+        )
+
+    def test_items_are_in_order_of_files(self):
+        for workers in (1, 2):
+            results = self.parse(workers)
+            self.assertEqual(len(results), len(self.filenames))
+            for filename, (items, error) in zip(self.filenames, results):
+                if filename == "missing.txt":
+                    self.assertIsNone(items)
+                    self.assertIsInstance(error, Exception)
+                    continue
+                self.assertIsNone(error)
+                self.assertEqual(len(items), 1)
+                self.assertEqual(
+                    items[0].get("language"), "fr" if filename == "ats.txt" else None
+                )
+
+    def test_workers_parse_same_items(self):
+        sequential = self.parse(1)
+        parallel = self.parse(2)
+        for (items, _), (parallel_items, _) in zip(sequential, parallel):
+            if items is None:
+                self.assertIsNone(parallel_items)
+                continue
+            for item, parallel_item in zip(items, parallel_items):
+                # guids and ingest time are generated for every parse
+                for field in ("guid", "versioncreated", "firstcreated"):
+                    item.pop(field, None)
+                    parallel_item.pop(field, None)
+                self.assertEqual(item, parallel_item)
+
+    def test_workers_are_reused(self):
+        self.parse(2)
+        executor = file_belga.get_executor(2)
+        self.parse(2)
+        self.assertIs(file_belga.get_executor(2), executor)
+        self.assertIsNot(file_belga.get_executor(3), executor)
+
+    def test_newsml_is_parsed_incrementally(self):
+        parser = BelgaATSNewsMLOneFeedParser()
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        file_path = os.path.join(dirname, "../fixtures", "ats_newsml_1_2_belga.xml")
+        with open(file_path, "rb") as f:
+            expected = parser.parse(etree.parse(f).getroot(), self.provider)
+        with mock.patch.object(parser, "parse") as parse:
+            items = parse_file(parser, file_path, self.provider)
+        parse.assert_not_called()
+        self.assertEqual(len(items), len(expected))
+        for item, expected_item in zip(items, expected):
+            for field in ("guid", "versioncreated", "firstcreated"):
+                item.pop(field, None)
+                expected_item.pop(field, None)
+            self.assertEqual(item, expected_item)
+
+
+class ParseNewsMLFilesTestCase(TestCase):
+    filenames = (
+        "belga_newsml_1_2.xml",
+        "belga_remote_newsml_1_2.xml",
+        "belga_newsml_1_2_video.xml",
+        "belga_remote_newsml_1_2.xml",
+    )
+
+    def setUp(self):
+        super().setUp()
+        self.app.data.insert(
+            "users", [{"username": "DWM", "display_name": "DWM", "sign_off": "DWM"}]
+        )
+        self.fixtures = os.path.normpath(
+            os.path.join(os.path.dirname(os.path.realpath(__file__)), "../fixtures")
+        )
+        self.file_paths = [
+            os.path.join(self.fixtures, filename) for filename in self.filenames
+        ]
+        self.provider = {"name": "test", "config": {"path": self.fixtures}}
+        self.addCleanup(file_belga.shutdown_executor)
+
+    def get_file(self, filename):
+        with open(os.path.join(self.fixtures, filename), "rb") as f:
+            return BytesIO(f.read())
+
+    def parse(self, workers):
+        parser = BelgaNewsMLOneFeedParser()
+        with mock.patch.object(
+            BelgaNewsMLOneFeedParser, "_get_file", side_effect=self.get_file
+        ):
+            results = list(
+                parse_files(parser, self.file_paths, self.provider, workers=workers)
+            )
+        for items, error in results:
+            self.assertIsNone(error)
+            for item in items:
+                # guids and ingest time are generated for every parse
+                for field in ("guid", "versioncreated", "firstcreated"):
+                    item.pop(field, None)
+                # media are stored for every parse
+                for rendition in item.get("renditions", {}).values():
+                    rendition.pop("media")
+                    rendition.pop("href")
+        return results
+
+    def test_files_are_stored_by_ingest_process(self):
+        sequential = self.parse(1)
+        with mock.patch.object(self.app.media, "put", wraps=self.app.media.put) as put:
+            parallel = self.parse(2)
+        self.assertEqual(parallel, sequential)
+        # attachment is found by checksum, only renditions are uploaded
+        self.assertEqual(put.call_count, 2)
+        items = [items for items, _ in parallel]
+        self.assertEqual(items[0][0]["authors"][0]["sub_label"], "DWM")
+        self.assertEqual(items[1][0]["ednote"], "The story has 1 attachment(s)")
+        self.assertEqual(items[1][0]["attachments"], items[3][0]["attachments"])
+        self.assertEqual(set(items[2][0]["renditions"]), {"original", "thumbnail"})
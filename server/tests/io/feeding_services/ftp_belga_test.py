@@ -0,0 +1,82 @@
+import ftplib
+import os
+import tempfile
+from unittest import mock
+
+from belga.io.feeding_services import file_belga
+from belga.io.feeding_services.ftp_belga import FTPBelgaFeedingService
+from tests import TestCase
+
+
+class FTPBelgaFeedingServiceTestCase(TestCase):
+    def setUp(self):
+        super().setUp()
+        dirname = os.path.dirname(os.path.realpath(__file__))
+        with open(
+            os.path.join(dirname, "../fixtures", "belga_newsml_1_2.xml"), "rb"
+        ) as f:
+            newsml = f.read()
+        # files on the server in order of modification
+        self.files = {
+            "1.xml": newsml,
+            "2.xml": b"",
+            "3.xml": newsml,
+            "4.xml": None,
+            "5.xml": b"<broken",
+            "6.txt": newsml,
+        }
+        self.ftp = mock.MagicMock()
+        self.ftp.mlsd.return_value = [
+            (filename, {"type": "file", "modify": "2020010112000{}".format(i)})
+            for i, filename in enumerate(self.files)
+        ]
+        self.ftp.retrbinary.side_effect = self.retrbinary
+        dest_path = tempfile.mkdtemp()
+        self.provider = {
+            "_id": "test",
+            "name": "test",
+            "feeding_service": FTPBelgaFeedingService.NAME,
+            "feed_parser": "belganewsml12",
+            "config": {"host": "localhost", "dest_path": dest_path, "move": True},
+        }
+        self.addCleanup(file_belga.shutdown_executor)
+
+    def retrbinary(self, cmd, callback):
+        content = self.files[cmd.split(" ", 1)[1]]
+        if content is None:
+            raise ftplib.error_perm("550 Failed to open file.")
+        callback(content)
+
+    @mock.patch.object(
+        FTPBelgaFeedingService,
+        "_create_move_folders",
+        return_value=("_PROCESSED", "_ERROR"),
+    )
+    @mock.patch.object(FTPBelgaFeedingService, "_move")
+    def test_files_are_parsed_in_order(self, move, create_move_folders):
+        update = {}
+        self.app.config["BELGA_PARSE_WORKERS"] = 2
+        with mock.patch(
+            "belga.io.feeding_services.ftp_belga.ftp_connect"
+        ) as ftp_connect:
+            ftp_connect.return_value.__enter__.return_value = self.ftp
+            results = list(FTPBelgaFeedingService().update(self.provider, update))
+
+        self.assertEqual(len(results), 2)
+        for items in results:
+            self.assertEqual(
+                items[0]["headline"],
+                "Mediawatch dinsdag 29/01/2019 - VTM Nieuws - 13 uur",
+            )
+        self.assertEqual(
+            [(args[1], args[2]) for args, _ in move.call_args_list],
+            [
+                ("4.xml", "_ERROR/4.xml"),
+                ("1.xml", "_PROCESSED/1.xml"),
+                ("3.xml", "_PROCESSED/3.xml"),
+                ("5.xml", "_ERROR/5.xml"),
+            ],
+        )
+        self.assertEqual(
+            update["private"]["last_processed_file_modify"].strftime("%S"), "04"
+        )
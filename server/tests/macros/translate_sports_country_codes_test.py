@@ -50,3 +50,18 @@ class TranslateSportsCountryCodesTestCase(unittest.TestCase):
             "<p>29. Thomas Tumler (Zwi) 2:00.44 ( 59.67 + 1:00.77)</p>",
             item["body_html"],
         )
+
+    def test_translate_multiple_codes(self):
+        item = {
+            "language": "fr",
+            "body_html": "<p>1. Marco Odermatt (SUI) 1:59.12</p>"
+            "<p>2. Linus Strasser (GER/12) 1:59.40</p>"
+            "<p>3. Henrik Kristoffersen (NOR) 1:59.63</p>",
+        }
+        item = macro.callback(item)
+        self.assertEqual(
+            "<p>1. Marco Odermatt (Sui) 1:59.12</p>\n"
+            "<p>2. Linus Strasser (All/12) 1:59.40</p>\n"
+            "<p>3. Henrik Kristoffersen (Nor) 1:59.63</p>",
+            item["body_html"],
+        )
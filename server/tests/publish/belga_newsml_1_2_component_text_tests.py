@@ -0,0 +1,138 @@
+# -*- coding: utf-8; -*-
+#
+# This file is part of Superdesk.
+#
+# Copyright 2013 - 2019 Sourcefabric z.u. and contributors.
+#
+# For the full copyright and license information, please see the
+# AUTHORS and LICENSE files distributed with this source code, or
+# at https://www.sourcefabric.org/superdesk/license
+
+import random
+import unittest
+
+from lxml import etree
+from superdesk.etree import parse_html, to_string
+
+from belga.publish.belga_newsml_1_2 import get_component_text, get_lead_and_body_text
+
+
+def get_legacy_lead_and_body_text(html):
+    """Lead and body text as they were produced by reparsing of split ``body_html``."""
+    item = {"body_html": html, "lead": ""}
+    if item.get("body_html"):
+        tree = parse_html(item["body_html"], content="html")
+        for el in tree:
+            if el.tag == "p":
+                item["lead"] = to_string(el)
+                tree.remove(el)
+                item["body_html"] = to_string(tree, pretty_print=True)
+            break
+    return tuple(
+        get_component_text(item[key]) if item.get(key) else None
+        for key in ("lead", "body_html")
+    )
+
+
+TOKENS = (
+    "<p>",
+    "</p>",
+    "<h1>",
+    "</h1>",
+    "<h4>",
+    "</h4>",
+    "<b>",
+    "</b>",
+    "<a href='x'>",
+    "</a>",
+    "<span>",
+    "</span>",
+    "<div>",
+    "</div>",
+    "<br>",
+    "<hr>",
+    "<img src='a'>",
+    "<ul>",
+    "<li>",
+    "</li>",
+    "</ul>",
+    "<table>",
+    "<tr>",
+    "<td>",
+    "</table>",
+    "<pre>",
+    "</pre>",
+    "<style>a&b<c</style>",
+    "<script>x<y</script>",
+    "<select><option>o</option></select>",
+    "<!-- c -->",
+    "<p/>",
+    "<h2/>",
+    "<p></p>",
+    "<p><br></p>",
+    "</x>",
+    "<body>",
+    "text",
+    " ",
+    "\n",
+    "\r\n",
+    "&amp;",
+    "&nbsp;",
+    "&#13;",
+    "\x7f",
+    "<",
+    "&",
+    "é",
+)
+
+
+class LeadAndBodyTextTestCase(unittest.TestCase):
+    bodies = (
+        "",
+        " ",
+        "plain text",
+        "<p>lead</p>",
+        "<p>lead</p>tail<p>body</p>",
+        "text<p>lead</p><p>body</p>",
+        "<h2>title</h2><p>first</p><p>second</p>",
+        "<p>lead <b>bold</b></p><p><b>only bold</b></p><p></p><h2>x</h2>",
+        "<p>lead</p><p>a<br/>\n<br/>b</p><ul><li>x</li><li>y</li></ul>",
+        "<p>lead</p><table><tr><td>1</td><td>2</td></tr></table><p>end</p>",
+        "<!-- EMBED START --><figure><img src='a'><figcaption>c</figcaption></figure>",
+        "<p>lead</p><!-- EMBED START --><figure><img src='a'></figure><p>body</p>",
+        "<p>lead</p><pre>\n  code</pre><style>a&b<c</style>",
+        "<p>a &amp; b &lt;c&gt;</p><p>\x03d</p>",
+    )
+
+    def assertSameText(self, html):
+        self.assertEqual(
+            self._get_result(get_lead_and_body_text, html),
+            self._get_result(get_legacy_lead_and_body_text, html),
+            html,
+        )
+
+    def _get_result(self, func, html):
+        # html without any content can't be parsed by both
+        try:
+            return func(html)
+        except etree.ParserError as error:
+            return type(error)
+
+    def test_text_is_same_as_from_reparsed_components(self):
+        for html in self.bodies:
+            self.assertSameText(html)
+
+    def test_random_html(self):
+        rand = random.Random(0)
+        for _ in range(500):
+            html = "".join(rand.choice(TOKENS) for _ in range(rand.randint(1, 20)))
+            if rand.random() < 0.7:
+                html = "<p>" + html
+            self.assertSameText(html)
+
+    def test_long_body(self):
+        html = "".join(
+            "<p>Paragraph {} with <b>bold</b> and <a href='x'>link</a>.</p>".format(i)
+            for i in range(300)
+        )
+        self.assertSameText(html)
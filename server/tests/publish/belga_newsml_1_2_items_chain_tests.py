@@ -11,13 +11,14 @@
 import pytz
 import json
 import datetime
+import unittest
 from pathlib import Path
 from lxml import etree
 from unittest import mock
 from bson.objectid import ObjectId
 
 from superdesk.publish import init_app
-from belga.publish.belga_newsml_1_2 import BelgaNewsML12Formatter
+from belga.publish.belga_newsml_1_2 import BelgaNewsML12Formatter, DocsByIds
 from .. import TestCase
 
 
@@ -999,3 +1000,22 @@ class BelgaNewsML12Formatter_ItemsChainImageTest(TestCase):
         image_roles = self.newsml.xpath('//Role[@FormalName="Image"]')
         # modification in SDBELGA-514 for SDBELGA-597
         self.assertEqual(len(image_roles), 2)
+
+
+class DocsByIdsTestCase(unittest.TestCase):
+    def test_docs_are_fetched_once(self):
+        service = mock.Mock()
+        service.find.return_value = [{"_id": "a"}, {"_id": "b"}]
+        docs = DocsByIds(service, ["b", "a", "b"])
+        self.assertEqual(docs.get(["b"]), [{"_id": "b"}])
+        self.assertEqual(docs.get(["b", "a"]), [{"_id": "a"}, {"_id": "b"}])
+        self.assertEqual(docs.get([]), [])
+        self.assertEqual(docs.queries, 1)
+        service.find.assert_called_once()
+
+    def test_no_query_without_ids(self):
+        service = mock.Mock()
+        docs = DocsByIds(service, [])
+        self.assertEqual(docs.get([]), [])
+        self.assertEqual(docs.queries, 0)
+        service.find.assert_not_called()
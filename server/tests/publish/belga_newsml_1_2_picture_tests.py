@@ -14,7 +14,10 @@ from unittest import mock
 from bson.objectid import ObjectId
 
 from superdesk.publish import init_app
-from belga.publish.belga_newsml_1_2 import BelgaNewsML12Formatter
+from belga.publish.belga_newsml_1_2 import (
+    BelgaNewsML12Formatter,
+    invalidate_formatted_cache,
+)
 from .. import TestCase
 
 
@@ -185,6 +188,7 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
         article["state"] = "published"
         self.formatter = BelgaNewsML12Formatter()
         seq, doc = self.formatter.format(article, self.subscriber)[0]
+        self.context = self.formatter._create_context(article)
         self.newsml = etree.XML(
             bytes(bytearray(doc, encoding=BelgaNewsML12Formatter.ENCODING))
         )
@@ -200,7 +204,7 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
         # NewsML -> NewsEnvelope
         self.assertEqual(
             self.newsml.xpath("NewsEnvelope/DateAndTime")[0].text,
-            self.formatter._string_now,
+            self.context.string_now,
         )
         self.assertIsNone(
             self.newsml.xpath("NewsEnvelope/NewsService")[0].text,
@@ -226,7 +230,7 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
             self.newsml.xpath("NewsItem/Identification/NewsIdentifier/NewsItemId")[
                 0
             ].text,
-            self.formatter._duid,
+            self.context.duid,
         )
         revisionid = self.newsml.xpath(
             "NewsItem/Identification/NewsIdentifier/RevisionId"
@@ -341,3 +345,24 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
             'NewsComponent/Role[@FormalName="Image"]/ancestor::NewsComponent/ContentItem/MimeType'
         )[0]
         self.assertEqual(mimetype.attrib["FormalName"], "image/jpg")
+
+    @mock.patch(
+        "superdesk.publish.subscribers.SubscribersService.generate_sequence_number",
+        lambda s, sub: 1,
+    )
+    def test_media_length_is_cached(self):
+        invalidate_formatted_cache()
+        with mock.patch.object(self.app.media, "get") as media_get:
+            seq, doc = self.formatter.format(self.archive[0], self.subscriber)[0]
+        media_get.assert_not_called()
+        newsml = etree.XML(
+            bytes(bytearray(doc, encoding=BelgaNewsML12Formatter.ENCODING))
+        )
+        sizeinbytes = newsml.xpath(
+            '//NewsComponent/Role[@FormalName="Image"]/ancestor::NewsComponent[1]'
+            "/ContentItem/Characteristics/SizeInBytes"
+        )[0]
+        self.assertEqual(sizeinbytes.text, "15")
+
+    def test_formatter_keeps_no_state(self):
+        self.assertEqual(vars(self.formatter), {})
@@ -16,7 +16,10 @@ from unittest import mock
 from bson.objectid import ObjectId
 
 from superdesk.publish import init_app
-from belga.publish.belga_newsml_1_2 import BelgaNewsML12Formatter
+from belga.publish.belga_newsml_1_2 import (
+    BelgaNewsML12Formatter,
+    invalidate_formatted_cache,
+)
 from belga.search_providers import BelgaCoverageSearchProvider
 from .. import TestCase
 
@@ -1002,9 +1005,10 @@ class BelgaNewsML12FormatterTextTest(TestCase):
 
     def parse(self, article):
         self.formatter = BelgaNewsML12Formatter()
-        seq, doc = self.formatter.format(article, self.subscriber)[0]
+        seq, self.doc = self.formatter.format(article, self.subscriber)[0]
+        self.context = self.formatter._create_context(article)
         self.newsml = etree.XML(
-            bytes(bytearray(doc, encoding=BelgaNewsML12Formatter.ENCODING))
+            bytes(bytearray(self.doc, encoding=BelgaNewsML12Formatter.ENCODING))
         )
 
     def test_catalog(self):
@@ -1018,7 +1022,7 @@ class BelgaNewsML12FormatterTextTest(TestCase):
         # NewsML -> NewsEnvelope
         self.assertEqual(
             self.newsml.xpath("NewsEnvelope/DateAndTime")[0].text,
-            self.formatter._string_now,
+            self.context.string_now,
         )
         self.assertIsNone(
             self.newsml.xpath("NewsEnvelope/NewsService")[0].text,
@@ -1044,7 +1048,7 @@ class BelgaNewsML12FormatterTextTest(TestCase):
             self.newsml.xpath("NewsItem/Identification/NewsIdentifier/NewsItemId")[
                 0
             ].text,
-            self.formatter._duid,
+            self.context.duid,
         )
         revisionid = self.newsml.xpath(
             "NewsItem/Identification/NewsIdentifier/RevisionId"
@@ -2341,3 +2345,61 @@ class BelgaNewsML12FormatterTextTest(TestCase):
         self.assertEqual(
             newscomponent_2_level.xpath("NewsLines/CreditLine")[0].text, "DPA"
         )
+
+    @mock.patch(
+        "superdesk.publish.subscribers.SubscribersService.generate_sequence_number",
+        lambda s, sub: 1,
+    )
+    @mock.patch(
+        "belga.search_providers.BelgaCoverageSearchProvider.api_get",
+        lambda self, endpoint, params: belga_apiget_response,
+    )
+    @mock.patch(
+        "belga.publish.belga_newsml_1_2.get_service_by_id",
+        lambda _: BelgaCoverageSearchProvider({"_id": "test"}),
+    )
+    def test_format_to(self):
+        seq, doc = BelgaNewsML12Formatter().format(self.article, self.subscriber)[0]
+        output = BytesIO()
+        invalidate_formatted_cache(self.article["guid"])
+        seq_streamed = BelgaNewsML12Formatter().format_to(
+            self.article, self.subscriber, output
+        )
+        self.assertEqual(seq, seq_streamed)
+        self.assertEqual(output.getvalue(), doc.encode(BelgaNewsML12Formatter.ENCODING))
+
+    @mock.patch(
+        "superdesk.publish.subscribers.SubscribersService.generate_sequence_number",
+        lambda s, sub: sub["sequence_number"],
+    )
+    @mock.patch(
+        "belga.search_providers.BelgaCoverageSearchProvider.api_get",
+        lambda self, endpoint, params: belga_apiget_response,
+    )
+    @mock.patch(
+        "belga.publish.belga_newsml_1_2.get_service_by_id",
+        lambda _: BelgaCoverageSearchProvider({"_id": "test"}),
+    )
+    def test_format_once_per_subscribers(self):
+        prepare_newsml = mock.patch.object(
+            BelgaNewsML12Formatter,
+            "_prepare_newsml",
+            autospec=True,
+            side_effect=BelgaNewsML12Formatter._prepare_newsml,
+        )
+        with prepare_newsml as prepare:
+            seq, doc = BelgaNewsML12Formatter().format(
+                self.article, {"_id": "second", "sequence_number": 2}
+            )[0]
+        prepare.assert_not_called()
+        self.assertEqual(seq, 2)
+        self.assertEqual(doc, self.doc)
+
+        invalidate_formatted_cache(self.context.duid)
+        with prepare_newsml as prepare:
+            seq, doc = BelgaNewsML12Formatter().format(
+                self.article, {"_id": "third", "sequence_number": 3}
+            )[0]
+        prepare.assert_called_once()
+        self.assertEqual(seq, 3)
+        self.assertEqual(doc, self.doc)
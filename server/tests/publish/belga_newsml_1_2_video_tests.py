@@ -232,6 +232,7 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
         self.article["state"] = "published"
         self.formatter = BelgaNewsML12Formatter()
         seq, doc = self.formatter.format(self.article, self.subscriber)[0]
+        self.context = self.formatter._create_context(self.article)
         self.newsml = etree.XML(
             bytes(bytearray(doc, encoding=BelgaNewsML12Formatter.ENCODING))
         )
@@ -247,7 +248,7 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
         # NewsML -> NewsEnvelope
         self.assertEqual(
             self.newsml.xpath("NewsEnvelope/DateAndTime")[0].text,
-            self.formatter._string_now,
+            self.context.string_now,
         )
         self.assertIsNone(
             self.newsml.xpath("NewsEnvelope/NewsService")[0].text,
@@ -273,7 +274,7 @@ class BelgaNewsML12FormatterVideoTest(TestCase):
             self.newsml.xpath("NewsItem/Identification/NewsIdentifier/NewsItemId")[
                 0
             ].text,
-            self.formatter._duid,
+            self.context.duid,
         )
         revisionid = self.newsml.xpath(
             "NewsItem/Identification/NewsIdentifier/RevisionId"
@@ -7,7 +7,11 @@ from flask import json
 from datetime import datetime
 from httmock import all_requests, HTTMock
 from unittest.mock import patch, MagicMock
-from belga.search_providers import Belga360ArchiveSearchProvider, TIMEOUT
+from belga.search_providers import (
+    Belga360ArchiveSearchProvider,
+    TIMEOUT,
+    _archive_previews_cache,
+)
 from superdesk.tests import TestCase
 
 
@@ -440,3 +444,27 @@ class Belga360ArchiveTestCase(TestCase):
                     ]
                 },
             )
+
+    @patch("belga.search_providers.session.get")
+    def test_preview_of_found_item(self, session_get):
+        _archive_previews_cache.clear()
+        response = DetailResponse()
+        with open(fixture("belga-360archive-search.json")) as _file:
+            response.json = MagicMock(return_value=json.load(_file))
+        session_get.return_value = response
+
+        self.provider.find(self.query)
+        items = self.provider.find(self.query, {"preview_id": "39670442"})
+
+        # news object is known from search, only news item is fetched
+        url = self.provider.base_url + "archivenewsitems/39670441"
+        session_get.assert_called_with(url, params={}, timeout=TIMEOUT)
+        self.assertEqual(session_get.call_count, 2)
+        self.assertEqual(items[0]["guid"], "urn:belga.be:360archive:39670442")
+        self.assertIn("belga_related_articles--0", items[0]["associations"])
+
+        # preview is cached
+        self.assertEqual(
+            items, self.provider.find(self.query, {"preview_id": "39670442"})
+        )
+        self.assertEqual(session_get.call_count, 2)
@@ -191,3 +191,28 @@ class BelgaImageTestCase(unittest.TestCase):
             "test:da70d29ee4703023f27b6af5cbad9fb267de50e02332ec4359d860c5d5b98253",
             headers["X-Authorization"],
         )
+
+    @patch("belga.search_providers.app")
+    @patch("belga.search_providers.session.get")
+    def test_auth_tokens_are_reused(self, session_get, app):
+        app.config = {}
+        session_get.return_value.status_code = 200
+        session_get.return_value.json.return_value = {
+            "idToken": "id_token",
+            "authToken": "auth_token",
+        }
+        provider = {
+            "_id": "auth_tokens_test",
+            "config": {"username": "john", "password": "pwd"},
+        }
+
+        first = BelgaImageSearchProvider(provider)
+        second = BelgaImageSearchProvider(provider)
+
+        self.assertEqual(1, session_get.call_count)
+        self.assertEqual("id_token", second._id_token)
+        self.assertEqual("auth_token", second._auth_token)
+
+        # changed config must authorize again
+        BelgaImageSearchProvider(dict(provider, config={"username": "jane"}))
+        self.assertEqual(2, session_get.call_count)
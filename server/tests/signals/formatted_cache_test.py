@@ -0,0 +1,35 @@
+import unittest
+from unittest import mock
+
+from belga.publish import belga_newsml_1_2
+from belga.publish.belga_newsml_1_2 import invalidate_formatted_cache
+from belga.signals.formatted_cache import handle_updated
+
+
+class FormattedCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(
+            belga_newsml_1_2, "_formatted_cache", belga_newsml_1_2.TTLCache()
+        )
+        self.cache = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cache.set(("original", "original", 1, 1, (("original", 1),)), "original")
+        self.cache.set(
+            ("original", "update", 2, 1, (("original", 1), ("update", 2))), "update"
+        )
+        self.cache.set(("other", "other", 1, 1, (("other", 1),)), "other")
+
+    def get_cached(self):
+        return sorted(self.cache.get(key) for key in self.cache.keys())
+
+    def test_updated_item_is_invalidated(self):
+        handle_updated(None, item={"guid": "update"}, original={"guid": "update"})
+        self.assertEqual(self.get_cached(), ["original", "other"])
+
+    def test_updated_original_invalidates_chain(self):
+        handle_updated(None, item={"guid": "original"}, original={"guid": "original"})
+        self.assertEqual(self.get_cached(), ["other"])
+
+    def test_invalidate_all(self):
+        invalidate_formatted_cache()
+        self.assertEqual(self.get_cached(), [])
@@ -0,0 +1,35 @@
+import unittest
+
+from belga.subjects import SubjectSet, unique_subjects
+
+
+class SubjectSetTestCase(unittest.TestCase):
+    subjects = [
+        {"name": "France", "qcode": "fra", "scheme": "countries"},
+        {"name": "default", "qcode": "default", "scheme": "distribution"},
+        {"name": "FRANCE", "qcode": "fra", "scheme": "countries", "parent": None},
+        {"name": "fra", "qcode": "fra", "scheme": "belga-keywords"},
+        {"name": "France", "qcode": "fra", "scheme": "countries"},
+    ]
+
+    def test_first_subject_wins(self):
+        subjects = SubjectSet(self.subjects)
+        self.assertEqual(len(subjects), 3)
+        self.assertEqual([s["name"] for s in subjects], ["France", "default", "fra"])
+        self.assertIn({"qcode": "fra", "scheme": "countries"}, subjects)
+
+    def test_replace(self):
+        subjects = SubjectSet(self.subjects)
+        subjects.replace(
+            "distribution",
+            [{"name": "bilc", "qcode": "bilc", "scheme": "distribution"}],
+        )
+        self.assertEqual([s["qcode"] for s in subjects], ["fra", "fra", "bilc"])
+        subjects.discard_schemes("countries", "distribution")
+        self.assertEqual(list(subjects), [self.subjects[3]])
+
+    def test_unique_subjects(self):
+        self.assertEqual(
+            [s["name"] for s in unique_subjects(self.subjects)],
+            ["default", "France", "fra"],
+        )